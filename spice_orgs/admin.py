@@ -1,6 +1,15 @@
 from django.contrib import admin
 
-from .models import Member, Organization, Team, TeamMember
+from .models import (
+    ChangeLogEntry,
+    EffectivePermission,
+    Member,
+    Organization,
+    OrganizationDeletion,
+    Role,
+    Team,
+    TeamMember,
+)
 
 
 class MemberAdmin(admin.ModelAdmin):
@@ -24,7 +33,40 @@ class TeamMemberAdmin(admin.ModelAdmin):
     list_display = ["team", "member", "team_role"]
 
 
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    list_display = ["id", "created_at", "object_type", "object_id", "action"]
+    list_filter = ["object_type", "action"]
+
+
+class OrganizationDeletionAdmin(admin.ModelAdmin):
+    list_display = ["organization_slug", "status", "deleted_rows", "total_rows"]
+    list_filter = ["status"]
+
+
+class RoleAdmin(admin.ModelAdmin):
+    list_display = ["name", "organization", "permissions"]
+
+
+class EffectivePermissionAdmin(admin.ModelAdmin):
+    """Read only, the rows follow the memberships (see sync_effective_permissions)."""
+
+    list_display = ["user", "organization", "team", "permissions"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Organization, OrganizationAdmin)
 admin.site.register(Member, MemberAdmin)
 admin.site.register(Team, TeamAdmin)
 admin.site.register(TeamMember, TeamMemberAdmin)
+admin.site.register(ChangeLogEntry, ChangeLogEntryAdmin)
+admin.site.register(OrganizationDeletion, OrganizationDeletionAdmin)
+admin.site.register(EffectivePermission, EffectivePermissionAdmin)
+admin.site.register(Role, RoleAdmin)
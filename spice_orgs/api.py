@@ -1,25 +1,56 @@
 import logging
 from typing import List
+from uuid import UUID
 
 from django.contrib.auth import get_user_model
-from django.http import Http404, HttpResponseForbidden
-from ninja import Router
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.http import Http404, HttpResponseForbidden, StreamingHttpResponse
+from ninja import File, Query, Router
+from ninja.files import UploadedFile
 from ninja.pagination import paginate
 from ninja.security import django_auth
 
-from .models import Member, Organization, Team, TeamMember
+from . import export
+from .changes import CHANGES_PAGE_SIZE, changes_since
+from .conditional import conditional
+from .exceptions import OrganizationPermissionError, TeamPermissionError
+from .importers import iter_members_csv
+from .models import Member, Organization, OrganizationDeletion, Team, TeamMember
+from .permissions import authorize, get_membership
+from .profiling import instrument
+from .projections import project
+from .rendering import render_schema
+from .routing import read_from_replica
 from .schema import (
     AddMemberSchema,
     AddTeamMemberSchema,
+    AuthorizationRequestSchema,
+    AuthorizationResultSchema,
+    BulkAddMembersSchema,
+    BulkAddTeamMembersSchema,
+    BulkMemberResultSchema,
+    BulkRemoveTeamMembersSchema,
+    BulkUpdateTeamMembersSchema,
+    ChangeFeedSchema,
     CreateUpdateOrganizationSchema,
     CreateUpdateTeamSchema,
     MemberSchema,
+    MyMembershipSchema,
+    OrganizationDeletionSchema,
     OrganizationSchema,
+    SearchResultsSchema,
     TeamMemberSchema,
     TeamSchema,
     UpdateMemberSchema,
     UpdateTeamMemberSchema,
 )
+from .search import (
+    SEARCH_LIMIT,
+    search_members,
+    search_organizations,
+    search_teams,
+    search_terms,
+)
 
 UserModel = get_user_model()
 
@@ -29,46 +60,121 @@ router = Router()
 
 
 @router.get("/", response=List[OrganizationSchema])
+@read_from_replica
+@render_schema(OrganizationSchema)
+@conditional
 @paginate
 def list_organizations(request):
     """
     List all Organizations a user can see.
     This includes all publicly visible, active ones and any the user is a member of.
     """
-    organizations = Organization.objects.filter(is_active=True, publicly_visible=True)
+    organizations = project(
+        Organization.objects.filter(is_active=True), OrganizationSchema
+    )
     if not request.user.is_anonymous:
-        # if the user is logged in, get the organizations they are a member of
-        return organizations.union(
-            Organization.objects.filter(is_active=True, member__user=request.user)
+        # if the user is logged in, also get the organizations they are a member of.
+        # an EXISTS filter keeps this a plain queryset that can be counted and
+        # keyset paginated, unlike a UNION
+        return organizations.filter(
+            Q(publicly_visible=True)
+            | Exists(
+                Member.objects.filter(organization=OuterRef("pk"), user=request.user)
+            )
+        )
+    return organizations.filter(publicly_visible=True)
+
+
+@router.get("/changes", response=ChangeFeedSchema, auth=django_auth)
+def list_changes(
+    request,
+    since: int = 0,
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_PAGE_SIZE),
+):
+    """
+    Creates, updates and deletes (tombstones) of organizations, members, teams
+    and team members made after the `since` cursor. Staff only.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Only staff users can read the changes feed")
+    return changes_since(since, limit)
+
+
+@router.get("/search", response=SearchResultsSchema)
+@read_from_replica
+def search(
+    request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=100),
+):
+    """
+    Prefix search of organization and team names and member usernames/emails,
+    limited to what the caller could see through the list endpoints.
+    """
+    terms = search_terms(q)
+    return {
+        "organizations": list(search_organizations(request.user, terms, limit)),
+        "teams": list(search_teams(request.user, terms, limit)),
+        "members": list(search_members(request.user, terms, limit)),
+    }
+
+
+@router.get("/me/memberships", response=List[MyMembershipSchema], auth=django_auth)
+@read_from_replica
+@paginate
+def list_my_memberships(request):
+    """
+    Every active Organization the user is a member of, with their role and
+    their teams in it. Three queries per page (the count, the memberships and
+    their teams), however many teams there are.
+    """
+    return (
+        Member.objects.filter(user=request.user, organization__is_active=True)
+        .select_related("organization")
+        .prefetch_related(
+            Prefetch(
+                "teammember_set",
+                queryset=TeamMember.objects.filter(team__is_active=True)
+                .select_related("team")
+                .order_by("team__name"),
+                to_attr="teams",
+            )
         )
-    return organizations
+    )
+
+
+@router.post("/authorize", response=List[AuthorizationResultSchema], auth=django_auth)
+def authorize_checks(request, payload: AuthorizationRequestSchema):
+    """
+    Answer a batch of "can this user do this in that organization/team"
+    checks at once. Staff only.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Only staff users can check authorizations")
+    allowed = authorize(
+        (check.user, check.organization_slug, check.team_slug, check.action)
+        for check in payload.checks
+    )
+    return [
+        {**check.dict(), "allowed": check_allowed}
+        for check, check_allowed in zip(payload.checks, allowed)
+    ]
 
 
 @router.get("/{organization_slug}/", response=OrganizationSchema)
+@read_from_replica
+@render_schema(OrganizationSchema)
+@conditional
 def get_organization_details_by_slug(request, organization_slug: str):
     """
     Get details for a specific Organization by slug.
     By default, returns details for active, publicly available ones.
     Else, returns the details of the organization if the user is a member.
-
-    The happy path is that the organization exists
-    and the user is a member of it, so search for that first.
-    Then search for the organization and if it is active and publicly visible.
     """
-
-    try:
-        return Organization.objects.get(
-            slug=organization_slug, is_active=True, member__user=request.user
-        )
-    except Organization.DoesNotExist:
-        try:
-            return Organization.objects.get(
-                slug=organization_slug, is_active=True, publicly_visible=True
-            )
-        except Organization.DoesNotExist as exception:
-            raise Http404(
-                f"Organization not found for slug: {organization_slug}"
-            ) from exception
+    membership = get_membership(request, organization_slug)
+    if not membership.can_view_organization:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+    return membership.organization
 
 
 @router.post("/", response=OrganizationSchema, auth=django_auth)
@@ -90,47 +196,57 @@ def update_organization_details(
     request, organization_slug: str, payload: CreateUpdateOrganizationSchema
 ):
     """
-    Update an Organization if user is an owner.
+    Update an Organization if the user's role grants managing it.
     """
-
-    try:
-        organization = Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
-            member__role=Member.MemberRole.OWNER,
-        )
-        for key, value in payload.dict().items():
-            setattr(organization, key, value)
-        organization.save()
-        return organization
-    except Organization.DoesNotExist:
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
         return HttpResponseForbidden(
             "You can only update organizations you are the owner of"
         )
+    organization = membership.organization
+    for key, value in payload.dict().items():
+        setattr(organization, key, value)
+    organization.save()
+    return organization
 
 
-@router.delete("/{organization_slug}/", response=bool, auth=django_auth)
+@router.delete(
+    "/{organization_slug}/",
+    response={202: OrganizationDeletionSchema},
+    auth=django_auth,
+)
 def delete_organization(request, organization_slug: str):
     """
-    Delete an Organization if user is an owner.
+    Deactivate an Organization if the user's role grants managing it and queue
+    the deletion of its rows. Poll the returned deletion for progress.
     """
-
-    try:
-        Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
-            member__role=Member.MemberRole.OWNER,
-        ).delete()
-        return True
-    except Organization.DoesNotExist:
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
         return HttpResponseForbidden(
             "You can only delete organizations you are the owner of"
         )
+    return 202, membership.organization.schedule_deletion(requested_by=request.user)
+
+
+@router.get(
+    "/deletions/{deletion_id}", response=OrganizationDeletionSchema, auth=django_auth
+)
+def organization_deletion_progress(request, deletion_id: UUID):
+    """
+    Progress of an organization deletion, for the user who requested it.
+    """
+    deletion = OrganizationDeletion.objects.filter(pk=deletion_id).first()
+    if deletion is None or not (
+        request.user.is_staff or deletion.requested_by_id == request.user.pk
+    ):
+        raise Http404(f"Deletion not found: {deletion_id}")
+    return deletion
 
 
 @router.get("/{organization_slug}/members/", response=List[MemberSchema])
+@read_from_replica
+@render_schema(MemberSchema)
+@conditional
 @paginate
 def list_organization_members(request, organization_slug: str):
     """
@@ -138,54 +254,74 @@ def list_organization_members(request, organization_slug: str):
     If the user is an owner or a superuser return all members.
     Else, return only publicly visible members.
     """
-    try:
-        request_user = request.user if request.user.is_authenticated else None
-        # we found an organization the user is a member of
-        organization = Organization.objects.get(
-            slug=organization_slug, is_active=True, member__user=request_user
-        )
-        # if the user is a superuser or an owner of the organization return all members
-        if (
-            request_user.is_superuser
-            or organization.member_set.filter(
-                user=request_user, role=Member.MemberRole.OWNER
-            ).exists()
-        ):
-            return organization.member_set.filter()
-        # else return only publicly visible members
-        return organization.member_set.filter(publicly_visible=True)
-    except Organization.DoesNotExist:
-        try:
-            # if the organization is active and publicly visible,
-            # return only publicly visible members
-            organization = Organization.objects.get(
-                slug=organization_slug, is_active=True, publicly_visible=True
-            )
-            return organization.member_set.filter(publicly_visible=True)
-        except Organization.DoesNotExist as exception:
-            raise Http404(
-                f"Organization not found for slug: {organization_slug}"
-            ) from exception
+    membership = get_membership(request, organization_slug)
+    if not membership.can_view_organization:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+    members = project(membership.organization.member_set.all(), MemberSchema)
+    # if the user is a superuser or an owner of the organization return all members
+    if membership.is_member and membership.can_manage_organization:
+        return members
+    # else return only publicly visible members
+    return members.filter(publicly_visible=True)
 
 
 @router.post("/{organization_slug}/members/", response=MemberSchema, auth=django_auth)
 def add_member_to_organization(
     request, organization_slug: str, payload: AddMemberSchema
 ):
-    request_user = request.user
-    organization = Organization.objects.get(slug=organization_slug, is_active=True)
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-    ):
-        raise Exception(
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
             "You can only add members to an organization you are the owner of"
         )
-    return organization.add_user_to_organization(
+    return membership.organization.add_user_to_organization(
         username=payload.username, role=payload.role
     )
 
 
+@router.post(
+    "/{organization_slug}/members/bulk/",
+    response=List[BulkMemberResultSchema],
+    auth=django_auth,
+)
+def bulk_add_members_to_organization(
+    request, organization_slug: str, payload: BulkAddMembersSchema
+):
+    """
+    Add many members at once. Returns a result per row, in input order.
+    """
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only add members to an organization you are the owner of"
+        )
+    return membership.organization.add_users_to_organization(
+        (member.username, member.role) for member in payload.members
+    )
+
+
+@router.post(
+    "/{organization_slug}/members/bulk/csv",
+    response=List[BulkMemberResultSchema],
+    auth=django_auth,
+)
+def bulk_import_members_csv(
+    request, organization_slug: str, file: UploadedFile = File(...)
+):
+    """
+    Add members from an uploaded CSV with a `username` and an optional `role`
+    column. The upload is parsed as a stream and inserted in batches.
+    """
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only add members to an organization you are the owner of"
+        )
+    return membership.organization.add_users_to_organization(
+        iter_members_csv(file.file)
+    )
+
+
 @router.patch(
     "/{organization_slug}/members/{member_username}",
     response=MemberSchema,
@@ -194,20 +330,14 @@ def add_member_to_organization(
 def update_member_in_organization(
     request, organization_slug: str, member_username: str, payload: UpdateMemberSchema
 ):
-    request_user = request.user
-    organization = Organization.objects.get(slug=organization_slug, is_active=True)
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-    ):
-        raise Exception(
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
             "You can only updates members in this organization if you are an owner"
         )
-    member = organization.member_set.get(user__username=member_username)
-    for key, value in payload.dict().items():
-        setattr(member, key, value)
-    member.save()
-    return member
+    return membership.organization.update_user_in_organization(
+        username=member_username, role=payload.role
+    )
 
 
 @router.delete(
@@ -216,73 +346,89 @@ def update_member_in_organization(
 def remove_member_from_organization(
     request, organization_slug: str, member_username: str
 ):
-    request_user = request.user
-    organization = Organization.objects.get(slug=organization_slug, is_active=True)
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-    ):
-        raise Exception(
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
             "You can only add members to an organization you are the owner of"
         )
-    return organization.remove_user_from_organization(username=member_username)
+    return membership.organization.remove_user_from_organization(
+        username=member_username
+    )
+
+
+@router.get("/{organization_slug}/export/{kind}", auth=django_auth)
+def export_organization(
+    request,
+    organization_slug: str,
+    kind: export.ExportKind,
+    export_format: export.ExportFormat = Query(
+        export.ExportFormat.NDJSON, alias="format"
+    ),
+):
+    """
+    Stream every member (or team membership) of an Organization as NDJSON or CSV.
+    Rows are read in chunks, so memory use does not grow with the organization.
+    """
+    membership = get_membership(request, organization_slug)
+    if not membership.is_member:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+    rows, columns = export.rows_for(membership, kind)
+    response = StreamingHttpResponse(
+        export.stream(rows, export_format, columns), content_type=export_format.label
+    )
+    filename = export.filename(membership.organization, kind, export_format)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 @router.get("/{organization_slug}/teams/", response=List[TeamSchema])
+@read_from_replica
+@render_schema(TeamSchema)
+@conditional
 @paginate
 def list_teams(request, organization_slug: str):
     """
     List all Teams in an Organization a user can see.
     This includes all publicly visible, active ones and any the user is a member of.
     """
-    request_user = request.user
-    organization = Organization.objects.get(
-        slug=organization_slug,
-        is_active=True,
-        member__user=request.user,
-    )
-    # if the user is a super user or owner of the organization, return all teams
-    if request_user.is_superuser or organization.member_set.get(
-        user=request_user, role=Member.MemberRole.OWNER
-    ):
-        return organization.team_set.filter(is_active=True)
+    membership = get_membership(request, organization_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    teams = project(membership.organization.team_set.filter(is_active=True), TeamSchema)
+    # if the user is a super user or their role sees every team (owners do),
+    # return all teams
+    if membership.can_view_every_team:
+        return teams
     # else return all publicly visible teams and any the user is a member of
-    return organization.team_set.filter(
-        is_active=True, visible_to_organization=True
-    ).union(organization.team_set.filter(is_active=True, members__user=request_user))
+    return teams.filter(
+        Q(visible_to_organization=True)
+        | Exists(
+            TeamMember.objects.filter(team=OuterRef("pk"), member=membership.member)
+        )
+    )
 
 
 @router.get("/{organization_slug}/teams/{team_slug}", response=TeamSchema)
+@read_from_replica
+@render_schema(TeamSchema)
+@conditional
 def team_details(request, organization_slug: str, team_slug: str):
-    request_user = request.user
-    organization = Organization.objects.get(
-        slug=organization_slug,
-        is_active=True,
-        member__user=request.user,
-    )
-    if request_user.is_superuser or organization.member_set.get(
-        user=request_user, role=Member.MemberRole.OWNER
-    ):
-        return organization.team_set.get(is_active=True, slug=team_slug)
-    return organization.team_set.get(
-        is_active=True,
-        visible_to_organization=True,
-        slug=team_slug,
-    )
+    membership = get_membership(request, organization_slug, team_slug)
+    if not (membership.is_member and membership.can_view_team):
+        raise Http404("Team does not exist for this organization")
+    return membership.team
 
 
 @router.post("/{organization_slug}/teams/", response=TeamSchema, auth=django_auth)
 def create_team(request, organization_slug: str, payload: CreateUpdateTeamSchema):
-    request_user = request.user
-    organization = Organization.objects.get(
-        slug=organization_slug,
-        is_active=True,
-        member__user=request.user,
-        member__role=Member.MemberRole.OWNER,
-    )
+    membership = get_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only create teams in organizations you are the owner of"
+        )
     team = Team.objects.create(
-        organization=organization,
-        created_by=request_user,
+        organization=membership.organization,
+        created_by=request.user,
         **payload.dict(),
     )
     return team
@@ -292,12 +438,10 @@ def create_team(request, organization_slug: str, payload: CreateUpdateTeamSchema
     "/{organization_slug}/teams/{team_slug}", response=TeamSchema, auth=django_auth
 )
 def delete_team(request, organization_slug: str, team_slug: str):
-    request_user = request.user
-    team = Team.objects.get(organization_slug=organization_slug, slug=team_slug)
-    if not team.member_set.filter(
-        user=request_user, role=TeamMember.TeamMemberRole.OWNER
-    ).exists():
-        raise Exception("You can only delete teams you are the owner of")
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.can_manage_team:
+        raise TeamPermissionError("You can only delete teams you are the owner of")
+    team = membership.team
     team.delete()
     return team
 
@@ -308,28 +452,13 @@ def delete_team(request, organization_slug: str, team_slug: str):
 def update_team(
     request, organization_slug: str, team_slug: str, payload: CreateUpdateTeamSchema
 ):
-    request_user = request.user
-    try:
-        organization = Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
-        )
-    except Organization.DoesNotExist as exception:
-        raise Http404("Organization does not exist") from exception
-
-    try:
-        team = organization.team_set.get(is_active=True, slug=team_slug)
-    except Team.DoesNotExist as exception:
-        raise Http404("Team does not exist for this organization") from exception
-
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-        or team.member_set.get(user=request_user, role=TeamMember.TeamMemberRole.OWNER)
-    ):
-        raise Exception("You can only update teams you are the owner of")
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError("You can only update teams you are the owner of")
 
+    team = membership.team
     for key, value in payload.dict().items():
         setattr(team, key, value)
     team.save()
@@ -339,34 +468,19 @@ def update_team(
 @router.get(
     "/{organization_slug}/teams/{team_slug}/members/", response=List[TeamMemberSchema]
 )
+@read_from_replica
+@render_schema(TeamMemberSchema)
+@conditional
 @paginate
 def list_team_members(request, organization_slug: str, team_slug: str):
-    request_user = request.user
-    try:
-        organization = Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_view_team:
+        raise TeamPermissionError(
+            "You can only list members of teams you have access too"
         )
-    except Organization.DoesNotExist as exception:
-        raise Http404("Organization does not exist") from exception
-
-    try:
-        team = organization.team_set.get(is_active=True, slug=team_slug)
-    except Team.DoesNotExist as exception:
-        raise Http404("Team does not exist for this organization") from exception
-
-    if not (
-        request_user.is_superuser
-        or organization.teammember_set.get(
-            user=request_user, role=Member.MemberRole.OWNER
-        )
-        or team.teammember_set.get(user=request_user)
-        or team.visible_to_organization
-    ):
-        raise Exception("You can only list members of teams you have access too")
-    print(team.teammember_set.all()[0].member)
-    return team.teammember_set.all()
+    return project(membership.team.teammember_set.all(), TeamMemberSchema)
 
 
 @router.post(
@@ -377,29 +491,80 @@ def list_team_members(request, organization_slug: str, team_slug: str):
 def add_member_to_team(
     request, organization_slug: str, team_slug: str, payload: AddTeamMemberSchema
 ):
-    request_user = request.user
-    try:
-        organization = Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only add members to a team you are the owner of"
         )
-    except Organization.DoesNotExist as exception:
-        raise Http404("Organization does not exist") from exception
-
-    try:
-        team = organization.team_set.get(is_active=True, slug=team_slug)
-    except Team.DoesNotExist as exception:
-        raise Http404("Team does not exist for this organization") from exception
-
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-        or team.member_set.get(user=request_user, role=TeamMember.TeamMemberRole.OWNER)
-    ):
-        raise Exception("You can only add members to a team you are the owner of")
+    return membership.team.add_user_to_team(
+        username=payload.username, role=payload.role
+    )
+
 
-    return team.add_user_to_team(username=payload.username, role=payload.role)
+@router.post(
+    "/{organization_slug}/teams/{team_slug}/members/bulk/",
+    response=List[BulkMemberResultSchema],
+    auth=django_auth,
+)
+def bulk_add_members_to_team(
+    request, organization_slug: str, team_slug: str, payload: BulkAddTeamMembersSchema
+):
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only add members to a team you are the owner of"
+        )
+    return membership.team.add_users_to_team(
+        (member.username, member.role) for member in payload.members
+    )
+
+
+@router.patch(
+    "/{organization_slug}/teams/{team_slug}/members/bulk/",
+    response=List[BulkMemberResultSchema],
+    auth=django_auth,
+)
+def bulk_update_members_in_team(
+    request,
+    organization_slug: str,
+    team_slug: str,
+    payload: BulkUpdateTeamMembersSchema,
+):
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only update members from a team you are the owner of"
+        )
+    return membership.team.update_users_in_team(
+        usernames=payload.usernames, role=payload.team_role
+    )
+
+
+@router.post(
+    "/{organization_slug}/teams/{team_slug}/members/bulk/remove",
+    response=List[BulkMemberResultSchema],
+    auth=django_auth,
+)
+def bulk_remove_members_from_team(
+    request,
+    organization_slug: str,
+    team_slug: str,
+    payload: BulkRemoveTeamMembersSchema,
+):
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only remove members from a team you are the owner of"
+        )
+    return membership.team.remove_users_from_team(usernames=payload.usernames)
 
 
 @router.delete(
@@ -410,28 +575,14 @@ def add_member_to_team(
 def remove_member_from_team(
     request, organization_slug: str, team_slug: str, username: str
 ):
-    request_user = request.user
-    try:
-        organization = Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only remove members from a team you are the owner of"
         )
-    except Organization.DoesNotExist as exception:
-        raise Http404("Organization does not exist") from exception
-
-    try:
-        team = organization.team_set.get(is_active=True, slug=team_slug)
-    except Team.DoesNotExist as exception:
-        raise Http404("Team does not exist for this organization") from exception
-
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-        or team.member_set.get(user=request_user, role=TeamMember.TeamMemberRole.OWNER)
-    ):
-        raise Exception("You can only remove members from a team you are the owner of")
-    return team.remove_user_from_team(username=username)
+    return membership.team.remove_user_from_team(username=username)
 
 
 @router.patch(
@@ -446,32 +597,18 @@ def update_member_in_team(
     username: str,
     payload: UpdateTeamMemberSchema,
 ):
-    request_user = request.user
-    try:
-        organization = Organization.objects.get(
-            slug=organization_slug,
-            is_active=True,
-            member__user=request.user,
+    membership = get_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only update members from a team you are the owner of"
         )
-    except Organization.DoesNotExist as exception:
-        raise Http404("Organization does not exist") from exception
-
-    try:
-        team = organization.team_set.get(is_active=True, slug=team_slug)
-    except Team.DoesNotExist as exception:
-        raise Http404("Team does not exist for this organization") from exception
-
-    if not (
-        request_user.is_superuser
-        or organization.member_set.get(user=request_user, role=Member.MemberRole.OWNER)
-        or team.teammember_set.get(
-            user=request_user, role=TeamMember.TeamMemberRole.OWNER
-        )
-    ):
-        raise Exception("You can only update members from a team you are the owner of")
 
-    member = team.teammember_set.get(member__user__username=username)
-    for key, value in payload.dict().items():
-        setattr(member, key, value)
-    member.save()
-    return member
+    return membership.team.update_user_in_team(
+        username=username, role=payload.team_role
+    )
+
+
+# every operation above reports its timings to the profiling middleware
+instrument(router)
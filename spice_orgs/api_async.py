@@ -0,0 +1,617 @@
+"""
+Async variants of the views in `api.py`, for serving the app from an ASGI
+server. Reads go through Django's async ORM; mutations that need a transaction
+run the same model methods as the sync router in a worker thread.
+
+Mount this router instead of (or next to) `spice_orgs.api.router`:
+    api.add_router("/organizations/", spice_orgs.api_async.router)
+"""
+import logging
+from typing import List
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from django.http import Http404, HttpResponseForbidden, StreamingHttpResponse
+from ninja import File, Query, Router
+from ninja.errors import AuthenticationError
+from ninja.files import UploadedFile
+
+from . import export
+from .changes import CHANGES_PAGE_SIZE, achanges_since
+from .conditional import conditional
+from .exceptions import OrganizationPermissionError, TeamPermissionError
+from .importers import iter_members_csv
+from .models import Member, Organization, OrganizationDeletion, Team, TeamMember
+from .pagination import apaginate
+from .permissions import aget_membership, aget_user, authorize
+from .profiling import instrument
+from .projections import project
+from .rendering import render_schema
+from .routing import read_from_replica
+from .schema import (
+    AddMemberSchema,
+    AddTeamMemberSchema,
+    AuthorizationRequestSchema,
+    AuthorizationResultSchema,
+    BulkAddMembersSchema,
+    BulkAddTeamMembersSchema,
+    BulkMemberResultSchema,
+    BulkRemoveTeamMembersSchema,
+    BulkUpdateTeamMembersSchema,
+    ChangeFeedSchema,
+    CreateUpdateOrganizationSchema,
+    CreateUpdateTeamSchema,
+    MemberSchema,
+    MyMembershipSchema,
+    OrganizationDeletionSchema,
+    OrganizationSchema,
+    SearchResultsSchema,
+    TeamMemberSchema,
+    TeamSchema,
+    UpdateMemberSchema,
+    UpdateTeamMemberSchema,
+)
+from .search import (
+    SEARCH_LIMIT,
+    search_members,
+    search_organizations,
+    search_teams,
+    search_terms,
+)
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+
+async def authenticated_user(request):
+    """
+    Stand-in for `auth=django_auth`, whose check reads the lazy `request.user`
+    synchronously before the view runs. Raises a 401 for anonymous callers.
+    """
+    user = await aget_user(request)
+    if user is None or not user.is_authenticated:
+        raise AuthenticationError()
+    return user
+
+
+@router.get("/", response=List[OrganizationSchema])
+@read_from_replica
+@render_schema(OrganizationSchema)
+@conditional
+@apaginate
+async def list_organizations(request):
+    """
+    List all Organizations a user can see.
+    This includes all publicly visible, active ones and any the user is a member of.
+    """
+    user = await aget_user(request)
+    organizations = project(
+        Organization.objects.filter(is_active=True), OrganizationSchema
+    )
+    if user is not None and not user.is_anonymous:
+        return organizations.filter(
+            Q(publicly_visible=True)
+            | Exists(Member.objects.filter(organization=OuterRef("pk"), user=user))
+        )
+    return organizations.filter(publicly_visible=True)
+
+
+@router.get("/changes", response=ChangeFeedSchema)
+async def list_changes(
+    request,
+    since: int = 0,
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_PAGE_SIZE),
+):
+    """
+    Creates, updates and deletes (tombstones) of organizations, members, teams
+    and team members made after the `since` cursor. Staff only.
+    """
+    user = await authenticated_user(request)
+    if not user.is_staff:
+        return HttpResponseForbidden("Only staff users can read the changes feed")
+    return await achanges_since(since, limit)
+
+
+@router.get("/search", response=SearchResultsSchema)
+@read_from_replica
+async def search(
+    request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=100),
+):
+    """
+    Prefix search of organization and team names and member usernames/emails,
+    limited to what the caller could see through the list endpoints.
+    """
+    user = await aget_user(request)
+    terms = search_terms(q)
+    return {
+        "organizations": [
+            organization
+            async for organization in search_organizations(user, terms, limit)
+        ],
+        "teams": [team async for team in search_teams(user, terms, limit)],
+        "members": [member async for member in search_members(user, terms, limit)],
+    }
+
+
+@router.get("/me/memberships", response=List[MyMembershipSchema])
+@read_from_replica
+@apaginate
+async def list_my_memberships(request):
+    """
+    Every active Organization the user is a member of, with their role and
+    their teams in it.
+    """
+    user = await authenticated_user(request)
+    return (
+        Member.objects.filter(user=user, organization__is_active=True)
+        .select_related("organization")
+        .prefetch_related(
+            Prefetch(
+                "teammember_set",
+                queryset=TeamMember.objects.filter(team__is_active=True)
+                .select_related("team")
+                .order_by("team__name"),
+                to_attr="teams",
+            )
+        )
+    )
+
+
+@router.post("/authorize", response=List[AuthorizationResultSchema])
+async def authorize_checks(request, payload: AuthorizationRequestSchema):
+    """
+    Answer a batch of "can this user do this in that organization/team"
+    checks at once. Staff only.
+    """
+    user = await authenticated_user(request)
+    if not user.is_staff:
+        return HttpResponseForbidden("Only staff users can check authorizations")
+    checks = [
+        (check.user, check.organization_slug, check.team_slug, check.action)
+        for check in payload.checks
+    ]
+    allowed = await sync_to_async(authorize)(checks)
+    return [
+        {**check.dict(), "allowed": check_allowed}
+        for check, check_allowed in zip(payload.checks, allowed)
+    ]
+
+
+@router.get("/{organization_slug}/", response=OrganizationSchema)
+@read_from_replica
+@render_schema(OrganizationSchema)
+@conditional
+async def get_organization_details_by_slug(request, organization_slug: str):
+    """
+    Get details for a specific Organization by slug.
+    By default, returns details for active, publicly available ones.
+    Else, returns the details of the organization if the user is a member.
+    """
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_view_organization:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+    return membership.organization
+
+
+@router.post("/", response=OrganizationSchema)
+async def create_organization(
+    request,
+    payload: CreateUpdateOrganizationSchema,
+):
+    """
+    Create a new Organization. Any authorized user can do so.
+    """
+    user = await authenticated_user(request)
+    return await Organization.objects.acreate(**payload.dict(), created_by=user)
+
+
+@router.patch("/{organization_slug}/", response=OrganizationSchema)
+async def update_organization_details(
+    request, organization_slug: str, payload: CreateUpdateOrganizationSchema
+):
+    """
+    Update an Organization if the user's role grants managing it.
+    """
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        return HttpResponseForbidden(
+            "You can only update organizations you are the owner of"
+        )
+    organization = membership.organization
+    for key, value in payload.dict().items():
+        setattr(organization, key, value)
+    await organization.asave()
+    return organization
+
+
+@router.delete("/{organization_slug}/", response={202: OrganizationDeletionSchema})
+async def delete_organization(request, organization_slug: str):
+    """
+    Deactivate an Organization if the user's role grants managing it and queue
+    the deletion of its rows. Poll the returned deletion for progress.
+    """
+    user = await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        return HttpResponseForbidden(
+            "You can only delete organizations you are the owner of"
+        )
+    return 202, await sync_to_async(membership.organization.schedule_deletion)(
+        requested_by=user
+    )
+
+
+@router.get("/deletions/{deletion_id}", response=OrganizationDeletionSchema)
+async def organization_deletion_progress(request, deletion_id: UUID):
+    """
+    Progress of an organization deletion, for the user who requested it.
+    """
+    user = await authenticated_user(request)
+    deletion = await OrganizationDeletion.objects.filter(pk=deletion_id).afirst()
+    if deletion is None or not (user.is_staff or deletion.requested_by_id == user.pk):
+        raise Http404(f"Deletion not found: {deletion_id}")
+    return deletion
+
+
+@router.get("/{organization_slug}/members/", response=List[MemberSchema])
+@read_from_replica
+@render_schema(MemberSchema)
+@conditional
+@apaginate
+async def list_organization_members(request, organization_slug: str):
+    """
+    List members of an Organization.
+    If the user is an owner or a superuser return all members.
+    Else, return only publicly visible members.
+    """
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_view_organization:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+    members = project(membership.organization.member_set.all(), MemberSchema)
+    if membership.is_member and membership.can_manage_organization:
+        return members
+    return members.filter(publicly_visible=True)
+
+
+@router.post("/{organization_slug}/members/", response=MemberSchema)
+async def add_member_to_organization(
+    request, organization_slug: str, payload: AddMemberSchema
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only add members to an organization you are the owner of"
+        )
+    return await sync_to_async(membership.organization.add_user_to_organization)(
+        username=payload.username, role=payload.role
+    )
+
+
+@router.post(
+    "/{organization_slug}/members/bulk/", response=List[BulkMemberResultSchema]
+)
+async def bulk_add_members_to_organization(
+    request, organization_slug: str, payload: BulkAddMembersSchema
+):
+    """
+    Add many members at once. Returns a result per row, in input order.
+    """
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only add members to an organization you are the owner of"
+        )
+    return await sync_to_async(membership.organization.add_users_to_organization)(
+        [(member.username, member.role) for member in payload.members]
+    )
+
+
+@router.post(
+    "/{organization_slug}/members/bulk/csv", response=List[BulkMemberResultSchema]
+)
+async def bulk_import_members_csv(
+    request, organization_slug: str, file: UploadedFile = File(...)
+):
+    """
+    Add members from an uploaded CSV with a `username` and an optional `role`
+    column. The upload is parsed as a stream and inserted in batches.
+    """
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only add members to an organization you are the owner of"
+        )
+    return await sync_to_async(membership.organization.add_users_to_organization)(
+        iter_members_csv(file.file)
+    )
+
+
+@router.patch("/{organization_slug}/members/{member_username}", response=MemberSchema)
+async def update_member_in_organization(
+    request, organization_slug: str, member_username: str, payload: UpdateMemberSchema
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only updates members in this organization if you are an owner"
+        )
+    return await sync_to_async(membership.organization.update_user_in_organization)(
+        username=member_username, role=payload.role
+    )
+
+
+@router.delete("/{organization_slug}/members/{member_username}", response=bool)
+async def remove_member_from_organization(
+    request, organization_slug: str, member_username: str
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only add members to an organization you are the owner of"
+        )
+    return await sync_to_async(membership.organization.remove_user_from_organization)(
+        username=member_username
+    )
+
+
+@router.get("/{organization_slug}/export/{kind}")
+async def export_organization(
+    request,
+    organization_slug: str,
+    kind: export.ExportKind,
+    export_format: export.ExportFormat = Query(
+        export.ExportFormat.NDJSON, alias="format"
+    ),
+):
+    """
+    Stream every member (or team membership) of an Organization as NDJSON or CSV.
+    Rows are read in chunks, so memory use does not grow with the organization.
+    """
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.is_member:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+    rows, columns = export.rows_for(membership, kind)
+    response = StreamingHttpResponse(
+        export.astream(rows, export_format, columns), content_type=export_format.label
+    )
+    filename = export.filename(membership.organization, kind, export_format)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@router.get("/{organization_slug}/teams/", response=List[TeamSchema])
+@read_from_replica
+@render_schema(TeamSchema)
+@conditional
+@apaginate
+async def list_teams(request, organization_slug: str):
+    """
+    List all Teams in an Organization a user can see.
+    This includes all publicly visible, active ones and any the user is a member of.
+    """
+    membership = await aget_membership(request, organization_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    teams = project(membership.organization.team_set.filter(is_active=True), TeamSchema)
+    if membership.can_view_every_team:
+        return teams
+    return teams.filter(
+        Q(visible_to_organization=True)
+        | Exists(
+            TeamMember.objects.filter(team=OuterRef("pk"), member=membership.member)
+        )
+    )
+
+
+@router.get("/{organization_slug}/teams/{team_slug}", response=TeamSchema)
+@read_from_replica
+@render_schema(TeamSchema)
+@conditional
+async def team_details(request, organization_slug: str, team_slug: str):
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not (membership.is_member and membership.can_view_team):
+        raise Http404("Team does not exist for this organization")
+    return membership.team
+
+
+@router.post("/{organization_slug}/teams/", response=TeamSchema)
+async def create_team(request, organization_slug: str, payload: CreateUpdateTeamSchema):
+    user = await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug)
+    if not membership.can_manage_organization:
+        raise OrganizationPermissionError(
+            "You can only create teams in organizations you are the owner of"
+        )
+    return await Team.objects.acreate(
+        organization=membership.organization,
+        created_by=user,
+        **payload.dict(),
+    )
+
+
+@router.delete("/{organization_slug}/teams/{team_slug}", response=TeamSchema)
+async def delete_team(request, organization_slug: str, team_slug: str):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.can_manage_team:
+        raise TeamPermissionError("You can only delete teams you are the owner of")
+    team = membership.team
+    await team.adelete()
+    return team
+
+
+@router.patch("/{organization_slug}/teams/{team_slug}", response=TeamSchema)
+async def update_team(
+    request, organization_slug: str, team_slug: str, payload: CreateUpdateTeamSchema
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError("You can only update teams you are the owner of")
+
+    team = membership.team
+    for key, value in payload.dict().items():
+        setattr(team, key, value)
+    await team.asave()
+    return team
+
+
+@router.get(
+    "/{organization_slug}/teams/{team_slug}/members/", response=List[TeamMemberSchema]
+)
+@read_from_replica
+@render_schema(TeamMemberSchema)
+@conditional
+@apaginate
+async def list_team_members(request, organization_slug: str, team_slug: str):
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_view_team:
+        raise TeamPermissionError(
+            "You can only list members of teams you have access too"
+        )
+    return project(membership.team.teammember_set.all(), TeamMemberSchema)
+
+
+@router.post(
+    "/{organization_slug}/teams/{team_slug}/members/", response=TeamMemberSchema
+)
+async def add_member_to_team(
+    request, organization_slug: str, team_slug: str, payload: AddTeamMemberSchema
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only add members to a team you are the owner of"
+        )
+    return await sync_to_async(membership.team.add_user_to_team)(
+        username=payload.username, role=payload.role
+    )
+
+
+@router.post(
+    "/{organization_slug}/teams/{team_slug}/members/bulk/",
+    response=List[BulkMemberResultSchema],
+)
+async def bulk_add_members_to_team(
+    request, organization_slug: str, team_slug: str, payload: BulkAddTeamMembersSchema
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only add members to a team you are the owner of"
+        )
+    return await sync_to_async(membership.team.add_users_to_team)(
+        [(member.username, member.role) for member in payload.members]
+    )
+
+
+@router.patch(
+    "/{organization_slug}/teams/{team_slug}/members/bulk/",
+    response=List[BulkMemberResultSchema],
+)
+async def bulk_update_members_in_team(
+    request,
+    organization_slug: str,
+    team_slug: str,
+    payload: BulkUpdateTeamMembersSchema,
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only update members from a team you are the owner of"
+        )
+    return await sync_to_async(membership.team.update_users_in_team)(
+        usernames=payload.usernames, role=payload.team_role
+    )
+
+
+@router.post(
+    "/{organization_slug}/teams/{team_slug}/members/bulk/remove",
+    response=List[BulkMemberResultSchema],
+)
+async def bulk_remove_members_from_team(
+    request,
+    organization_slug: str,
+    team_slug: str,
+    payload: BulkRemoveTeamMembersSchema,
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only remove members from a team you are the owner of"
+        )
+    return await sync_to_async(membership.team.remove_users_from_team)(
+        usernames=payload.usernames
+    )
+
+
+@router.delete(
+    "/{organization_slug}/teams/{team_slug}/members/{username}", response=bool
+)
+async def remove_member_from_team(
+    request, organization_slug: str, team_slug: str, username: str
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only remove members from a team you are the owner of"
+        )
+    return await sync_to_async(membership.team.remove_user_from_team)(username=username)
+
+
+@router.patch(
+    "/{organization_slug}/teams/{team_slug}/members/{username}",
+    response=TeamMemberSchema,
+)
+async def update_member_in_team(
+    request,
+    organization_slug: str,
+    team_slug: str,
+    username: str,
+    payload: UpdateTeamMemberSchema,
+):
+    await authenticated_user(request)
+    membership = await aget_membership(request, organization_slug, team_slug)
+    if not membership.is_member:
+        raise Http404("Organization does not exist")
+    if not membership.can_manage_team:
+        raise TeamPermissionError(
+            "You can only update members from a team you are the owner of"
+        )
+    return await sync_to_async(membership.team.update_user_in_team)(
+        username=username, role=payload.team_role
+    )
+
+
+# every operation above reports its timings to the profiling middleware
+instrument(router)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DjangoNinjaOrgManagementConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "spice_orgs"
+
+    def ready(self):
+        # connect the cache invalidation receivers
+        from . import signals  # noqa: F401
@@ -0,0 +1,11 @@
+"""
+Performance benchmarks run against the configured database.
+Seed it first with `manage.py seed_orgs`, then run `manage.py benchmark_orgs`.
+"""
+import math
+
+
+def percentile(samples, percent) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
@@ -0,0 +1,126 @@
+"""
+Compare the sync and the async router under many concurrent slow clients.
+
+Every client spends `delay` seconds on the network before its request is
+handled, e.g. a slow upload. A sync deployment holds one of its `workers`
+threads for the whole request, slow client included, so throughput is capped
+at roughly `workers / delay` requests per second. The async router only
+occupies the event loop while it runs, so all clients wait concurrently.
+
+Both modes send their queries through the same database connection, so the
+comparison is not skewed by a different amount of database parallelism.
+"""
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from . import percentile
+from .endpoints import Fixture
+
+
+def _paths(fixture) -> list:
+    return [
+        f"{fixture.organization_path}/",
+        f"{fixture.organization_path}/members/",
+        f"{fixture.organization_path}/teams/",
+        fixture.team_path,
+        f"{fixture.team_path}/members/",
+    ]
+
+
+async def _sync_workers(client, paths, requests, clients, delay, workers):
+    """
+    Serve the sync router from a pool of `workers` threads, each held for the
+    duration of a request.
+    """
+    pool = asyncio.Semaphore(workers)
+    connections = asyncio.Semaphore(clients)
+
+    async def send(index):
+        async with connections:
+            started = time.perf_counter()
+            async with pool:
+                await asyncio.sleep(delay)
+                response = await sync_to_async(client.get)(paths[index % len(paths)])
+            return time.perf_counter() - started, response.status_code
+
+    return await asyncio.gather(*(send(index) for index in range(requests)))
+
+
+async def _async_views(client, paths, requests, clients, delay):
+    connections = asyncio.Semaphore(clients)
+
+    async def send(index):
+        async with connections:
+            started = time.perf_counter()
+            await asyncio.sleep(delay)
+            response = await client.get(paths[index % len(paths)])
+            return time.perf_counter() - started, response.status_code
+
+    return await asyncio.gather(*(send(index) for index in range(requests)))
+
+
+def _summary(mode, prefix, samples, elapsed) -> dict:
+    timings = [seconds * 1000 for seconds, _status in samples]
+    return {
+        "mode": mode,
+        "prefix": prefix,
+        "status": sorted({status for _seconds, status in samples}),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+    }
+
+
+def run(
+    requests=500,
+    clients=100,
+    delay=0.05,
+    workers=4,
+    prefix="/api/organizations",
+    async_prefix="/api/async/organizations",
+    log=None,
+) -> dict:
+    """
+    Send `requests` GETs from `clients` concurrent slow clients to the sync
+    router (served by `workers` threads) and to the async router.
+    """
+    log = log or (lambda message: None)
+    results = []
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for mode, mode_prefix, client, serve in [
+            ("sync", prefix, Client(raise_request_exception=False), _sync_workers),
+            (
+                "async",
+                async_prefix,
+                AsyncClient(raise_request_exception=False),
+                _async_views,
+            ),
+        ]:
+            fixture = Fixture.load(mode_prefix)
+            client.force_login(fixture.owner)
+            extra = (workers,) if mode == "sync" else ()
+            started = time.perf_counter()
+            samples = async_to_sync(serve)(
+                client, _paths(fixture), requests, clients, delay, *extra
+            )
+            results.append(
+                _summary(mode, mode_prefix, samples, time.perf_counter() - started)
+            )
+            log(f"{mode}: {results[-1]['throughput_rps']} requests/s")
+    return {
+        "suite": "concurrency",
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "requests": requests,
+        "clients": clients,
+        "delay_s": delay,
+        "workers": workers,
+        "results": results,
+    }
@@ -0,0 +1,412 @@
+"""
+Drive every router endpoint through the Django test client and record latency
+percentiles and query counts. Write requests run inside a transaction that is
+rolled back, so the seeded dataset is left untouched between iterations.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import percentile
+from ..api import router
+from ..models import BULK_BATCH_SIZE, Member, Organization, TeamMember
+
+UserModel = get_user_model()
+
+CASES = {}
+
+
+def case(name):
+    """Register a function building the request that benchmarks operation `name`."""
+
+    def register(build):
+        CASES[name] = build
+        return build
+
+    return register
+
+
+@dataclass
+class Fixture:
+    prefix: str
+    organization: Organization
+    team: object
+    owner: object
+    member_username: str
+    team_member_usernames: list
+    team_candidates: list
+
+    @property
+    def organization_path(self) -> str:
+        return f"{self.prefix}/{self.organization.slug}"
+
+    @property
+    def team_path(self) -> str:
+        return f"{self.organization_path}/teams/{self.team.slug}"
+
+    @property
+    def team_member_username(self) -> str:
+        return self.team_member_usernames[0]
+
+    @property
+    def bulk_size(self) -> int:
+        """
+        Rows sent by the bulk cases, which grow with the organization (up to
+        one batch), so a budget that holds at every size keeps them constant.
+        """
+        return min(self.organization.member_count, BULK_BATCH_SIZE)
+
+    @classmethod
+    def load(cls, prefix):
+        """
+        Benchmark against the largest active organization, its largest team and
+        its creator, who owns both.
+        """
+        organization = (
+            Organization.objects.filter(is_active=True)
+            .order_by("-member_count")
+            .first()
+        )
+        if organization is None:
+            raise ValueError("No organizations found, run `manage.py seed_orgs`")
+        team = organization.team_set.filter(is_active=True).order_by("-member_count")[0]
+        team_members = list(
+            team.teammember_set.filter(
+                team_role=TeamMember.TeamMemberRole.MEMBER
+            ).values_list("member__user__username", flat=True)[:BULK_BATCH_SIZE]
+        )
+        in_team = team.teammember_set.values("member_id")
+        candidates = list(
+            organization.member_set.exclude(id__in=in_team)
+            .filter(role=Member.MemberRole.MEMBER)
+            .values_list("user__username", flat=True)[: BULK_BATCH_SIZE + 1]
+        )
+        return cls(
+            prefix=prefix.rstrip("/"),
+            organization=organization,
+            team=team,
+            owner=organization.created_by,
+            member_username=candidates[0],
+            team_member_usernames=team_members,
+            team_candidates=candidates[1:],
+        )
+
+
+def _new_usernames(count) -> list:
+    users = UserModel.objects.bulk_create(
+        [UserModel(username=f"benchmark_{index}") for index in range(count)]
+    )
+    return [user.username for user in users]
+
+
+@case("list_organizations")
+def _list_organizations(fixture):
+    return "get", f"{fixture.prefix}/", None
+
+
+@case("list_changes")
+def _list_changes(fixture):
+    # staff only; rolled back with the rest of the iteration
+    type(fixture.owner).objects.filter(pk=fixture.owner.pk).update(is_staff=True)
+    return "get", f"{fixture.prefix}/changes", None
+
+
+@case("search")
+def _search(fixture):
+    prefix = fixture.organization.name.split()[0][:3]
+    return "get", f"{fixture.prefix}/search?q={prefix}", None
+
+
+@case("list_my_memberships")
+def _list_my_memberships(fixture):
+    return "get", f"{fixture.prefix}/me/memberships", None
+
+
+@case("authorize_checks")
+def _authorize_checks(fixture):
+    type(fixture.owner).objects.filter(pk=fixture.owner.pk).update(is_staff=True)
+    usernames = [fixture.member_username, *fixture.team_candidates]
+    checks = [
+        {
+            "user": usernames[index % len(usernames)],
+            "organization_slug": fixture.organization.slug,
+            "team_slug": fixture.team.slug,
+            "action": action,
+        }
+        for index in range(250)
+        for action in ("view_team", "manage_team")
+    ]
+    return "post", f"{fixture.prefix}/authorize", {"checks": checks}
+
+
+@case("get_organization_details_by_slug")
+def _organization_details(fixture):
+    return "get", f"{fixture.organization_path}/", None
+
+
+@case("create_organization")
+def _create_organization(fixture):
+    return "post", f"{fixture.prefix}/", {"name": "Benchmark Organization"}
+
+
+@case("update_organization_details")
+def _update_organization(fixture):
+    return (
+        "patch",
+        f"{fixture.organization_path}/",
+        {
+            "name": fixture.organization.name,
+            "publicly_visible": fixture.organization.publicly_visible,
+        },
+    )
+
+
+@case("delete_organization")
+def _delete_organization(fixture):
+    organization = Organization.objects.create(
+        name="Benchmark Organization", created_by=fixture.owner
+    )
+    return "delete", f"{fixture.prefix}/{organization.slug}/", None
+
+
+@case("organization_deletion_progress")
+def _organization_deletion_progress(fixture):
+    organization = Organization.objects.create(
+        name="Benchmark Organization", created_by=fixture.owner
+    )
+    deletion = organization.schedule_deletion(requested_by=fixture.owner)
+    return "get", f"{fixture.prefix}/deletions/{deletion.id}", None
+
+
+@case("list_organization_members")
+def _list_organization_members(fixture):
+    return "get", f"{fixture.organization_path}/members/", None
+
+
+@case("add_member_to_organization")
+def _add_member_to_organization(fixture):
+    (username,) = _new_usernames(1)
+    return "post", f"{fixture.organization_path}/members/", {"username": username}
+
+
+@case("bulk_add_members_to_organization")
+def _bulk_add_members(fixture):
+    members = [{"username": username} for username in _new_usernames(fixture.bulk_size)]
+    return "post", f"{fixture.organization_path}/members/bulk/", {"members": members}
+
+
+@case("bulk_import_members_csv")
+def _bulk_import_members_csv(fixture):
+    rows = "\n".join(["username", *_new_usernames(fixture.bulk_size)])
+    upload = SimpleUploadedFile("members.csv", rows.encode())
+    return "post", f"{fixture.organization_path}/members/bulk/csv", {"file": upload}
+
+
+@case("update_member_in_organization")
+def _update_member_in_organization(fixture):
+    return (
+        "patch",
+        f"{fixture.organization_path}/members/{fixture.member_username}",
+        {"role": Member.MemberRole.MEMBER},
+    )
+
+
+@case("remove_member_from_organization")
+def _remove_member_from_organization(fixture):
+    return (
+        "delete",
+        f"{fixture.organization_path}/members/{fixture.member_username}",
+        None,
+    )
+
+
+@case("export_organization")
+def _export_organization(fixture):
+    return "get", f"{fixture.organization_path}/export/members", None
+
+
+@case("list_teams")
+def _list_teams(fixture):
+    return "get", f"{fixture.organization_path}/teams/", None
+
+
+@case("team_details")
+def _team_details(fixture):
+    return "get", fixture.team_path, None
+
+
+@case("create_team")
+def _create_team(fixture):
+    return "post", f"{fixture.organization_path}/teams/", {"name": "Benchmark Team"}
+
+
+@case("delete_team")
+def _delete_team(fixture):
+    return "delete", fixture.team_path, None
+
+
+@case("update_team")
+def _update_team(fixture):
+    return (
+        "patch",
+        fixture.team_path,
+        {
+            "name": fixture.team.name,
+            "visible_to_organization": fixture.team.visible_to_organization,
+        },
+    )
+
+
+@case("list_team_members")
+def _list_team_members(fixture):
+    return "get", f"{fixture.team_path}/members/", None
+
+
+@case("add_member_to_team")
+def _add_member_to_team(fixture):
+    return (
+        "post",
+        f"{fixture.team_path}/members/",
+        {"username": fixture.member_username},
+    )
+
+
+@case("bulk_add_members_to_team")
+def _bulk_add_members_to_team(fixture):
+    members = [{"username": username} for username in fixture.team_candidates]
+    return "post", f"{fixture.team_path}/members/bulk/", {"members": members}
+
+
+@case("bulk_update_members_in_team")
+def _bulk_update_members_in_team(fixture):
+    return (
+        "patch",
+        f"{fixture.team_path}/members/bulk/",
+        {
+            "usernames": fixture.team_member_usernames,
+            "team_role": TeamMember.TeamMemberRole.OWNER,
+        },
+    )
+
+
+@case("bulk_remove_members_from_team")
+def _bulk_remove_members_from_team(fixture):
+    return (
+        "post",
+        f"{fixture.team_path}/members/bulk/remove",
+        {"usernames": fixture.team_member_usernames},
+    )
+
+
+@case("remove_member_from_team")
+def _remove_member_from_team(fixture):
+    return (
+        "delete",
+        f"{fixture.team_path}/members/{fixture.team_member_username}",
+        None,
+    )
+
+
+@case("update_member_in_team")
+def _update_member_in_team(fixture):
+    return (
+        "patch",
+        f"{fixture.team_path}/members/{fixture.team_member_username}",
+        {"team_role": TeamMember.TeamMemberRole.MEMBER},
+    )
+
+
+def router_operations() -> set:
+    return {
+        operation.view_func.__name__
+        for path_view in router.path_operations.values()
+        for operation in path_view.operations
+    }
+
+
+@contextmanager
+def rolled_back():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+async def _aread(streaming_content) -> bytes:
+    return b"".join([chunk async for chunk in streaming_content])
+
+
+def read_streaming_content(response) -> bytes:
+    """Consume a StreamingHttpResponse, whether its iterator is sync or async."""
+    if response.is_async:
+        return async_to_sync(_aread)(response.streaming_content)
+    return b"".join(response.streaming_content)
+
+
+def send_request(client, method, path, data):
+    if data is None:
+        response = getattr(client, method)(path)
+        if response.streaming:
+            # time the whole body, not just the first chunk
+            read_streaming_content(response)
+        return response
+    if any(isinstance(value, SimpleUploadedFile) for value in data.values()):
+        return getattr(client, method)(path, data=data)
+    return getattr(client, method)(path, data=data, content_type="application/json")
+
+
+def run(iterations=20, prefix="/api/organizations", log=None) -> dict:
+    """
+    Benchmark every router operation `iterations` times as the owner of the
+    largest organization. Returns p50/p95 latency in milliseconds and the query
+    count of each operation.
+    """
+    log = log or (lambda message: None)
+    fixture = Fixture.load(prefix)
+    client = Client(raise_request_exception=False)
+    client.force_login(fixture.owner)
+    results = []
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for name, build in CASES.items():
+            timings, queries, statuses = [], [], set()
+            for _iteration in range(iterations):
+                with rolled_back():
+                    method, path, data = build(fixture)
+                    with CaptureQueriesContext(connection) as context:
+                        started = time.perf_counter()
+                        response = send_request(client, method, path, data)
+                        timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(context))
+                statuses.add(response.status_code)
+            results.append(
+                {
+                    "operation": name,
+                    "method": method.upper(),
+                    "path": path,
+                    "status": sorted(statuses),
+                    "p50_ms": round(percentile(timings, 50), 3),
+                    "p95_ms": round(percentile(timings, 95), 3),
+                    "queries": max(queries),
+                }
+            )
+            log(f"{name}: p50 {results[-1]['p50_ms']}ms, {max(queries)} queries")
+    return {
+        "suite": "endpoints",
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "organization": {
+            "slug": fixture.organization.slug,
+            "member_count": fixture.organization.member_count,
+        },
+        "results": results,
+        "missing_operations": sorted(router_operations() - set(CASES)),
+    }
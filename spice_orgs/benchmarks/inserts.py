@@ -0,0 +1,130 @@
+"""
+Compare inserting members with random UUIDv4 primary keys against the
+time-ordered UUIDv7 keys of `spice_orgs.ids`. Each kind of key adds the same
+number of members to the largest organization of the seeded dataset, in
+batches, inside a transaction that is rolled back, and the suite records the
+insert throughput and how much the indexes of the member table grew.
+"""
+import time
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from ..ids import uuid7
+from ..models import Member, Organization
+from .endpoints import rolled_back
+
+UserModel = get_user_model()
+
+KEYS = {"uuid4": uuid4, "uuid7": uuid7}
+
+
+def index_sizes(table) -> dict:
+    """
+    Bytes used by the primary key index and by all the indexes of `table`, or
+    None where the database does not tell.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f'PRAGMA index_list("{table}")')
+            # (seq, name, unique, origin, partial)
+            primary_key = [row[1] for row in cursor.fetchall() if row[3] == "pk"]
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s",
+                [table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+            sizes = {}
+            for name in names:
+                try:
+                    cursor.execute(
+                        "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = %s",
+                        [name],
+                    )
+                except DatabaseError:
+                    # dbstat is compiled into most builds of SQLite, not all
+                    return {"primary_key": None, "all": None}
+                sizes[name] = cursor.fetchone()[0]
+            return {
+                "primary_key": sum(sizes[name] for name in primary_key),
+                "all": sum(sizes.values()),
+            }
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT pg_relation_size(indexrelid) FROM pg_index"
+                " WHERE indrelid = %s::regclass AND indisprimary",
+                [table],
+            )
+            primary_key = cursor.fetchone()[0]
+            cursor.execute("SELECT pg_indexes_size(%s::regclass)", [table])
+            return {"primary_key": primary_key, "all": cursor.fetchone()[0]}
+    return {"primary_key": None, "all": None}
+
+
+def _growth(before, after, rows):
+    if before is None or after is None:
+        return None, None
+    return after - before, round((after - before) / rows, 2)
+
+
+def _insert(organization, new_id, rows, batch_size) -> dict:
+    users = UserModel.objects.bulk_create(
+        [UserModel(username=f"benchmark_insert_{index}") for index in range(rows)]
+    )
+    table = Member._meta.db_table
+    before = index_sizes(table)
+    elapsed = 0.0
+    for start in range(0, rows, batch_size):
+        members = [
+            Member(id=new_id(), user=user, organization=organization)
+            for user in users[start : start + batch_size]
+        ]
+        started = time.perf_counter()
+        Member.objects.bulk_create(members)
+        elapsed += time.perf_counter() - started
+    after = index_sizes(table)
+    primary_key_bytes, primary_key_bytes_per_row = _growth(
+        before["primary_key"], after["primary_key"], rows
+    )
+    index_bytes, index_bytes_per_row = _growth(before["all"], after["all"], rows)
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed),
+        "primary_key_index_growth_bytes": primary_key_bytes,
+        "primary_key_index_bytes_per_row": primary_key_bytes_per_row,
+        "index_growth_bytes": index_bytes,
+        "index_bytes_per_row": index_bytes_per_row,
+    }
+
+
+def run(rows=5000, batch_size=100, log=None) -> dict:
+    """
+    Add `rows` members to the largest organization in batches of `batch_size`
+    with each kind of primary key. Returns the throughput and index growth of
+    each.
+    """
+    log = log or (lambda message: None)
+    organization = (
+        Organization.objects.filter(is_active=True).order_by("-member_count").first()
+    )
+    if organization is None:
+        raise ValueError("No organizations found, run `manage.py seed_orgs`")
+    existing = Member.objects.filter(organization=organization).count()
+    results = []
+    for name, new_id in KEYS.items():
+        with rolled_back():
+            results.append(
+                {"key": name, **_insert(organization, new_id, rows, batch_size)}
+            )
+        log(f"{name}: {results[-1]['rows_per_second']} rows/s")
+    return {
+        "suite": "inserts",
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "organization_members": existing,
+        "batch_size": batch_size,
+        "results": results,
+    }
@@ -0,0 +1,75 @@
+"""
+Compare rendering the list endpoints through their schemas with the
+`SPICE_ORGS_FAST_RENDER` path, which encodes `.values()` rows directly. Both
+modes fetch the same large page of the largest organization, and the suite
+checks that they return the same bytes.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from . import percentile
+from .endpoints import Fixture
+
+
+def _paths(fixture) -> dict:
+    return {
+        "list_organizations": f"{fixture.prefix}/",
+        "list_organization_members": f"{fixture.organization_path}/members/",
+        "list_teams": f"{fixture.organization_path}/teams/",
+        "list_team_members": f"{fixture.team_path}/members/",
+    }
+
+
+def _time(client, path, limit, iterations, fast):
+    timings = []
+    with override_settings(SPICE_ORGS_FAST_RENDER=fast):
+        for _iteration in range(iterations):
+            started = time.perf_counter()
+            response = client.get(path, {"limit": limit})
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, response
+
+
+def run(iterations=20, limit=500, prefix="/api/organizations", log=None) -> dict:
+    """
+    Fetch a page of up to `limit` rows of every list endpoint `iterations`
+    times in each mode. Returns p50/p95 latency in milliseconds per mode.
+    """
+    log = log or (lambda message: None)
+    fixture = Fixture.load(prefix)
+    client = Client(raise_request_exception=False)
+    client.force_login(fixture.owner)
+    results = []
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for name, path in _paths(fixture).items():
+            schemas, expected = _time(client, path, limit, iterations, fast=False)
+            values, response = _time(client, path, limit, iterations, fast=True)
+            results.append(
+                {
+                    "operation": name,
+                    "path": path,
+                    "status": sorted({expected.status_code, response.status_code}),
+                    "rows": len(response.json()["items"]),
+                    "same_bytes": response.content == expected.content,
+                    "schemas_p50_ms": round(percentile(schemas, 50), 3),
+                    "schemas_p95_ms": round(percentile(schemas, 95), 3),
+                    "values_p50_ms": round(percentile(values, 50), 3),
+                    "values_p95_ms": round(percentile(values, 95), 3),
+                    "speedup": round(
+                        percentile(schemas, 50) / percentile(values, 50), 2
+                    ),
+                }
+            )
+            log(f"{name}: {results[-1]['speedup']}x")
+    return {
+        "suite": "rendering",
+        "created_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "limit": limit,
+        "results": results,
+    }
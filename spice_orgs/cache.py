@@ -0,0 +1,250 @@
+"""
+Cache for the rows the membership resolver loads on every request: the
+Organization by slug, the Team by (organization, slug), the caller's Member row
+and their TeamMember row, plus the permission bits of the organization's custom
+roles. Enabled through the Django cache framework with:
+
+    SPICE_ORGS_CACHE = {"ALIAS": "default", "TIMEOUT": 300}
+
+Entries of an organization live under a generation number that every write to
+the organization, its members, teams or team members bumps (see signals.py).
+A request reads the generation before it reads the database, so a row loaded
+before a write can only ever be stored under a generation nobody reads again.
+Rows read from a lagging replica (see routing.py) are never stored.
+"""
+from collections import Counter
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+
+from .routing import is_reading_replica
+
+KEY_PREFIX = "spice_orgs"
+DEFAULT_TIMEOUT = 300
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "SPICE_ORGS_CACHE", None) is not None
+
+
+def _cache():
+    return caches[settings.SPICE_ORGS_CACHE.get("ALIAS", DEFAULT_CACHE_ALIAS)]
+
+
+def _timeout() -> int:
+    return settings.SPICE_ORGS_CACHE.get("TIMEOUT", DEFAULT_TIMEOUT)
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats() -> dict:
+    """Hits and misses of the membership cache in this process."""
+    with _stats_lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"]}
+
+
+def reset_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _slug_key(slug: str) -> str:
+    return f"{KEY_PREFIX}:organization-slug:{slug}"
+
+
+def _generation_keys(organization_id) -> list:
+    return [f"{KEY_PREFIX}:generation", f"{KEY_PREFIX}:generation:{organization_id}"]
+
+
+def _generation(cache, organization_id) -> str:
+    keys = _generation_keys(organization_id)
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # start from the clock so an evicted counter never reuses a number
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return ".".join(str(generations[key]) for key in keys)
+
+
+def _entry_names(user_id, team_slug) -> list:
+    names = ["organization"]
+    if user_id is not None:
+        names.append(f"member:{user_id}")
+    if team_slug is not None:
+        names.append(f"team:{team_slug}")
+        if user_id is not None:
+            names.append(f"team_member:{team_slug}:{user_id}")
+    return names
+
+
+def _entry_prefix(name: str) -> str:
+    """Columns of the resolver row that belong to an entry."""
+    return {
+        "organization": "",
+        "member": "caller_member__",
+        "team": "caller_team__",
+        "team_member": "caller_team_member_",
+    }[name.split(":", 1)[0]]
+
+
+def _split_row(row: dict, names: list) -> dict:
+    entries = {name: {} for name in names}
+    prefixed = sorted(names, key=lambda name: -len(_entry_prefix(name)))
+    for column, value in row.items():
+        for name in prefixed:
+            if column.startswith(_entry_prefix(name)):
+                entries[name][column] = value
+                break
+    return entries
+
+
+def _lookup(cache, organization_slug, user_id, team_slug):
+    """
+    Returns (organization id, entry keys, row) for a cached lookup, the row is
+    None on a miss.
+    """
+    organization_id = cache.get(_slug_key(organization_slug))
+    if organization_id is None:
+        return None, None, None
+    generation = _generation(cache, organization_id)
+    keys = {
+        name: f"{KEY_PREFIX}:{organization_id}:{generation}:{name}"
+        for name in _entry_names(user_id, team_slug)
+    }
+    entries = cache.get_many(keys.values())
+    if len(entries) < len(keys):
+        return organization_id, keys, None
+    row = {}
+    for entry in entries.values():
+        row.update(entry)
+    if row["slug"] != organization_slug:
+        # the organization was renamed without the old slug being dropped
+        cache.delete(_slug_key(organization_slug))
+        return None, None, None
+    return organization_id, keys, row
+
+
+def _store(cache, organization_slug, organization_id, keys, row, user_id, team_slug):
+    from .models import Organization
+
+    if row is None or is_reading_replica():
+        return
+    row_organization_id = row[Organization._meta.pk.attname]
+    if keys is None or row_organization_id != organization_id:
+        # first sight of this slug: remember its id, entries are only stored
+        # once the generation could be read before the database
+        cache.set(_slug_key(organization_slug), row_organization_id, _timeout())
+        return
+    entries = _split_row(row, _entry_names(user_id, team_slug))
+    cache.set_many(
+        {keys[name]: entry for name, entry in entries.items()}, timeout=_timeout()
+    )
+
+
+def membership_row(organization_slug, user_id, team_slug, fetch):
+    """
+    Return the membership resolver row, from the cache when every entry it is
+    made of is cached, else from `fetch()`.
+    """
+    if not is_enabled():
+        return fetch()
+    cache = _cache()
+    organization_id, keys, row = _lookup(cache, organization_slug, user_id, team_slug)
+    if row is not None:
+        _count("hits")
+        return row
+    _count("misses")
+    row = fetch()
+    _store(cache, organization_slug, organization_id, keys, row, user_id, team_slug)
+    return row
+
+
+async def amembership_row(organization_slug, user_id, team_slug, afetch):
+    """
+    Async variant of `membership_row`, the cache is read from a worker thread.
+    """
+    if not is_enabled():
+        return await afetch()
+    cache = _cache()
+    organization_id, keys, row = await sync_to_async(_lookup)(
+        cache, organization_slug, user_id, team_slug
+    )
+    if row is not None:
+        _count("hits")
+        return row
+    _count("misses")
+    row = await afetch()
+    await sync_to_async(_store)(
+        cache, organization_slug, organization_id, keys, row, user_id, team_slug
+    )
+    return row
+
+
+def _role_permissions_key(cache, organization_id) -> str:
+    return f"{KEY_PREFIX}:{organization_id}:{_generation(cache, organization_id)}:roles"
+
+
+def role_permissions(organization_id, fetch) -> dict:
+    """
+    Return the {role id: permission bits} of an organization's custom roles,
+    from the cache when enabled, else from `fetch()`.
+    """
+    if not is_enabled():
+        return fetch()
+    cache = _cache()
+    key = _role_permissions_key(cache, organization_id)
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = fetch()
+        if not is_reading_replica():
+            cache.set(key, permissions, _timeout())
+    return permissions
+
+
+async def arole_permissions(organization_id, afetch) -> dict:
+    """Async variant of `role_permissions`."""
+    if not is_enabled():
+        return await afetch()
+    cache = _cache()
+    key = await sync_to_async(_role_permissions_key)(cache, organization_id)
+    permissions = await sync_to_async(cache.get)(key)
+    if permissions is None:
+        permissions = await afetch()
+        if not is_reading_replica():
+            await sync_to_async(cache.set)(key, permissions, _timeout())
+    return permissions
+
+
+def _bump(organization_id=None, slugs=()) -> None:
+    cache = _cache()
+    if slugs:
+        cache.delete_many([_slug_key(slug) for slug in slugs])
+    key = _generation_keys(organization_id)[0 if organization_id is None else 1]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate(organization_id=None, slugs=()) -> None:
+    """
+    Drop the cached entries of an organization, or of every organization when
+    no id is given, and forget the organization ids of `slugs`. Runs again
+    once the transaction commits, so a request that read the old rows in the
+    meantime cannot cache them for later requests.
+    """
+    if not is_enabled():
+        return
+    _bump(organization_id, slugs)
+    transaction.on_commit(lambda: _bump(organization_id, slugs))
@@ -0,0 +1,224 @@
+"""
+Conditional GET support (ETag / If-None-Match and Last-Modified) for the read
+endpoints. The validator is computed from what the view returns before it is
+serialized: the row itself for detail views, and a version for list views, so
+a `304 Not Modified` costs neither serialization nor loading the page.
+
+The version of a list of an organization's rows is the `updated_at` of the
+organization, which every recorded change to its members, teams and team
+members moves (see `models.record_changes`); the organization is already
+loaded with the caller's membership, so it costs no query. The version of the
+organization list is the latest `updated_at` of all organizations, one
+indexed lookup. Other lists fall back to one aggregate query over their rows.
+"""
+from calendar import timegm
+from functools import wraps
+import hashlib
+import inspect
+
+from django.db.models import Count, Max, QuerySet, Sum
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Organization
+from .permissions import REQUEST_CACHE_ATTRIBUTE
+
+# columns that change without touching updated_at on related rows
+COUNTER_FIELD = "member_count"
+
+
+def _field_names(model) -> set:
+    return {field.name for field in model._meta.concrete_fields}
+
+
+def _relation_models(queryset) -> dict:
+    """
+    The relations joined by `select_related` (e.g. by `project()`) or by the
+    paths of `.values()`, as {path: model}; their rows are part of what the
+    list renders.
+    """
+    relations = {}
+
+    def walk(model, tree, prefix):
+        for name, subtree in tree.items():
+            related_model = model._meta.get_field(name).related_model
+            relations[f"{prefix}{name}"] = related_model
+            if isinstance(subtree, dict):
+                walk(related_model, subtree, f"{prefix}{name}__")
+
+    if isinstance(queryset.query.select_related, dict):
+        walk(queryset.model, queryset.query.select_related, "")
+    else:
+        # `.values()` querysets join the relations named in their `a__b` paths
+        tree = {}
+        for path in queryset.query.values_select:
+            node = tree
+            for name in path.split("__")[:-1]:
+                node = node.setdefault(name, {})
+        walk(queryset.model, tree, "")
+    return relations
+
+
+def _aggregates(queryset) -> dict:
+    aggregates = {"count": Count("pk")}
+    models = {"": queryset.model, **_relation_models(queryset)}
+    for path, model in models.items():
+        prefix = f"{path}__" if path else ""
+        if "updated_at" in _field_names(model):
+            aggregates[f"{prefix}updated_at"] = Max(f"{prefix}updated_at")
+    if COUNTER_FIELD in _field_names(queryset.model):
+        aggregates[COUNTER_FIELD] = Sum(COUNTER_FIELD)
+    return aggregates
+
+
+def _etag(request, *parts) -> str:
+    user = getattr(request, "user", None)
+    digest = hashlib.sha1(
+        repr((getattr(user, "pk", None), request.GET.urlencode(), parts)).encode()
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _instance_validators(request, instance):
+    """ETag and Last-Modified of a single row."""
+    fields = _field_names(type(instance))
+    updated_at = getattr(instance, "updated_at", None)
+    etag = _etag(
+        request,
+        instance._meta.label,
+        instance.pk,
+        updated_at,
+        getattr(instance, COUNTER_FIELD, None) if COUNTER_FIELD in fields else None,
+    )
+    return etag, updated_at
+
+
+def _organization_versions(request) -> list:
+    """(pk, updated_at) of the organizations the view resolved memberships of."""
+    memberships = request.__dict__.get(REQUEST_CACHE_ATTRIBUTE, {}).values()
+    return sorted(
+        {
+            (membership.organization.pk, membership.organization.updated_at)
+            for membership in memberships
+        }
+    )
+
+
+def _list_version(request, queryset):
+    """
+    What the validator of a list is computed from, or the aggregate to query
+    for it. Organizations are deactivated, which moves updated_at, before they
+    are deleted.
+    """
+    versions = _organization_versions(request)
+    if versions:
+        return versions, None
+    if queryset.model is Organization:
+        return None, (
+            Organization.objects.using(queryset.db),
+            {"updated_at": Max("updated_at")},
+        )
+    return None, (queryset, _aggregates(queryset))
+
+
+def _queryset_etag(request, queryset, version) -> str:
+    """
+    Lists only get an ETag: a deleted row does not move max(updated_at), so a
+    Last-Modified date alone cannot tell that the list changed.
+    """
+    if isinstance(version, dict):
+        version = sorted(version.items())
+    return _etag(request, queryset.model._meta.label, version)
+
+
+def _not_modified(request, etag, updated_at):
+    last_modified = timegm(updated_at.utctimetuple()) if updated_at else None
+    return (
+        get_conditional_response(request, etag=etag, last_modified=last_modified),
+        last_modified,
+    )
+
+
+def _set_validators(response, etag, last_modified):
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def _strip_pagination(kwargs) -> dict:
+    return {name: value for name, value in kwargs.items() if name != "ninja_pagination"}
+
+
+def conditional(view):
+    """
+    Answer GET requests carrying a matching If-None-Match (or, for detail views,
+    If-Modified-Since) with 304 Not Modified, and add ETag / Last-Modified to
+    the others. Put it right under the router decorator, above `@paginate`:
+
+        @router.get("/", response=List[Schema])
+        @conditional
+        @paginate
+        def my_view(request):
+            ...
+
+    Changes to the user model (which has no updated_at) are not detected.
+    """
+    # for paginated views, the undecorated view builds the queryset
+    source = getattr(view, "__wrapped__", view)
+    signature = inspect.signature(view)
+    parameters = [
+        *signature.parameters.values(),
+        inspect.Parameter(
+            "response", inspect.Parameter.KEYWORD_ONLY, annotation=HttpResponse
+        ),
+    ]
+
+    if inspect.iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_view_with_validators(request, *args, response, **kwargs):
+            result = await source(request, *args, **_strip_pagination(kwargs))
+            if isinstance(result, QuerySet):
+                version, aggregate = _list_version(request, result)
+                if aggregate is not None:
+                    queryset, aggregates = aggregate
+                    version = await queryset.aaggregate(**aggregates)
+                etag, updated_at = _queryset_etag(request, result, version), None
+            else:
+                etag, updated_at = _instance_validators(request, result)
+            not_modified, last_modified = _not_modified(request, etag, updated_at)
+            if not_modified is not None:
+                return not_modified
+            _set_validators(response, etag, last_modified)
+            if source is view:
+                return result
+            return await view(request, *args, **kwargs)
+
+        async_view_with_validators.__signature__ = signature.replace(
+            parameters=parameters
+        )
+        return async_view_with_validators
+
+    @wraps(view)
+    def view_with_validators(request, *args, response, **kwargs):
+        result = source(request, *args, **_strip_pagination(kwargs))
+        if isinstance(result, QuerySet):
+            version, aggregate = _list_version(request, result)
+            if aggregate is not None:
+                queryset, aggregates = aggregate
+                version = queryset.aggregate(**aggregates)
+            etag, updated_at = _queryset_etag(request, result, version), None
+        else:
+            etag, updated_at = _instance_validators(request, result)
+        not_modified, last_modified = _not_modified(request, etag, updated_at)
+        if not_modified is not None:
+            return not_modified
+        _set_validators(response, etag, last_modified)
+        if source is view:
+            return result
+        # paginate the list, the membership lookups are memoized on the request
+        return view(request, *args, **kwargs)
+
+    view_with_validators.__signature__ = signature.replace(parameters=parameters)
+    return view_with_validators
@@ -0,0 +1,120 @@
+"""
+Background deletion of organizations. `Organization.schedule_deletion()`
+deactivates an organization and queues an `OrganizationDeletion`; the
+`process_deletions` command then removes its effective permissions, team
+members, members, teams, roles and finally the organization itself in chunks
+of `DELETION_CHUNK_SIZE` rows, each in its own short transaction, so no
+request or lock waits on a large cascade.
+Every chunk goes through the regular delete path, so the change log gets its
+tombstones and the cache is invalidated.
+"""
+from datetime import timedelta
+import logging
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import (
+    EffectivePermission,
+    Member,
+    Organization,
+    OrganizationDeletion,
+    Role,
+    Team,
+    TeamMember,
+    batched_changes,
+)
+
+logger = logging.getLogger(__name__)
+
+DELETION_CHUNK_SIZE = 500
+
+# a running deletion whose worker made no progress for this long is picked up
+# by another worker
+DELETION_LEASE = timedelta(minutes=5)
+
+# dependents first, so no chunk cascades into another table; the roles go once
+# no member or team member refers to them, so they have nothing to set to null
+DELETION_ORDER = (EffectivePermission, TeamMember, Member, Team, Role, Organization)
+
+
+def claim_deletion():
+    """
+    Mark the oldest pending (or abandoned) deletion as running and return it,
+    or None when the queue is empty.
+    """
+    now = timezone.now()
+    queue = OrganizationDeletion.objects.filter(
+        Q(status=OrganizationDeletion.Status.PENDING)
+        | Q(
+            status=OrganizationDeletion.Status.RUNNING,
+            updated_at__lt=now - DELETION_LEASE,
+        )
+    ).order_by("created_at")
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            queue = queue.select_for_update(skip_locked=True)
+        deletion = queue.first()
+        if deletion is None:
+            return None
+        deletion.status = OrganizationDeletion.Status.RUNNING
+        deletion.started_at = deletion.started_at or now
+        deletion.save(update_fields=["status", "started_at", "updated_at"])
+    return deletion
+
+
+def delete_chunk(deletion, chunk_size=DELETION_CHUNK_SIZE) -> int:
+    """
+    Delete up to `chunk_size` rows of the next table that still has rows of
+    the organization, and record the progress. Returns how many rows were
+    deleted, 0 once the organization is gone.
+    """
+    for model in DELETION_ORDER:
+        field = "pk" if model is Organization else "organization_id"
+        with transaction.atomic():
+            pks = list(
+                model.objects.filter(**{field: deletion.organization_id}).values_list(
+                    "pk", flat=True
+                )[:chunk_size]
+            )
+            if not pks:
+                continue
+            with batched_changes():
+                model.objects.filter(pk__in=pks).delete()
+            OrganizationDeletion.objects.filter(pk=deletion.pk).update(
+                deleted_rows=F("deleted_rows") + len(pks), updated_at=timezone.now()
+            )
+        deletion.deleted_rows += len(pks)
+        return len(pks)
+    return 0
+
+
+def run_deletion(deletion, chunk_size=DELETION_CHUNK_SIZE) -> None:
+    """Delete chunks until the organization is gone, then mark it done."""
+    try:
+        while delete_chunk(deletion, chunk_size):
+            pass
+    except Exception as error:
+        logger.exception("Deleting organization %s failed", deletion.organization_slug)
+        deletion.status = OrganizationDeletion.Status.FAILED
+        deletion.error = str(error)
+    else:
+        deletion.status = OrganizationDeletion.Status.DONE
+    deletion.finished_at = timezone.now()
+    deletion.save(update_fields=["status", "error", "finished_at", "updated_at"])
+
+
+def process_deletions(chunk_size=DELETION_CHUNK_SIZE, limit=None) -> int:
+    """
+    Run queued deletions until the queue is empty, or `limit` of them ran.
+    Returns how many ran.
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        deletion = claim_deletion()
+        if deletion is None:
+            break
+        run_deletion(deletion, chunk_size)
+        processed += 1
+    return processed
@@ -0,0 +1,152 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Member, TeamMember
+
+EXPORT_CHUNK_SIZE = 2000
+
+# output column -> ORM path, per export kind
+MEMBER_COLUMNS = {
+    "username": "user__username",
+    "email": "user__email",
+    "first_name": "user__first_name",
+    "last_name": "user__last_name",
+    "role": "role",
+    "publicly_visible": "publicly_visible",
+    "created_at": "created_at",
+}
+TEAM_MEMBER_COLUMNS = {
+    "team": "team__slug",
+    "team_name": "team__name",
+    "username": "member__user__username",
+    "team_role": "team_role",
+    "created_at": "created_at",
+}
+
+
+class ExportFormat(models.TextChoices):
+    NDJSON = "ndjson", "application/x-ndjson"
+    CSV = "csv", "text/csv"
+
+
+class ExportKind(models.TextChoices):
+    MEMBERS = "members"
+    TEAMS = "teams"
+
+
+def member_rows(organization, public_only=False):
+    """
+    The organization's members as `.values()` rows of the `MEMBER_COLUMNS` paths.
+    """
+    members = Member.objects.filter(organization=organization)
+    if public_only:
+        members = members.filter(publicly_visible=True)
+    return members.order_by("created_at", "pk").values(*MEMBER_COLUMNS.values())
+
+
+def team_member_rows(organization, member=None):
+    """
+    One row per team membership of the organization's active teams, grouped by
+    team. When `member` is given, only teams visible to that member are included.
+    """
+    team_members = TeamMember.objects.filter(
+        organization=organization, team__is_active=True
+    )
+    if member is not None:
+        team_members = team_members.filter(
+            Q(team__visible_to_organization=True)
+            | Exists(TeamMember.objects.filter(team=OuterRef("team_id"), member=member))
+        )
+    return team_members.order_by(
+        "team__created_at", "team_id", "created_at", "pk"
+    ).values(*TEAM_MEMBER_COLUMNS.values())
+
+
+def rows_for(membership, kind):
+    """
+    The rows of an export as the caller may see them, as in the listing each
+    one mirrors: those who manage the organization get every member, others
+    only the publicly visible ones; those who view every team get all teams,
+    others the teams visible to the organization and their own.
+    Returns the `.values()` queryset and its columns.
+    """
+    if kind == ExportKind.MEMBERS:
+        manager = membership.is_member and membership.can_manage_organization
+        rows = member_rows(membership.organization, public_only=not manager)
+        return rows, MEMBER_COLUMNS
+    rows = team_member_rows(
+        membership.organization,
+        member=None if membership.can_view_every_team else membership.member,
+    )
+    return rows, TEAM_MEMBER_COLUMNS
+
+
+class _Line:
+    """File-like object handing back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def _encoder(export_format, columns):
+    """
+    Return the header lines and the function encoding one row for a format.
+    """
+    paths = list(columns.values())
+    if export_format == ExportFormat.CSV:
+        writer = csv.writer(_Line())
+
+        def encode_csv(row):
+            return writer.writerow([row[path] for path in paths])
+
+        return [writer.writerow(columns)], encode_csv
+
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+
+    def encode_ndjson(row):
+        return encoder.encode(dict(zip(columns, map(row.get, paths)))) + "\n"
+
+    return [], encode_ndjson
+
+
+def stream(rows, export_format, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Lazily encode a `.values()` queryset, fetching it in chunks through a
+    server-side cursor (where the database supports one), so memory use does
+    not grow with the number of rows.
+    """
+    header, encode = _encoder(export_format, columns)
+    yield from header
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield encode(row)
+
+
+async def astream(rows, export_format, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Async variant of `stream`, for StreamingHttpResponse under ASGI.
+    """
+    header, encode = _encoder(export_format, columns)
+    for line in header:
+        yield line
+    async for row in rows.aiterator(chunk_size=chunk_size):
+        yield encode(row)
+
+
+def write(rows, export_format, columns, file, chunk_size=EXPORT_CHUNK_SIZE) -> int:
+    """
+    Write an export to a text file. Returns the number of rows written.
+    """
+    header, encode = _encoder(export_format, columns)
+    file.writelines(header)
+    written = 0
+    for row in rows.iterator(chunk_size=chunk_size):
+        file.write(encode(row))
+        written += 1
+    return written
+
+
+def filename(organization, kind, export_format) -> str:
+    return f"{organization.slug}-{kind}.{export_format}"
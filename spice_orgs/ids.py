@@ -0,0 +1,33 @@
+"""
+Time-ordered primary keys. A UUIDv7 (RFC 9562) starts with the Unix time in
+milliseconds, so rows inserted together get neighbouring keys and land on the
+last pages of the primary key index instead of random ones: fewer page splits,
+smaller indexes and a hot set that stays in cache during bulk inserts.
+
+They are ordinary UUIDs, stored in the same columns as the UUIDv4 keys created
+before them, so existing rows keep their ids and both kinds mix freely.
+"""
+import os
+import time
+from uuid import UUID
+
+_VERSION = 0x7 << 76
+_VARIANT = 0b10 << 62
+_VERSION_MASK = 0xF << 76
+_VARIANT_MASK = 0b11 << 62
+
+
+def uuid7() -> UUID:
+    """
+    A new UUIDv7: 48 bits of milliseconds since the epoch followed by random
+    bits, with the version and variant set. Keys of the same millisecond are
+    in random order.
+    """
+    milliseconds = time.time_ns() // 1_000_000
+    value = (milliseconds & (2**48 - 1)) << 80 | int.from_bytes(os.urandom(10), "big")
+    return UUID(int=value & ~_VERSION_MASK & ~_VARIANT_MASK | _VERSION | _VARIANT)
+
+
+def uuid7_milliseconds(value: UUID) -> int:
+    """The Unix time in milliseconds a UUIDv7 was created at."""
+    return value.int >> 80
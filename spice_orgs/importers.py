@@ -0,0 +1,16 @@
+import csv
+import io
+
+
+def iter_members_csv(file, encoding="utf-8"):
+    """
+    Lazily yield (username, role) pairs from a CSV file with a `username` column
+    and an optional `role` column. Works on binary file objects such as uploads,
+    so rows are parsed as they are read rather than loading the whole file.
+    """
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding=encoding, newline="")
+    for row in csv.DictReader(file):
+        username = (row.get("username") or "").strip()
+        if username:
+            yield username, (row.get("role") or "").strip().upper() or None
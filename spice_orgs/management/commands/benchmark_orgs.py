@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from ...benchmarks import concurrency, endpoints, inserts, rendering
+
+# suite name -> (runner, the command options it takes)
+SUITES = {
+    "endpoints": (endpoints.run, ["iterations", "prefix"]),
+    "concurrency": (
+        concurrency.run,
+        ["requests", "clients", "delay", "workers", "prefix", "async_prefix"],
+    ),
+    "rendering": (rendering.run, ["iterations", "limit", "prefix"]),
+    "inserts": (inserts.run, ["rows", "batch_size"]),
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark the organization API against the current (seeded) database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("suite", nargs="?", choices=SUITES, default="endpoints")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--prefix",
+            default="/api/organizations",
+            help="URL prefix the organization router is mounted at",
+        )
+        parser.add_argument(
+            "--async-prefix",
+            default="/api/async/organizations",
+            help="URL prefix the async organization router is mounted at",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=500, help="Rows per page of the lists"
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--clients", type=int, default=100)
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.05,
+            help="Seconds each client spends on the network per request",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Threads serving the sync router"
+        )
+        parser.add_argument(
+            "--rows", type=int, default=5000, help="Members inserted per kind of key"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=100, help="Members per INSERT"
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        run, option_names = SUITES[options["suite"]]
+        report = run(
+            **{name: options[name] for name in option_names},
+            log=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
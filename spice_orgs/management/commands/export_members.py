@@ -0,0 +1,52 @@
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import export
+from ...models import Organization
+
+
+class Command(BaseCommand):
+    help = "Export the members or team memberships of an organization"
+
+    def add_arguments(self, parser):
+        parser.add_argument("organization_slug")
+        parser.add_argument(
+            "--kind",
+            choices=export.ExportKind.values,
+            default=export.ExportKind.MEMBERS,
+        )
+        parser.add_argument(
+            "--format",
+            choices=export.ExportFormat.values,
+            default=export.ExportFormat.NDJSON,
+        )
+        parser.add_argument("--output", help="Write to this file instead of stdout")
+        parser.add_argument("--chunk-size", type=int, default=export.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(
+                slug=options["organization_slug"], is_active=True
+            )
+        except Organization.DoesNotExist as exception:
+            raise CommandError(
+                f"Organization not found for slug: {options['organization_slug']}"
+            ) from exception
+
+        if options["kind"] == export.ExportKind.MEMBERS:
+            rows, columns = export.member_rows(organization), export.MEMBER_COLUMNS
+        else:
+            rows = export.team_member_rows(organization)
+            columns = export.TEAM_MEMBER_COLUMNS
+
+        output = options["output"]
+        with (
+            open(output, "w", encoding="utf-8", newline="")
+            if output
+            else nullcontext(self.stdout)
+        ) as file:
+            written = export.write(
+                rows, options["format"], columns, file, options["chunk_size"]
+            )
+        self.stderr.write(f"Exported {written} rows")
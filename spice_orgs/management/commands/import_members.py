@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importers import iter_members_csv
+from ...models import BULK_BATCH_SIZE, BulkStatus, Organization
+
+
+class Command(BaseCommand):
+    help = "Bulk add members to an organization from a CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("organization_slug")
+        parser.add_argument(
+            "csv_path", help="CSV file with a username and an optional role column"
+        )
+        parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(
+                slug=options["organization_slug"], is_active=True
+            )
+        except Organization.DoesNotExist as exception:
+            raise CommandError(
+                f"Organization not found for slug: {options['organization_slug']}"
+            ) from exception
+
+        with open(options["csv_path"], "rb") as file:
+            results = organization.add_users_to_organization(
+                iter_members_csv(file), batch_size=options["batch_size"]
+            )
+
+        totals = {}
+        for result in results:
+            totals[result["status"]] = totals.get(result["status"], 0) + 1
+            if result["status"] != BulkStatus.ADDED:
+                self.stderr.write(f"{result['username']}: {result['status'].label}")
+        for status, total in totals.items():
+            self.stdout.write(f"{status.label}: {total}")
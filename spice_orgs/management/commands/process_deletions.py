@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ... import deletion
+from ...models import OrganizationDeletion
+
+
+class Command(BaseCommand):
+    help = "Run the queued background deletions of organizations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling for more",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=deletion.DELETION_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls of an empty queue",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Queue the failed deletions again before starting",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            retried = OrganizationDeletion.objects.filter(
+                status=OrganizationDeletion.Status.FAILED
+            ).update(status=OrganizationDeletion.Status.PENDING, error="")
+            self.stderr.write(f"Queued {retried} failed deletions again")
+        while True:
+            processed = deletion.process_deletions(options["chunk_size"])
+            if processed:
+                self.stderr.write(f"Processed {processed} deletions")
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import check_effective_permissions, rebuild_effective_permissions
+
+
+class Command(BaseCommand):
+    help = "Recompute the effective permissions from the membership tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report the organizations whose effective permissions drifted",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drifted = check_effective_permissions()
+            for slug, drift in drifted.items():
+                counts = ", ".join(f"{name} {count}" for name, count in drift.items())
+                self.stdout.write(f"{slug}: {counts}")
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} organizations have drifted effective permissions"
+                )
+            return
+        for name, count in rebuild_effective_permissions().items():
+            self.stdout.write(f"{name}: {count}")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ...search import rebuild_search_indexes
+
+
+class Command(BaseCommand):
+    help = "Re-index every row of the SQLite search tables, e.g. after a VACUUM"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        rebuild_search_indexes(options["database"])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ...models import repair_membership_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized member/owner counters from the membership tables"
+
+    def handle(self, *args, **options):
+        for name, drifted in repair_membership_counts().items():
+            self.stdout.write(f"{name}: repaired {drifted}")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from ...seed import seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Generate a large, skewed dataset of organizations, members and teams"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organizations", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument(
+            "--members", type=int, default=20, help="Mean members per organization"
+        )
+        parser.add_argument(
+            "--whales", type=int, default=2, help="Number of very large organizations"
+        )
+        parser.add_argument("--whale-members", type=int, default=5000)
+        parser.add_argument("--teams", type=int, default=5)
+        parser.add_argument("--whale-teams", type=int, default=50)
+        parser.add_argument("--team-members", type=int, default=5)
+        parser.add_argument(
+            "--prefix", default="seed", help="Prefix of generated names, must be new"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        created = seed_dataset(
+            organizations=options["organizations"],
+            users=options["users"],
+            members=options["members"],
+            whales=options["whales"],
+            whale_members=options["whale_members"],
+            teams=options["teams"],
+            whale_teams=options["whale_teams"],
+            team_members=options["team_members"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write if options["verbosity"] > 1 else None,
+        )
+        for name, total in created.items():
+            self.stdout.write(f"{name}: {total}")
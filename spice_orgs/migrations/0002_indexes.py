@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-17 01:25
+
+from django.db import migrations, models
+
+import spice_orgs.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("spice_orgs", "0001_initial"),
+    ]
+
+    operations = [
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="member",
+            index=models.Index(
+                fields=["organization", "user", "role"],
+                name="member_org_user_role_idx",
+            ),
+        ),
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="member",
+            index=models.Index(
+                condition=models.Q(("publicly_visible", True)),
+                fields=["organization", "created_at", "id"],
+                name="member_org_public_idx",
+            ),
+        ),
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="organization",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("publicly_visible", True)),
+                fields=["created_at", "id"],
+                name="organization_public_idx",
+            ),
+        ),
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="team",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["organization", "slug"],
+                name="team_org_active_slug_idx",
+            ),
+        ),
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="team",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["organization", "visible_to_organization"],
+                name="team_org_active_visible_idx",
+            ),
+        ),
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="teammember",
+            index=models.Index(
+                fields=["team", "member"], name="teammember_team_member_idx"
+            ),
+        ),
+    ]
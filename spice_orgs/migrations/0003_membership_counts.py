@@ -0,0 +1,83 @@
+# Generated by Django 4.2 on 2026-10-17 02:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(model, related_field, **filters):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{related_field: OuterRef("pk")}, **filters)
+            .order_by()
+            .values(related_field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def backfill_counts(apps, schema_editor):
+    Organization = apps.get_model("spice_orgs", "Organization")
+    Member = apps.get_model("spice_orgs", "Member")
+    Team = apps.get_model("spice_orgs", "Team")
+    TeamMember = apps.get_model("spice_orgs", "TeamMember")
+    Organization.objects.update(
+        member_count=_count_subquery(Member, "organization"),
+        owner_count=_count_subquery(Member, "organization", role="OWNER"),
+    )
+    Team.objects.update(
+        member_count=_count_subquery(TeamMember, "team"),
+        owner_count=_count_subquery(TeamMember, "team", team_role="OWNER"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("spice_orgs", "0002_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="member_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of members in the organization",
+                verbose_name="Member Count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="owner_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of owners of the organization",
+                verbose_name="Owner Count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="team",
+            name="member_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of members in the team",
+                verbose_name="Member Count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="team",
+            name="owner_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of owners of the team",
+                verbose_name="Owner Count",
+            ),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:48
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("spice_orgs", "0003_membership_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="When the change was made",
+                        verbose_name="Created At",
+                    ),
+                ),
+                (
+                    "object_type",
+                    models.CharField(
+                        choices=[
+                            ("ORGANIZATION", "Organization"),
+                            ("MEMBER", "Member"),
+                            ("TEAM", "Team"),
+                            ("TEAM_MEMBER", "Team Member"),
+                        ],
+                        help_text="Kind of row that changed",
+                        max_length=32,
+                        verbose_name="Object Type",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.UUIDField(
+                        help_text="ID of the row that changed", verbose_name="Object ID"
+                    ),
+                ),
+                (
+                    "organization_id",
+                    models.UUIDField(
+                        help_text="Organization the row belongs to, kept after the organization is deleted",
+                        verbose_name="Organization ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("CREATED", "Created"),
+                            ("UPDATED", "Updated"),
+                            ("DELETED", "Deleted"),
+                        ],
+                        help_text="Whether the row was created, updated or deleted",
+                        max_length=32,
+                        verbose_name="Action",
+                    ),
+                ),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="The row after the change, or before it was deleted",
+                        verbose_name="Data",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Change Log Entry",
+                "verbose_name_plural": "Change Log Entries",
+            },
+        ),
+    ]
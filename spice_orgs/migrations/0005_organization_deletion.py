@@ -0,0 +1,144 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:51
+
+import uuid
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("spice_orgs", "0004_change_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrganizationDeletion",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="Unique ID for this particular deletion across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="When the deletion was requested",
+                        verbose_name="Created At",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="When the deletion last made progress",
+                        verbose_name="Updated At",
+                    ),
+                ),
+                (
+                    "organization_id",
+                    models.UUIDField(
+                        help_text="Organization being deleted, kept after it is gone",
+                        verbose_name="Organization ID",
+                    ),
+                ),
+                (
+                    "organization_slug",
+                    models.SlugField(
+                        help_text="Slug of the organization being deleted",
+                        max_length=255,
+                        verbose_name="Organization Slug",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("RUNNING", "Running"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        help_text="Where the deletion is at",
+                        max_length=32,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "total_rows",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Rows to delete, counted when the deletion was requested",
+                        verbose_name="Total Rows",
+                    ),
+                ),
+                (
+                    "deleted_rows",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Rows deleted so far",
+                        verbose_name="Deleted Rows",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When a worker picked up the deletion",
+                        null=True,
+                        verbose_name="Started At",
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="When the deletion finished or failed",
+                        null=True,
+                        verbose_name="Finished At",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        help_text="Why the deletion failed",
+                        verbose_name="Error",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="User who requested the deletion",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Requested By",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Organization Deletion",
+                "verbose_name_plural": "Organization Deletions",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status__in", ["PENDING", "RUNNING"])),
+                        fields=["status", "created_at"],
+                        name="deletion_open_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import migrations
+
+# The SQL is frozen here rather than generated by spice_orgs.search, so later
+# changes to that module do not change what this migration does. The
+# PostgreSQL expression must stay the one `search._document` queries with.
+
+# FTS5 prefix indexes, so short prefixes do not scan the whole term list
+FTS_PREFIXES = "2 3"
+
+
+def _user_fields(model) -> list:
+    # the searched columns of the configured user model
+    user_model = get_user_model()
+    fields = [user_model.USERNAME_FIELD]
+    email = user_model.get_email_field_name()
+    if email in {field.name for field in model._meta.concrete_fields}:
+        fields.append(email)
+    return fields
+
+
+def _search_indexes(apps) -> dict:
+    """{name: (table, searched columns)}"""
+    organization = apps.get_model("spice_orgs", "Organization")
+    team = apps.get_model("spice_orgs", "Team")
+    user = apps.get_model(settings.AUTH_USER_MODEL)
+    return {
+        name: (
+            model._meta.db_table,
+            [model._meta.get_field(field).column for field in fields],
+        )
+        for name, model, fields in [
+            ("organization", organization, ["name"]),
+            ("team", team, ["name"]),
+            ("user", user, _user_fields(user)),
+        ]
+    }
+
+
+def _create_sql(connection, name, table, columns) -> list:
+    quote = connection.ops.quote_name
+    fts_table = f"spice_orgs_{name}_search"
+    table = quote(table)
+    if connection.vendor == "postgresql":
+        document = " || ' ' || ".join(
+            f"coalesce({quote(column)}, '')" for column in columns
+        )
+        # outside of a transaction, so the table stays writable while it builds
+        return [
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(f'{fts_table}_idx')}"
+            f" ON {table} USING gin (to_tsvector('simple', {document}))"
+        ]
+    if connection.vendor != "sqlite":
+        return []
+    fts = quote(fts_table)
+    columns = [quote(column) for column in columns]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', old.rowid, {old});"
+    insert = f"INSERT INTO {fts} (rowid, {names}) VALUES (new.rowid, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names},"
+        f" content={table}, prefix='{FTS_PREFIXES}')",
+        f"CREATE TRIGGER IF NOT EXISTS {quote(f'{fts_table}_ai')}"
+        f" AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {quote(f'{fts_table}_ad')}"
+        f" AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {quote(f'{fts_table}_au')}"
+        f" AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _drop_sql(connection, name) -> list:
+    quote = connection.ops.quote_name
+    fts_table = f"spice_orgs_{name}_search"
+    if connection.vendor == "postgresql":
+        return [f"DROP INDEX CONCURRENTLY IF EXISTS {quote(f'{fts_table}_idx')}"]
+    if connection.vendor != "sqlite":
+        return []
+    return [
+        *(
+            f"DROP TRIGGER IF EXISTS {quote(f'{fts_table}_{suffix}')}"
+            for suffix in ("ai", "ad", "au")
+        ),
+        f"DROP TABLE IF EXISTS {quote(fts_table)}",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    for name, (table, columns) in _search_indexes(apps).items():
+        for sql in _create_sql(schema_editor.connection, name, table, columns):
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for name in _search_indexes(apps):
+        for sql in _drop_sql(schema_editor.connection, name):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("spice_orgs", "0005_organization_deletion"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 4.2 on 2026-10-17 02:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Permission bits at the time of this migration
+VIEW_ORGANIZATION, MANAGE_ORGANIZATION, VIEW_TEAM, MANAGE_TEAM = 1, 2, 4, 8
+
+
+def backfill_permissions(apps, schema_editor):
+    Member = apps.get_model("spice_orgs", "Member")
+    Team = apps.get_model("spice_orgs", "Team")
+    TeamMember = apps.get_model("spice_orgs", "TeamMember")
+    EffectivePermission = apps.get_model("spice_orgs", "EffectivePermission")
+
+    teams = {}
+    for team_id, organization_id, visible in Team.objects.filter(
+        is_active=True
+    ).values_list("id", "organization_id", "visible_to_organization"):
+        teams.setdefault(organization_id, []).append((team_id, visible))
+    team_roles = {
+        (user_id, team_id): team_role
+        for user_id, team_id, team_role in TeamMember.objects.values_list(
+            "member__user_id", "team_id", "team_role"
+        )
+    }
+    rows = []
+    for user_id, organization_id, role in Member.objects.values_list(
+        "user_id", "organization_id", "role"
+    ).iterator():
+        owner = role == "OWNER"
+        rows.append(
+            EffectivePermission(
+                user_id=user_id,
+                organization_id=organization_id,
+                permissions=VIEW_ORGANIZATION | (MANAGE_ORGANIZATION if owner else 0),
+            )
+        )
+        for team_id, visible in teams.get(organization_id, []):
+            team_role = team_roles.get((user_id, team_id))
+            if owner or team_role == "OWNER":
+                permissions = VIEW_TEAM | MANAGE_TEAM
+            elif team_role is not None or visible:
+                permissions = VIEW_TEAM
+            else:
+                continue
+            rows.append(
+                EffectivePermission(
+                    user_id=user_id,
+                    organization_id=organization_id,
+                    team_id=team_id,
+                    permissions=permissions,
+                )
+            )
+    EffectivePermission.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("spice_orgs", "0006_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EffectivePermission",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "permissions",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Bitmask of the granted permissions",
+                        verbose_name="Permissions",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        help_text="Organization the permissions apply to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="spice_orgs.organization",
+                        verbose_name="Organization",
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Team the permissions apply to, empty for the organization",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="spice_orgs.team",
+                        verbose_name="Team",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="User the permissions are granted to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Effective Permission",
+                "verbose_name_plural": "Effective Permissions",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="effectivepermission",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("team__isnull", True)),
+                fields=("user", "organization"),
+                name="effective_permission_organization_uniq",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="effectivepermission",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("team__isnull", False)),
+                fields=("user", "organization", "team"),
+                name="effective_permission_team_uniq",
+            ),
+        ),
+        migrations.RunPython(backfill_permissions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 4.2 on 2026-10-17 02:10
+
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Permission bits owners gain at this migration: every team and billing
+OWNER_PERMISSIONS = 1 | 2 | 4 | 8 | 16
+
+
+def grant_owner_permissions(apps, schema_editor):
+    Member = apps.get_model("spice_orgs", "Member")
+    EffectivePermission = apps.get_model("spice_orgs", "EffectivePermission")
+    EffectivePermission.objects.filter(
+        models.Exists(
+            Member.objects.filter(
+                user=models.OuterRef("user"),
+                organization=models.OuterRef("organization"),
+                role="OWNER",
+            )
+        ),
+        team__isnull=True,
+    ).update(permissions=OWNER_PERMISSIONS)
+
+
+def revoke_owner_permissions(apps, schema_editor):
+    EffectivePermission = apps.get_model("spice_orgs", "EffectivePermission")
+    EffectivePermission.objects.filter(
+        team__isnull=True, permissions=OWNER_PERMISSIONS
+    ).update(permissions=1 | 2)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("spice_orgs", "0007_effective_permissions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Role",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="Unique ID for this particular role across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="When the role was created",
+                        verbose_name="Created At",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="When the role was last updated",
+                        verbose_name="Updated At",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Name of the role",
+                        max_length=255,
+                        verbose_name="Name",
+                    ),
+                ),
+                (
+                    "permissions",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Bitmask of the permissions the role grants",
+                        verbose_name="Permissions",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        help_text="Which organization this role belongs to",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="spice_orgs.organization",
+                        verbose_name="Organization",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Role",
+                "verbose_name_plural": "Roles",
+                "unique_together": {("organization", "name")},
+            },
+        ),
+        migrations.AddField(
+            model_name="member",
+            name="custom_role",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Custom role granting permissions on top of the role",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="spice_orgs.role",
+                verbose_name="Custom Role",
+            ),
+        ),
+        migrations.AddField(
+            model_name="teammember",
+            name="custom_role",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Custom role granting permissions in this team",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="spice_orgs.role",
+                verbose_name="Custom Role",
+            ),
+        ),
+        migrations.RunPython(grant_owner_permissions, revoke_owner_permissions),
+    ]
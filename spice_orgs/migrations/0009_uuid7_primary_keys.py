@@ -0,0 +1,98 @@
+# Generated by Django 4.2 on 2026-10-17 02:48
+#
+# New rows get time-ordered UUIDv7 keys. The default is computed in Python, so
+# only the migration state changes: the columns, their indexes and the ids of
+# existing rows (UUIDv4) are left as they are, and both kinds of ids coexist.
+
+from django.db import migrations, models
+
+import spice_orgs.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("spice_orgs", "0008_custom_roles"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="member",
+                    name="id",
+                    field=models.UUIDField(
+                        default=spice_orgs.ids.uuid7,
+                        editable=False,
+                        help_text="Unique ID for this particular user + organization/team mapping across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="organization",
+                    name="id",
+                    field=models.UUIDField(
+                        default=spice_orgs.ids.uuid7,
+                        editable=False,
+                        help_text="Unique ID for this particular organization across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="organizationdeletion",
+                    name="id",
+                    field=models.UUIDField(
+                        default=spice_orgs.ids.uuid7,
+                        editable=False,
+                        help_text="Unique ID for this particular deletion across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="role",
+                    name="id",
+                    field=models.UUIDField(
+                        default=spice_orgs.ids.uuid7,
+                        editable=False,
+                        help_text="Unique ID for this particular role across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="team",
+                    name="id",
+                    field=models.UUIDField(
+                        default=spice_orgs.ids.uuid7,
+                        editable=False,
+                        help_text="Unique ID for this particular team across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="teammember",
+                    name="id",
+                    field=models.UUIDField(
+                        default=spice_orgs.ids.uuid7,
+                        editable=False,
+                        help_text="Unique ID for this particular user + organization/team mapping across whole system",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="UUID",
+                    ),
+                ),
+            ],
+            # nothing to do in the database, which would otherwise rebuild
+            # every table on SQLite
+            database_operations=[],
+        ),
+    ]
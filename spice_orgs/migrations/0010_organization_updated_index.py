@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 03:08
+
+from django.db import migrations, models
+
+import spice_orgs.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("spice_orgs", "0009_uuid7_primary_keys"),
+    ]
+
+    operations = [
+        spice_orgs.operations.AddIndexConcurrently(
+            model_name="organization",
+            index=models.Index(fields=["updated_at"], name="organization_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2 on 2026-10-17 03:40
+#
+# Team rows of EffectivePermission used to be written for every member of the
+# organization who could see the team (visible teams, owners, organization
+# roles with team bits). Now only team memberships are stored, with the bits
+# they grant by themselves; the rest is combined when checking.
+
+from django.db import migrations
+
+VIEW_TEAM = 4
+MANAGE_TEAM = 8
+TEAM_PERMISSIONS = VIEW_TEAM | MANAGE_TEAM
+TEAM_ROLE_PERMISSIONS = {"OWNER": VIEW_TEAM | MANAGE_TEAM, "MEMBER": VIEW_TEAM}
+BATCH_SIZE = 1000
+
+
+def store_team_grants_only(apps, schema_editor):
+    EffectivePermission = apps.get_model("spice_orgs", "EffectivePermission")
+    Organization = apps.get_model("spice_orgs", "Organization")
+    TeamMember = apps.get_model("spice_orgs", "TeamMember")
+
+    for organization_id in Organization.objects.values_list("id", flat=True):
+        desired = {
+            (user_id, team_id): TEAM_ROLE_PERMISSIONS[team_role]
+            | ((role_permissions or 0) & TEAM_PERMISSIONS)
+            for user_id, team_id, team_role, role_permissions in TeamMember.objects.filter(
+                organization_id=organization_id
+            ).values_list(
+                "member__user_id", "team_id", "team_role", "custom_role__permissions"
+            )
+        }
+        stored = {
+            (row.user_id, row.team_id): row
+            for row in EffectivePermission.objects.filter(
+                organization_id=organization_id, team__isnull=False
+            )
+        }
+        extra = [row.pk for key, row in stored.items() if key not in desired]
+        for start in range(0, len(extra), BATCH_SIZE):
+            EffectivePermission.objects.filter(
+                pk__in=extra[start : start + BATCH_SIZE]
+            ).delete()
+        changed = []
+        for key, row in stored.items():
+            if key in desired and row.permissions != desired[key]:
+                row.permissions = desired[key]
+                changed.append(row)
+        EffectivePermission.objects.bulk_update(
+            changed, ["permissions"], batch_size=BATCH_SIZE
+        )
+        EffectivePermission.objects.bulk_create(
+            [
+                EffectivePermission(
+                    user_id=user_id,
+                    organization_id=organization_id,
+                    team_id=team_id,
+                    permissions=permissions,
+                )
+                for (user_id, team_id), permissions in desired.items()
+                if (user_id, team_id) not in stored
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("spice_orgs", "0010_organization_updated_index"),
+    ]
+
+    operations = [
+        # going back, `manage.py rebuild_effective_permissions` of the older
+        # code writes the removed rows again
+        migrations.RunPython(store_team_grants_only, migrations.RunPython.noop),
+    ]
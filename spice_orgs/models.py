@@ -1,12 +1,189 @@
-from uuid import uuid4
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntFlag
+from itertools import islice
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
+from .ids import uuid7
+from .signals import memberships_changed
+
 UserModel = get_user_model()
 
+BULK_BATCH_SIZE = 1000
+
+
+class BulkStatus(models.TextChoices):
+    ADDED = "ADDED", _("Added")
+    EXISTS = "EXISTS", _("Already a member")
+    DUPLICATE = "DUPLICATE", _("Duplicate row")
+    NOT_FOUND = "NOT_FOUND", _("User not found")
+    INVALID_ROLE = "INVALID_ROLE", _("Invalid role")
+    NOT_MEMBER = "NOT_MEMBER", _("Not a member of the organization")
+    NOT_TEAM_MEMBER = "NOT_TEAM_MEMBER", _("Not a member of the team")
+    UPDATED = "UPDATED", _("Updated")
+    REMOVED = "REMOVED", _("Removed")
+
+
+COUNTER_FIELDS = ("member_count", "owner_count")
+
+
+class Permission(IntFlag):
+    """
+    Bits of an `EffectivePermission` and of a `Role`. The team bits of an
+    organization-wide grant (a member's role) apply to every team.
+    """
+
+    VIEW_ORGANIZATION = 1
+    MANAGE_ORGANIZATION = 2
+    VIEW_TEAM = 4
+    MANAGE_TEAM = 8
+    MANAGE_BILLING = 16
+
+
+TEAM_PERMISSIONS = Permission.VIEW_TEAM | Permission.MANAGE_TEAM
+
+
+def batched(iterable, batch_size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def fields_without_counters(instance) -> list:
+    """
+    Fields written by a regular save(). The counters are only ever changed with
+    F-expressions, so a stale in-memory instance can't overwrite them.
+    """
+    return [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in COUNTER_FIELDS
+    ]
+
+
+def adjust_counts(*instances, members=0, owners=0) -> None:
+    """
+    Atomically shift the member/owner counters of Organizations or Teams (of
+    one model), in one update however many are given. Call inside the
+    transaction that changes the membership rows.
+    """
+    if not instances or not (members or owners):
+        return
+    model = type(instances[0])
+    updated_at = timezone.now()
+    model.objects.filter(pk__in=[instance.pk for instance in instances]).update(
+        member_count=F("member_count") + members,
+        owner_count=F("owner_count") + owners,
+        updated_at=updated_at,
+    )
+    for instance in instances:
+        instance.member_count += members
+        instance.owner_count += owners
+        instance.updated_at = updated_at
+    for organization_id in {
+        getattr(instance, "organization_id", instance.pk) for instance in instances
+    }:
+        memberships_changed.send(sender=model, organization_id=organization_id)
+
+
+def locked_owner_count(instance) -> int:
+    """
+    Read the owner counter with the row locked, so concurrent removals of the
+    last owners serialize on it.
+    """
+    return (
+        type(instance)
+        .objects.select_for_update()
+        .values_list("owner_count", flat=True)
+        .get(pk=instance.pk)
+    )
+
+
+class Role(models.Model):
+    """
+    A custom role of an organization, granting `Permission` bits on top of the
+    built-in OWNER / MEMBER roles: on a `Member` for the whole organization,
+    on a `TeamMember` for that team only (where only the team bits count).
+    """
+
+    id = models.UUIDField(
+        verbose_name=_("UUID"),
+        help_text=_("Unique ID for this particular role across whole system"),
+        primary_key=True,
+        default=uuid7,
+        editable=False,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Created At"),
+        help_text=_("When the role was created"),
+        auto_now_add=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Updated At"),
+        help_text=_("When the role was last updated"),
+        auto_now=True,
+    )
+    organization = models.ForeignKey(
+        verbose_name=_("Organization"),
+        help_text=_("Which organization this role belongs to"),
+        to="spice_orgs.Organization",
+        on_delete=models.CASCADE,
+    )
+    name = models.CharField(
+        verbose_name=_("Name"),
+        help_text=_("Name of the role"),
+        max_length=255,
+    )
+    permissions = models.IntegerField(
+        verbose_name=_("Permissions"),
+        help_text=_("Bitmask of the permissions the role grants"),
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = "Role"
+        verbose_name_plural = "Roles"
+        unique_together = ["organization", "name"]
+
+    def __str__(self) -> str:
+        return f"{self.organization.slug} | {self.name}"
+
+    def save(self, *args, **kwargs) -> None:
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                sync_effective_permissions(
+                    self.organization_id, user_ids=self._holder_user_ids()
+                )
+
+    def delete(self, *args, **kwargs):
+        # the members and team members holding it fall back to their built-in role
+        with transaction.atomic():
+            user_ids = self._holder_user_ids()
+            result = super().delete(*args, **kwargs)
+            sync_effective_permissions(self.organization_id, user_ids=user_ids)
+        return result
+
+    def _holder_user_ids(self) -> list:
+        return list(
+            Member.objects.filter(
+                models.Q(custom_role=self) | models.Q(teammember__custom_role=self),
+                organization_id=self.organization_id,
+            )
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+
 
 class Member(models.Model):
     class MemberRole(models.TextChoices):
@@ -20,7 +197,7 @@ class Member(models.Model):
             " whole system"
         ),
         primary_key=True,
-        default=uuid4,
+        default=uuid7,
         editable=False,
     )
     created_at = models.DateTimeField(
@@ -53,6 +230,14 @@ class Member(models.Model):
         default=MemberRole.MEMBER,
         max_length=255,
     )
+    custom_role = models.ForeignKey(
+        verbose_name=_("Custom Role"),
+        help_text=_("Custom role granting permissions on top of the role"),
+        to=Role,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
     publicly_visible = models.BooleanField(
         verbose_name=_("Publicly Visible"),
         help_text=_(
@@ -65,17 +250,50 @@ class Member(models.Model):
         verbose_name = "Member"
         verbose_name_plural = "Members"
         unique_together = ["user", "organization"]
+        indexes = [
+            # membership/ownership checks: (organization, user, role)
+            models.Index(
+                fields=["organization", "user", "role"],
+                name="member_org_user_role_idx",
+            ),
+            # publicly visible member lists in keyset order
+            models.Index(
+                fields=["organization", "created_at", "id"],
+                condition=models.Q(publicly_visible=True),
+                name="member_org_public_idx",
+            ),
+        ]
+
+    def delete(self, *args, **kwargs):
+        # one insert for the tombstones of the member and its team memberships
+        with transaction.atomic(savepoint=False), batched_changes():
+            return super().delete(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.organization.slug} | {self.user.username} | {self.role}"
 
 
+# what the built-in roles grant, a custom role adds its own bits
+MEMBER_ROLE_PERMISSIONS = {
+    Member.MemberRole.OWNER: Permission.VIEW_ORGANIZATION
+    | Permission.MANAGE_ORGANIZATION
+    | TEAM_PERMISSIONS
+    | Permission.MANAGE_BILLING,
+    Member.MemberRole.MEMBER: Permission.VIEW_ORGANIZATION,
+}
+
+
+def member_permissions(role, role_permissions=0) -> Permission:
+    """The bits of a member in their organization."""
+    return Permission(MEMBER_ROLE_PERMISSIONS[role] | role_permissions)
+
+
 class Organization(models.Model):
     id = models.UUIDField(
         verbose_name=_("UUID"),
         help_text=_("Unique ID for this particular organization across whole system"),
         primary_key=True,
-        default=uuid4,
+        default=uuid7,
         editable=False,
     )
     name = models.CharField(
@@ -116,21 +334,55 @@ class Organization(models.Model):
         help_text=_("Is this organization publicly visible"),
         default=True,
     )
+    member_count = models.IntegerField(
+        verbose_name=_("Member Count"),
+        help_text=_("Number of members in the organization"),
+        default=0,
+        editable=False,
+    )
+    owner_count = models.IntegerField(
+        verbose_name=_("Owner Count"),
+        help_text=_("Number of owners of the organization"),
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Organization"
         verbose_name_plural = "Organizations"
+        indexes = [
+            # active, publicly visible organization lists in keyset order
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_active=True, publicly_visible=True),
+                name="organization_public_idx",
+            ),
+            # the version of the organization lists, max(updated_at)
+            models.Index(fields=["updated_at"], name="organization_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.slug}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the slug the cache may know the organization by, see signals.py
+        instance._loaded_slug = instance.__dict__.get("slug")
+        return instance
+
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
-        if self.member_set.count() == 0:
-            self.add_user_to_organization(
-                username=self.created_by.username, role=Member.MemberRole.OWNER
-            )
+        if not adding and "update_fields" not in kwargs:
+            kwargs["update_fields"] = fields_without_counters(self)
+        # the row, its owner and their change log entries commit together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self.add_user_to_organization(
+                    username=self.created_by.username, role=Member.MemberRole.OWNER
+                )
 
     def is_user_in_organization(self, username) -> bool:
         return self.member_set.filter(user__username=username).exists()
@@ -139,22 +391,151 @@ class Organization(models.Model):
         if self.is_user_in_organization(username):
             raise Exception("User already exists in this organization")
         user = UserModel.objects.get(username=username)
-        member = Member.objects.create(user=user, role=role, organization=self)
+        with transaction.atomic():
+            # the post_save receiver writes the member's effective permissions
+            member = Member.objects.create(user=user, role=role, organization=self)
+            adjust_counts(self, members=1, owners=int(role == Member.MemberRole.OWNER))
         return member
 
+    def add_users_to_organization(self, rows, batch_size=BULK_BATCH_SIZE) -> list:
+        """
+        Add many users at once. `rows` is an iterable of (username, role) pairs and
+        is consumed lazily, one batch at a time. Each batch costs three queries:
+        resolve the usernames, find the existing memberships, bulk insert the rest.
+        Returns a result dict per row, in input order.
+        """
+        results = []
+        seen = set()
+        for batch in batched(rows, batch_size):
+            usernames = {username for username, _role in batch}
+            user_ids = dict(
+                UserModel.objects.filter(username__in=usernames).values_list(
+                    "username", "id"
+                )
+            )
+            existing = set(
+                self.member_set.filter(user_id__in=user_ids.values()).values_list(
+                    "user_id", flat=True
+                )
+            )
+            members = []
+            for username, role in batch:
+                role = role or Member.MemberRole.MEMBER
+                if username in seen:
+                    status = BulkStatus.DUPLICATE
+                elif role not in Member.MemberRole.values:
+                    status = BulkStatus.INVALID_ROLE
+                elif username not in user_ids:
+                    status = BulkStatus.NOT_FOUND
+                elif user_ids[username] in existing:
+                    status = BulkStatus.EXISTS
+                else:
+                    status = BulkStatus.ADDED
+                    members.append(
+                        Member(user_id=user_ids[username], role=role, organization=self)
+                    )
+                seen.add(username)
+                results.append({"username": username, "role": role, "status": status})
+            with transaction.atomic(), batched_changes():
+                Member.objects.bulk_create(members, batch_size=batch_size)
+                record_changes(ChangeLogEntry.Action.CREATED, members)
+                sync_effective_permissions(
+                    self.pk, user_ids=[member.user_id for member in members]
+                )
+                adjust_counts(
+                    self,
+                    members=len(members),
+                    owners=sum(
+                        member.role == Member.MemberRole.OWNER for member in members
+                    ),
+                )
+        return results
+
     def remove_user_from_organization(self, username) -> bool:
-        if self.is_user_in_organization(username):
-            raise Exception("User does not exist in this organization")
-        if (
-            self.member_set.get(member__user__username=username).role
-            == Member.MemberRole.OWNER
-            and self.member_set.filter(role=TeamMember.MemberRole.OWNER).count() == 1
-        ):
-            raise Exception("Cannot remove only owner from organization")
-        member = Member.objects.get(user__username=username)
-        member.delete()
+        with transaction.atomic():
+            member = self.member_set.filter(user__username=username).first()
+            if member is None:
+                raise Exception("User does not exist in this organization")
+            is_owner = member.role == Member.MemberRole.OWNER
+            if is_owner and locked_owner_count(self) == 1:
+                raise Exception("Cannot remove only owner from organization")
+            team_members = list(member.teammember_set.select_related("team"))
+            member.delete()
+            adjust_counts(self, members=-1, owners=-int(is_owner))
+            # the member's team memberships were removed by the cascade
+            adjust_counts(
+                *[team_member.team for team_member in team_members], members=-1
+            )
+            adjust_counts(
+                *[
+                    team_member.team
+                    for team_member in team_members
+                    if team_member.team_role == TeamMember.TeamMemberRole.OWNER
+                ],
+                owners=-1,
+            )
         return True
 
+    def update_user_in_organization(self, username, role) -> Member:
+        if role not in Member.MemberRole.values:
+            raise Exception(f"Invalid role: {role}")
+        with transaction.atomic():
+            member = self.member_set.select_related("user").get(user__username=username)
+            if member.role == role:
+                return member
+            if member.role == Member.MemberRole.OWNER and locked_owner_count(self) == 1:
+                raise Exception("Cannot remove only owner from organization")
+            member.role = role
+            member.save(update_fields=["role", "updated_at"])
+            adjust_counts(self, owners=1 if role == Member.MemberRole.OWNER else -1)
+        return member
+
+    def create_role(self, name, permissions=0) -> Role:
+        return Role.objects.create(
+            organization=self, name=name, permissions=int(permissions)
+        )
+
+    def assign_custom_role(self, username, role) -> Member:
+        """Give a member a custom role of the organization, None takes it away."""
+        if role is not None and role.organization_id != self.pk:
+            raise Exception("Role does not exist in this organization")
+        with transaction.atomic():
+            member = self.member_set.select_related("user").get(user__username=username)
+            member.custom_role = role
+            member.save(update_fields=["custom_role", "updated_at"])
+        return member
+
+    def schedule_deletion(self, requested_by=None) -> "OrganizationDeletion":
+        """
+        Deactivate the organization right away and queue the removal of its
+        rows for the `process_deletions` worker. Returns the queued deletion,
+        or the one already queued.
+        """
+        with transaction.atomic():
+            deletion = OrganizationDeletion.objects.filter(
+                organization_id=self.pk, status__in=OrganizationDeletion.OPEN_STATUSES
+            ).first()
+            if deletion is not None:
+                return deletion
+            self.is_active = False
+            self.save(update_fields=["is_active", "updated_at"])
+            return OrganizationDeletion.objects.create(
+                organization_id=self.pk,
+                organization_slug=self.slug,
+                requested_by=requested_by,
+                total_rows=1
+                + sum(
+                    model.objects.filter(organization=self).count()
+                    for model in (
+                        EffectivePermission,
+                        TeamMember,
+                        Member,
+                        Team,
+                        Role,
+                    )
+                ),
+            )
+
 
 class TeamMember(models.Model):
     class TeamMemberRole(models.TextChoices):
@@ -168,7 +549,7 @@ class TeamMember(models.Model):
             " whole system"
         ),
         primary_key=True,
-        default=uuid4,
+        default=uuid7,
         editable=False,
     )
     created_at = models.DateTimeField(
@@ -207,25 +588,75 @@ class TeamMember(models.Model):
         default=TeamMemberRole.MEMBER,
         max_length=255,
     )
+    custom_role = models.ForeignKey(
+        verbose_name=_("Custom Role"),
+        help_text=_("Custom role granting permissions in this team"),
+        to=Role,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         verbose_name = "Team Member"
         verbose_name_plural = "Team Members"
         unique_together = ["organization", "team", "member"]
+        indexes = [
+            # the caller's row in a team
+            models.Index(fields=["team", "member"], name="teammember_team_member_idx"),
+        ]
 
     def __str__(self) -> str:
         return (
             f"{self.organization.slug} | {self.team.slug} |"
-            f" {self.member.user.username} | {self.role}"
+            f" {self.member.user.username} | {self.team_role}"
         )
 
 
+TEAM_ROLE_PERMISSIONS = {
+    TeamMember.TeamMemberRole.OWNER: TEAM_PERMISSIONS,
+    TeamMember.TeamMemberRole.MEMBER: Permission.VIEW_TEAM,
+}
+
+
+def team_grant(team_role=None, role_permissions=0) -> Permission:
+    """
+    The bits a team membership grants by itself: those of the team role and
+    the team bits of its custom role. None (not in the team) grants nothing.
+    This is what the team's `EffectivePermission` row stores.
+    """
+    if team_role is None:
+        return Permission(0)
+    return Permission(
+        TEAM_ROLE_PERMISSIONS[team_role] | (role_permissions & TEAM_PERMISSIONS)
+    )
+
+
+def team_permissions(organization_permissions, grant=0, visible=False) -> Permission:
+    """
+    The bits of a member of an organization (with `organization_permissions`)
+    in one of its teams: the team bits of their organization role, every team
+    bit for managers of the organization, the `team_grant` of their team
+    membership, and VIEW_TEAM for teams visible to the organization. Non
+    members get nothing. Only the grant is stored, the rest follows from the
+    organization row and the team when checking.
+    """
+    if not organization_permissions:
+        return Permission(0)
+    permissions = organization_permissions & TEAM_PERMISSIONS | grant
+    if organization_permissions & Permission.MANAGE_ORGANIZATION:
+        permissions |= TEAM_PERMISSIONS
+    if visible or permissions & Permission.MANAGE_TEAM:
+        permissions |= Permission.VIEW_TEAM
+    return Permission(permissions)
+
+
 class Team(models.Model):
     id = models.UUIDField(
         verbose_name=_("UUID"),
         help_text=_("Unique ID for this particular team across whole system"),
         primary_key=True,
-        default=uuid4,
+        default=uuid7,
         editable=False,
     )
     name = models.CharField(
@@ -269,22 +700,58 @@ class Team(models.Model):
         help_text=_("Is this team visible to the others in the organization"),
         default=False,
     )
+    member_count = models.IntegerField(
+        verbose_name=_("Member Count"),
+        help_text=_("Number of members in the team"),
+        default=0,
+        editable=False,
+    )
+    owner_count = models.IntegerField(
+        verbose_name=_("Owner Count"),
+        help_text=_("Number of owners of the team"),
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Team"
         verbose_name_plural = "Teams"
         unique_together = ["name", "slug", "organization"]
+        indexes = [
+            # team lookups by (organization, slug)
+            models.Index(
+                fields=["organization", "slug"],
+                condition=models.Q(is_active=True),
+                name="team_org_active_slug_idx",
+            ),
+            # teams visible to the whole organization
+            models.Index(
+                fields=["organization", "visible_to_organization"],
+                condition=models.Q(is_active=True),
+                name="team_org_active_visible_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.organization.slug} | {self.slug}"
 
+    def delete(self, *args, **kwargs):
+        # one insert for the tombstones of the team and its members
+        with transaction.atomic(savepoint=False), batched_changes():
+            return super().delete(*args, **kwargs)
+
     def save(self, *args, **kwargs) -> None:
+        adding = self._state.adding
         self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
-        if self.teammember_set.count() == 0:
-            self.add_user_to_team(
-                username=self.created_by.username, role=TeamMember.MemberRole.OWNER
-            )
+        if not adding and "update_fields" not in kwargs:
+            kwargs["update_fields"] = fields_without_counters(self)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self.add_user_to_team(
+                    username=self.created_by.username,
+                    role=TeamMember.TeamMemberRole.OWNER,
+                )
 
     def is_user_in_team(self, username) -> bool:
         return self.teammember_set.filter(member__user__username=username).exists()
@@ -296,26 +763,763 @@ class Team(models.Model):
             raise Exception("User does not exist in this organization")
         if self.is_user_in_team(username=username):
             raise Exception("User already a team member")
-        organization_member = self.organization.member_set.get(user__username=username)
-        team_member = TeamMember.objects.create(
-            member=organization_member,
-            role=role,
-            organization=self.organization,
-            team=self,
+        organization_member = self.organization.member_set.select_related("user").get(
+            user__username=username
         )
+        with transaction.atomic():
+            team_member = TeamMember.objects.create(
+                member=organization_member,
+                team_role=role,
+                organization=self.organization,
+                team=self,
+            )
+            adjust_counts(
+                self, members=1, owners=int(role == TeamMember.TeamMemberRole.OWNER)
+            )
+        return team_member
+
+    def assign_custom_role(self, username, role) -> TeamMember:
+        """
+        Give a team member a custom role of the organization for this team,
+        None takes it away.
+        """
+        if role is not None and role.organization_id != self.organization_id:
+            raise Exception("Role does not exist in this organization")
+        with transaction.atomic():
+            team_member = (
+                self.teammember_set.select_related("member__user")
+                .filter(member__user__username=username)
+                .first()
+            )
+            if team_member is None:
+                raise Exception("User does not exist in this team")
+            team_member.custom_role = role
+            team_member.save(update_fields=["custom_role", "updated_at"])
         return team_member
 
     def remove_user_from_team(self, username) -> bool:
         if not self.organization.is_user_in_organization(username=username):
             raise Exception("User does not exist in this organization")
-        if not self.is_user_in_team(username=username):
-            raise Exception("User does not exist in this team")
-        if (
-            self.teammember_set.get(member__user__username=username).role
-            == TeamMember.MemberRole.OWNER
-            and self.teammember_set.filter(role=TeamMember.MemberRole.OWNER).count()
-            == 1
-        ):
-            raise Exception("Cannot remove only owner from team")
-        self.teammember_set.get(member__user__username=username).delete()
+        with transaction.atomic():
+            team_member = (
+                self.teammember_set.select_related("member")
+                .filter(member__user__username=username)
+                .first()
+            )
+            if team_member is None:
+                raise Exception("User does not exist in this team")
+            is_owner = team_member.team_role == TeamMember.TeamMemberRole.OWNER
+            if is_owner and locked_owner_count(self) == 1:
+                raise Exception("Cannot remove only owner from team")
+            team_member.delete()
+            adjust_counts(self, members=-1, owners=-int(is_owner))
         return True
+
+    def update_user_in_team(self, username, role) -> TeamMember:
+        self.update_users_in_team([username], role=role)
+        return self.teammember_set.select_related("member__user").get(
+            member__user__username=username
+        )
+
+    def _team_members_by_username(self, usernames) -> dict:
+        return {
+            team_member.member.user.username: team_member
+            for team_member in self.teammember_set.filter(
+                member__user__username__in=usernames
+            ).select_related("member__user")
+        }
+
+    def _sync_effective_permissions(self, user_ids) -> None:
+        sync_effective_permissions(
+            self.organization_id, user_ids=user_ids, team_ids=[self.pk]
+        )
+
+    def _check_batch_keeps_an_owner(self, owners) -> None:
+        """
+        Raise if a batch touching `owners` owners would leave the team without one.
+        A single locked read of the owner counter, however large the batch.
+        """
+        if owners and owners >= locked_owner_count(self):
+            raise Exception("Cannot remove only owner from team")
+
+    def add_users_to_team(self, rows) -> list:
+        """
+        Add many organization members to this team at once. `rows` is an iterable
+        of (username, role) pairs. Costs a constant number of queries: resolve the
+        organization members, find existing team members, bulk insert the rest.
+        Returns a result dict per row, in input order.
+        """
+        rows = list(rows)
+        usernames = {username for username, _role in rows}
+        members = list(
+            self.organization.member_set.filter(
+                user__username__in=usernames
+            ).values_list("user__username", "id", "user_id")
+        )
+        member_ids = {username: member_id for username, member_id, _user_id in members}
+        user_ids = {member_id: user_id for _username, member_id, user_id in members}
+        existing = set(
+            self.teammember_set.filter(member_id__in=member_ids.values()).values_list(
+                "member_id", flat=True
+            )
+        )
+        results = []
+        seen = set()
+        team_members = []
+        for username, role in rows:
+            role = role or TeamMember.TeamMemberRole.MEMBER
+            if username in seen:
+                status = BulkStatus.DUPLICATE
+            elif role not in TeamMember.TeamMemberRole.values:
+                status = BulkStatus.INVALID_ROLE
+            elif username not in member_ids:
+                status = BulkStatus.NOT_MEMBER
+            elif member_ids[username] in existing:
+                status = BulkStatus.EXISTS
+            else:
+                status = BulkStatus.ADDED
+                team_members.append(
+                    TeamMember(
+                        member_id=member_ids[username],
+                        team_role=role,
+                        organization_id=self.organization_id,
+                        team=self,
+                    )
+                )
+            seen.add(username)
+            results.append({"username": username, "role": role, "status": status})
+        with transaction.atomic(), batched_changes():
+            TeamMember.objects.bulk_create(team_members, batch_size=BULK_BATCH_SIZE)
+            record_changes(ChangeLogEntry.Action.CREATED, team_members)
+            self._sync_effective_permissions(
+                [user_ids[team_member.member_id] for team_member in team_members]
+            )
+            adjust_counts(
+                self,
+                members=len(team_members),
+                owners=sum(
+                    team_member.team_role == TeamMember.TeamMemberRole.OWNER
+                    for team_member in team_members
+                ),
+            )
+        return results
+
+    def remove_users_from_team(self, usernames) -> list:
+        """
+        Remove many users from this team at once. The only-owner invariant is
+        checked once for the whole batch; if it would leave the team without an
+        owner nothing is removed.
+        """
+        usernames = list(dict.fromkeys(usernames))
+        # one insert for the tombstones of every removed row
+        with transaction.atomic(), batched_changes():
+            team_members = self._team_members_by_username(usernames)
+            owners = sum(
+                team_member.team_role == TeamMember.TeamMemberRole.OWNER
+                for team_member in team_members.values()
+            )
+            self._check_batch_keeps_an_owner(owners)
+            TeamMember.objects.filter(
+                id__in=[team_member.id for team_member in team_members.values()]
+            ).delete()
+            # the post_delete receivers drop the grants when the block exits
+            adjust_counts(self, members=-len(team_members), owners=-owners)
+        return [
+            {
+                "username": username,
+                "role": team_members[username].team_role
+                if username in team_members
+                else None,
+                "status": BulkStatus.REMOVED
+                if username in team_members
+                else BulkStatus.NOT_TEAM_MEMBER,
+            }
+            for username in usernames
+        ]
+
+    def update_users_in_team(self, usernames, role) -> list:
+        """
+        Change the team role of many users at once. Demoting owners checks the
+        only-owner invariant once for the whole batch.
+        """
+        if role not in TeamMember.TeamMemberRole.values:
+            raise Exception(f"Invalid team role: {role}")
+        usernames = list(dict.fromkeys(usernames))
+        with transaction.atomic(), batched_changes():
+            team_members = self._team_members_by_username(usernames)
+            changed = [
+                team_member
+                for team_member in team_members.values()
+                if team_member.team_role != role
+            ]
+            if role == TeamMember.TeamMemberRole.OWNER:
+                owners = len(changed)
+            else:
+                owners = -len(changed)
+                self._check_batch_keeps_an_owner(len(changed))
+            updated_at = timezone.now()
+            TeamMember.objects.filter(
+                id__in=[team_member.id for team_member in changed]
+            ).update(team_role=role, updated_at=updated_at)
+            for team_member in changed:
+                team_member.team_role = role
+                team_member.updated_at = updated_at
+            record_changes(ChangeLogEntry.Action.UPDATED, changed)
+            adjust_counts(self, owners=owners)
+            self._sync_effective_permissions(
+                [team_member.member.user_id for team_member in changed]
+            )
+        return [
+            {
+                "username": username,
+                "role": role if username in team_members else None,
+                "status": BulkStatus.UPDATED
+                if username in team_members
+                else BulkStatus.NOT_TEAM_MEMBER,
+            }
+            for username in usernames
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of the creates, updates and deletes of organizations,
+    members, teams and team members, written in the transaction of the change.
+    Entries are ordered by `id`, which is the cursor of the changes feed.
+    The member/owner counters are not logged, they follow from the member rows.
+    """
+
+    class ObjectType(models.TextChoices):
+        ORGANIZATION = "ORGANIZATION", _("Organization")
+        MEMBER = "MEMBER", _("Member")
+        TEAM = "TEAM", _("Team")
+        TEAM_MEMBER = "TEAM_MEMBER", _("Team Member")
+
+    class Action(models.TextChoices):
+        CREATED = "CREATED", _("Created")
+        UPDATED = "UPDATED", _("Updated")
+        DELETED = "DELETED", _("Deleted")
+
+    id = models.BigAutoField(primary_key=True)
+    created_at = models.DateTimeField(
+        verbose_name=_("Created At"),
+        help_text=_("When the change was made"),
+        auto_now_add=True,
+        editable=False,
+    )
+    object_type = models.CharField(
+        verbose_name=_("Object Type"),
+        help_text=_("Kind of row that changed"),
+        choices=ObjectType.choices,
+        max_length=32,
+    )
+    object_id = models.UUIDField(
+        verbose_name=_("Object ID"),
+        help_text=_("ID of the row that changed"),
+    )
+    organization_id = models.UUIDField(
+        verbose_name=_("Organization ID"),
+        help_text=_(
+            "Organization the row belongs to, kept after the organization is deleted"
+        ),
+    )
+    action = models.CharField(
+        verbose_name=_("Action"),
+        help_text=_("Whether the row was created, updated or deleted"),
+        choices=Action.choices,
+        max_length=32,
+    )
+    data = models.JSONField(
+        verbose_name=_("Data"),
+        help_text=_("The row after the change, or before it was deleted"),
+        encoder=DjangoJSONEncoder,
+    )
+
+    class Meta:
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log Entries"
+
+    def __str__(self) -> str:
+        return f"{self.id} | {self.object_type} {self.object_id} | {self.action}"
+
+
+class OrganizationDeletion(models.Model):
+    """
+    Queue of organizations waiting to be deleted in the background, and the
+    progress of each deletion.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        RUNNING = "RUNNING", _("Running")
+        DONE = "DONE", _("Done")
+        FAILED = "FAILED", _("Failed")
+
+    OPEN_STATUSES = (Status.PENDING, Status.RUNNING)
+
+    id = models.UUIDField(
+        verbose_name=_("UUID"),
+        help_text=_("Unique ID for this particular deletion across whole system"),
+        primary_key=True,
+        default=uuid7,
+        editable=False,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Created At"),
+        help_text=_("When the deletion was requested"),
+        auto_now_add=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Updated At"),
+        help_text=_("When the deletion last made progress"),
+        auto_now=True,
+    )
+    organization_id = models.UUIDField(
+        verbose_name=_("Organization ID"),
+        help_text=_("Organization being deleted, kept after it is gone"),
+    )
+    organization_slug = models.SlugField(
+        verbose_name=_("Organization Slug"),
+        help_text=_("Slug of the organization being deleted"),
+        max_length=255,
+    )
+    requested_by = models.ForeignKey(
+        verbose_name=_("Requested By"),
+        help_text=_("User who requested the deletion"),
+        to=UserModel,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        verbose_name=_("Status"),
+        help_text=_("Where the deletion is at"),
+        choices=Status.choices,
+        default=Status.PENDING,
+        max_length=32,
+    )
+    total_rows = models.IntegerField(
+        verbose_name=_("Total Rows"),
+        help_text=_("Rows to delete, counted when the deletion was requested"),
+        default=0,
+    )
+    deleted_rows = models.IntegerField(
+        verbose_name=_("Deleted Rows"),
+        help_text=_("Rows deleted so far"),
+        default=0,
+    )
+    started_at = models.DateTimeField(
+        verbose_name=_("Started At"),
+        help_text=_("When a worker picked up the deletion"),
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField(
+        verbose_name=_("Finished At"),
+        help_text=_("When the deletion finished or failed"),
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name=_("Error"),
+        help_text=_("Why the deletion failed"),
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = "Organization Deletion"
+        verbose_name_plural = "Organization Deletions"
+        indexes = [
+            # the worker's queue
+            models.Index(
+                fields=["status", "created_at"],
+                condition=models.Q(status__in=["PENDING", "RUNNING"]),
+                name="deletion_open_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.organization_slug} | {self.status}"
+
+
+CHANGE_LOG_TYPES = {
+    Organization: ChangeLogEntry.ObjectType.ORGANIZATION,
+    Member: ChangeLogEntry.ObjectType.MEMBER,
+    Team: ChangeLogEntry.ObjectType.TEAM,
+    TeamMember: ChangeLogEntry.ObjectType.TEAM_MEMBER,
+}
+
+
+def change_data(instance) -> dict:
+    """The logged columns of a row: every concrete field but the counters."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.name not in COUNTER_FIELDS
+    }
+
+
+# the entries buffered by `batched_changes`, None outside of it
+_pending_changes = ContextVar("spice_orgs_pending_changes", default=None)
+# the grants to drop when it exits, {organization id: (user ids, team ids)}
+_pending_revocations = ContextVar("spice_orgs_pending_revocations", default=None)
+
+
+@contextmanager
+def batched_changes():
+    """
+    Buffer the change log entries recorded in the block and insert them
+    together when it exits, instead of one insert per row a cascade deletes;
+    the effective permissions of the deleted memberships go the same way.
+    Nothing is written if the block raises. Use inside a transaction.
+    """
+    if _pending_changes.get() is not None:
+        yield
+        return
+    pending, revocations = [], {}
+    token = _pending_changes.set(pending)
+    revocations_token = _pending_revocations.set(revocations)
+    try:
+        yield
+    finally:
+        _pending_changes.reset(token)
+        _pending_revocations.reset(revocations_token)
+    _write_changes(pending)
+    for organization_id, (user_ids, team_ids) in revocations.items():
+        _delete_stale_permissions(organization_id, user_ids, team_ids)
+
+
+def _write_changes(entries) -> None:
+    """
+    Insert change log entries and move the `updated_at` of the organizations
+    whose members, teams or team members they record: that is the version the
+    list ETags are computed from (see conditional.py).
+    """
+    if not entries:
+        return
+    ChangeLogEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+    organization_ids = {
+        entry.organization_id
+        for entry in entries
+        # an organization's own writes already move its updated_at
+        if entry.object_type != ChangeLogEntry.ObjectType.ORGANIZATION
+    }
+    if organization_ids:
+        Organization.objects.filter(pk__in=organization_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+def record_changes(action, instances) -> None:
+    """
+    Append a change log entry per instance. Called by the post_save/post_delete
+    receivers (see signals.py) and by the bulk operations, which bypass them.
+    Call inside the transaction that makes the change.
+    """
+    entries = [
+        ChangeLogEntry(
+            object_type=CHANGE_LOG_TYPES[type(instance)],
+            object_id=instance.pk,
+            organization_id=getattr(instance, "organization_id", instance.pk),
+            action=action,
+            data=change_data(instance),
+        )
+        for instance in instances
+    ]
+    pending = _pending_changes.get()
+    if pending is not None:
+        pending.extend(entries)
+        return
+    _write_changes(entries)
+
+
+class EffectivePermission(models.Model):
+    """
+    What a member may do in an organization (`team` is null), and what their
+    membership of one of its teams grants (see `team_grant`), as `Permission`
+    bits. Maintained by the membership methods and the membership receivers
+    (see signals.py) through `sync_effective_permissions` and
+    `drop_stale_permissions`, so `permissions.check_access` and
+    `permissions.authorize` answer with one indexed lookup; the views answer
+    from the membership rows they resolve anyway. Only grants are stored, a
+    row per member and per team member: public visibility, teams visible to
+    the organization, the team bits of organization roles and superusers are
+    combined when checking (see `team_permissions`).
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        verbose_name=_("User"),
+        help_text=_("User the permissions are granted to"),
+        to=UserModel,
+        on_delete=models.CASCADE,
+    )
+    organization = models.ForeignKey(
+        verbose_name=_("Organization"),
+        help_text=_("Organization the permissions apply to"),
+        to=Organization,
+        on_delete=models.CASCADE,
+    )
+    team = models.ForeignKey(
+        verbose_name=_("Team"),
+        help_text=_("Team the permissions apply to, empty for the organization"),
+        to=Team,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    permissions = models.IntegerField(
+        verbose_name=_("Permissions"),
+        help_text=_("Bitmask of the granted permissions"),
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = "Effective Permission"
+        verbose_name_plural = "Effective Permissions"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "organization"],
+                condition=models.Q(team__isnull=True),
+                name="effective_permission_organization_uniq",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "organization", "team"],
+                condition=models.Q(team__isnull=False),
+                name="effective_permission_team_uniq",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} | {self.organization_id} | {self.team_id}"
+
+
+def _desired_permissions(organization_id, user_ids=None, team_ids=None) -> dict:
+    """
+    The {(user_id, team_id or None): bits} rows the membership tables imply for
+    an organization, restricted to some users and/or teams: a row per member
+    and one per team membership. The organization rows are only included when
+    no teams are given.
+    """
+    members = Member.objects.filter(organization_id=organization_id)
+    if user_ids is not None:
+        members = members.filter(user_id__in=user_ids)
+    roles = {
+        user_id: (role, custom_role_id)
+        for user_id, role, custom_role_id in members.values_list(
+            "user_id", "role", "custom_role_id"
+        )
+    }
+    team_roles = {}
+    if roles:
+        team_members = TeamMember.objects.filter(organization_id=organization_id)
+        if user_ids is not None:
+            team_members = team_members.filter(member__user_id__in=roles)
+        if team_ids is not None:
+            team_members = team_members.filter(team_id__in=team_ids)
+        team_roles = {
+            (user_id, team_id): (team_role, custom_role_id)
+            for user_id, team_id, team_role, custom_role_id in team_members.values_list(
+                "member__user_id", "team_id", "team_role", "custom_role_id"
+            )
+        }
+    custom_role_ids = {
+        custom_role_id
+        for _role, custom_role_id in [*roles.values(), *team_roles.values()]
+        if custom_role_id is not None
+    }
+    role_permissions = {}
+    if custom_role_ids:
+        role_permissions = dict(
+            Role.objects.filter(id__in=custom_role_ids).values_list("id", "permissions")
+        )
+
+    desired = {}
+    if team_ids is None:
+        for user_id, (role, custom_role_id) in roles.items():
+            desired[(user_id, None)] = member_permissions(
+                role, role_permissions.get(custom_role_id, 0)
+            )
+    for key, (team_role, custom_role_id) in team_roles.items():
+        desired[key] = team_grant(team_role, role_permissions.get(custom_role_id, 0))
+    return desired
+
+
+def _stored_permissions(organization_id, user_ids=None, team_ids=None):
+    rows = EffectivePermission.objects.filter(organization_id=organization_id)
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    if team_ids is not None:
+        rows = rows.filter(team_id__in=team_ids)
+    return {(row.user_id, row.team_id): row for row in rows}
+
+
+def _permission_drift(desired: dict, stored: dict) -> tuple:
+    """The (missing, changed, extra) rows between desired and stored ones."""
+    missing = [key for key in desired if key not in stored]
+    changed = [
+        key
+        for key, row in stored.items()
+        if key in desired and row.permissions != desired[key]
+    ]
+    extra = [key for key in stored if key not in desired]
+    return missing, changed, extra
+
+
+def sync_effective_permissions(organization_id, user_ids=None, team_ids=None) -> dict:
+    """
+    Bring the effective permissions of an organization in line with its
+    membership rows, for some users and/or teams only when given. Call inside
+    the transaction that changes the membership rows. Returns how many rows
+    were created, updated and deleted.
+    """
+    if user_ids is not None and not user_ids:
+        return {"created": 0, "updated": 0, "deleted": 0}
+    desired = _desired_permissions(organization_id, user_ids, team_ids)
+    stored = _stored_permissions(organization_id, user_ids, team_ids)
+    missing, changed, extra = _permission_drift(desired, stored)
+    if extra:
+        EffectivePermission.objects.filter(
+            pk__in=[stored[key].pk for key in extra]
+        ).delete()
+    for key in changed:
+        stored[key].permissions = desired[key]
+    EffectivePermission.objects.bulk_update(
+        [stored[key] for key in changed], ["permissions"], batch_size=BULK_BATCH_SIZE
+    )
+    EffectivePermission.objects.bulk_create(
+        [
+            EffectivePermission(
+                user_id=user_id,
+                organization_id=organization_id,
+                team_id=team_id,
+                permissions=desired[(user_id, team_id)],
+            )
+            for user_id, team_id in missing
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return {"created": len(missing), "updated": len(changed), "deleted": len(extra)}
+
+
+def drop_stale_permissions(organization_id, user_ids=(), team_ids=()) -> None:
+    """
+    Delete the effective permissions of `user_ids` and of `team_ids` in an
+    organization that no membership row stands for anymore. Called by the
+    post_delete receivers (see signals.py); inside `batched_changes` one query
+    drops those of the whole block when it exits.
+    """
+    pending = _pending_revocations.get()
+    if pending is None:
+        _delete_stale_permissions(organization_id, user_ids, team_ids)
+        return
+    pending_user_ids, pending_team_ids = pending.setdefault(
+        organization_id, (set(), set())
+    )
+    pending_user_ids.update(user_ids)
+    pending_team_ids.update(team_ids)
+
+
+def _delete_stale_permissions(organization_id, user_ids, team_ids) -> None:
+    if not user_ids and not team_ids:
+        return
+    members = Member.objects.filter(
+        organization_id=OuterRef("organization_id"), user_id=OuterRef("user_id")
+    )
+    team_members = TeamMember.objects.filter(
+        team_id=OuterRef("team_id"), member__user_id=OuterRef("user_id")
+    )
+    EffectivePermission.objects.filter(
+        models.Q(user_id__in=user_ids) | models.Q(team_id__in=team_ids),
+        organization_id=organization_id,
+    ).exclude(
+        models.Q(models.Exists(members), team__isnull=True)
+        | models.Q(models.Exists(team_members), team__isnull=False)
+    ).delete()
+
+
+def check_effective_permissions() -> dict:
+    """
+    Compare the effective permissions of every organization with the ones the
+    membership tables imply. Returns the slugs of the drifted organizations
+    with their number of missing, changed and extra rows.
+    """
+    drifted = {}
+    for organization_id, slug in Organization.objects.values_list("id", "slug"):
+        missing, changed, extra = _permission_drift(
+            _desired_permissions(organization_id),
+            _stored_permissions(organization_id),
+        )
+        if missing or changed or extra:
+            drifted[slug] = {
+                "missing": len(missing),
+                "changed": len(changed),
+                "extra": len(extra),
+            }
+    return drifted
+
+
+def rebuild_effective_permissions() -> dict:
+    """
+    Recompute the effective permissions of every organization, one transaction
+    per organization. Returns the number of rows created, updated and deleted.
+    """
+    totals = {"created": 0, "updated": 0, "deleted": 0}
+    for organization_id in Organization.objects.values_list("id", flat=True):
+        with transaction.atomic():
+            for name, count in sync_effective_permissions(organization_id).items():
+                totals[name] += count
+    return totals
+
+
+def _count_subquery(model, related_field, **filters):
+    """
+    Correlated COUNT(*) of `model` rows whose `related_field` points at the outer
+    row.
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{related_field: OuterRef("pk")}, **filters)
+            .order_by()
+            .values(related_field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def repair_membership_counts() -> dict:
+    """
+    Recompute the denormalized member/owner counters of every Organization and
+    Team from the membership tables. Returns how many rows had drifted per model.
+    """
+    drifted = {}
+    with transaction.atomic():
+        for model, related_model, related_field, role_field, owner in (
+            (Organization, Member, "organization", "role", Member.MemberRole.OWNER),
+            (
+                Team,
+                TeamMember,
+                "team",
+                "team_role",
+                TeamMember.TeamMemberRole.OWNER,
+            ),
+        ):
+            members = _count_subquery(related_model, related_field)
+            owners = _count_subquery(
+                related_model, related_field, **{role_field: owner}
+            )
+            stale = model.objects.annotate(
+                actual_member_count=members, actual_owner_count=owners
+            ).exclude(
+                member_count=F("actual_member_count"),
+                owner_count=F("actual_owner_count"),
+            )
+            drifted[model._meta.verbose_name_plural] = model.objects.filter(
+                pk__in=list(stale.values_list("pk", flat=True))
+            ).update(member_count=members, owner_count=owners)
+    if any(drifted.values()):
+        memberships_changed.send(sender=Organization, organization_id=None)
+    return drifted
@@ -0,0 +1,220 @@
+import base64
+import binascii
+from functools import partial, wraps
+import inspect
+import json
+from typing import Any, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.utils.module_loading import import_string
+from ninja import Field, Schema
+from ninja.conf import settings
+from ninja.constants import NOT_SET
+from ninja.errors import HttpError
+from ninja.pagination import PaginationBase, make_response_paginated
+from ninja.types import DictStrAny
+
+
+class CursorPagination(PaginationBase):
+    """
+    Keyset pagination over a stable ordering (by default `created_at, id`).
+    Pages are fetched with a `WHERE (created_at, id) > cursor` filter instead of
+    an OFFSET scan, so every page costs the same no matter how deep it is.
+    The total count is only computed when explicitly requested.
+
+    Enable it for every `@paginate` endpoint with:
+        NINJA_PAGINATION_CLASS = "spice_orgs.pagination.CursorPagination"
+    """
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        limit: int = Field(settings.PAGINATION_PER_PAGE, ge=1)
+        include_count: bool = False
+
+    class Output(Schema):
+        items: List[Any]
+        next: Optional[str]
+        previous: Optional[str]
+        count: Optional[int]
+
+    def __init__(self, ordering=("created_at", "id"), **kwargs: Any) -> None:
+        self.ordering = tuple(ordering)
+        super().__init__(**kwargs)
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        **params: DictStrAny,
+    ) -> Any:
+        page, position, reverse = self._page_queryset(queryset, pagination)
+        return self._page(
+            list(page),
+            position,
+            reverse,
+            pagination,
+            queryset.count() if pagination.include_count else None,
+        )
+
+    async def apaginate_queryset(
+        self,
+        queryset: QuerySet,
+        pagination: Input,
+        **params: DictStrAny,
+    ) -> Any:
+        """
+        Same as `paginate_queryset`, fetching the page with the async ORM.
+        """
+        page, position, reverse = self._page_queryset(queryset, pagination)
+        return self._page(
+            [item async for item in page],
+            position,
+            reverse,
+            pagination,
+            await queryset.acount() if pagination.include_count else None,
+        )
+
+    def _page_queryset(self, queryset: QuerySet, pagination: Input):
+        """
+        Return the (unevaluated) queryset of the requested page plus one row,
+        used to tell whether there is a next page.
+        """
+        position, reverse = self.decode_cursor(queryset, pagination.cursor)
+        page = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            page = page.filter(self._keyset_filter(position, reverse))
+        return page[: pagination.limit + 1], position, reverse
+
+    def _page(self, items: list, position, reverse: bool, pagination: Input, count):
+        limit = pagination.limit
+        has_more = len(items) > limit
+        items = items[:limit]
+        if reverse:
+            items.reverse()
+
+        next_cursor = previous_cursor = None
+        if items:
+            if has_more or reverse:
+                next_cursor = self.encode_cursor(self._position(items[-1]), False)
+            if (has_more and reverse) or (position is not None and not reverse):
+                previous_cursor = self.encode_cursor(self._position(items[0]), True)
+        return {
+            "items": items,
+            "next": next_cursor,
+            "previous": previous_cursor,
+            "count": count,
+        }
+
+    def _order_by(self, reverse: bool) -> list:
+        prefix = "-" if reverse else ""
+        return [f"{prefix}{field}" for field in self.ordering]
+
+    def _keyset_filter(self, position: list, reverse: bool) -> Q:
+        """
+        Expand `(a, b, c) > (x, y, z)` into
+        `a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)`.
+        """
+        lookup = "lt" if reverse else "gt"
+        keyset = Q()
+        for index, field in enumerate(self.ordering):
+            condition = Q(**{f"{field}__{lookup}": position[index]})
+            for previous_field, value in zip(self.ordering[:index], position):
+                condition &= Q(**{previous_field: value})
+            keyset |= condition
+        return keyset
+
+    def _position(self, item) -> list:
+        if isinstance(item, dict):
+            return [item[field] for field in self.ordering]
+        return [getattr(item, field) for field in self.ordering]
+
+    def encode_cursor(self, position: list, reverse: bool) -> str:
+        payload = json.dumps(
+            {"p": [str(value) for value in position], "r": reverse},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, queryset: QuerySet, cursor: Optional[str]):
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position = [
+                queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, payload["p"], strict=True)
+            ]
+            return position, bool(payload["r"])
+        except (
+            binascii.Error,
+            ValueError,
+            KeyError,
+            TypeError,
+            UnicodeDecodeError,
+            ValidationError,
+        ) as exception:
+            raise HttpError(400, "Invalid pagination cursor") from exception
+
+
+def apaginate(func_or_pgn_class: Any = NOT_SET, **paginator_params: DictStrAny):
+    """
+    `@paginate` for async views: the decorated coroutine returns a queryset and
+    the page is fetched without blocking the event loop. Paginators providing an
+    `apaginate_queryset` coroutine (like `CursorPagination`) use the async ORM,
+    any other paginator runs in a worker thread.
+
+        @router.get("/", response=List[Schema])
+        @apaginate
+        async def my_view(request):
+            return Model.objects.all()
+    """
+    if inspect.isfunction(func_or_pgn_class):
+        return _inject_async_pagination(
+            func_or_pgn_class, import_string(settings.PAGINATION_CLASS)
+        )
+
+    pagination_class = func_or_pgn_class
+    if func_or_pgn_class is NOT_SET:
+        pagination_class = import_string(settings.PAGINATION_CLASS)
+
+    def wrapper(func):
+        return _inject_async_pagination(func, pagination_class, **paginator_params)
+
+    return wrapper
+
+
+def _evaluated_page(paginator: PaginationBase, queryset, pagination, **params):
+    result = paginator.paginate_queryset(queryset, pagination=pagination, **params)
+    result[paginator.items_attribute] = list(result[paginator.items_attribute])
+    return result
+
+
+def _inject_async_pagination(func, paginator_class, **paginator_params):
+    paginator: PaginationBase = paginator_class(**paginator_params)
+
+    @wraps(func)
+    async def view_with_pagination(*args, **kwargs):
+        pagination_params = kwargs.pop("ninja_pagination")
+        if paginator.pass_parameter:
+            kwargs[paginator.pass_parameter] = pagination_params
+
+        items = await func(*args, **kwargs)
+
+        if hasattr(paginator, "apaginate_queryset"):
+            return await paginator.apaginate_queryset(
+                items, pagination=pagination_params, **kwargs
+            )
+        return await sync_to_async(_evaluated_page)(
+            paginator, items, pagination_params, **kwargs
+        )
+
+    view_with_pagination._ninja_contribute_args = [
+        ("ninja_pagination", paginator.Input, paginator.InputSource),
+    ]
+    if paginator.Output:
+        view_with_pagination._ninja_contribute_to_operation = partial(
+            make_response_paginated, paginator
+        )
+    return view_with_pagination
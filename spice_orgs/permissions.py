@@ -0,0 +1,489 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import F, FilteredRelation, OuterRef, Q, Subquery
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+
+from . import cache
+from .models import (
+    MEMBER_ROLE_PERMISSIONS,
+    EffectivePermission,
+    Member,
+    Organization,
+    Permission,
+    Role,
+    Team,
+    TeamMember,
+    member_permissions,
+    team_grant,
+    team_permissions,
+)
+
+UserModel = get_user_model()
+
+# attribute used to memoize resolved memberships on the request
+REQUEST_CACHE_ATTRIBUTE = "_spice_orgs_memberships"
+
+# checks answered by one authorization request
+AUTHORIZE_BATCH_LIMIT = 1000
+
+
+class Action(models.TextChoices):
+    VIEW_ORGANIZATION = "view_organization", _("View the organization")
+    MANAGE_ORGANIZATION = "manage_organization", _("Manage the organization")
+    VIEW_TEAM = "view_team", _("View the team")
+    MANAGE_TEAM = "manage_team", _("Manage the team")
+
+
+@dataclass
+class Membership:
+    """
+    The caller's relationship to an Organization and, optionally, a Team.
+    Every ownership/visibility check is answered in memory from these rows, as
+    bit tests on the permissions of their built-in and custom roles.
+    """
+
+    user: object
+    organization: Organization
+    member: Optional[Member] = None
+    team: Optional[Team] = None
+    team_member: Optional[TeamMember] = None
+    # {custom role id: permission bits} of the organization's roles
+    roles: dict = field(default_factory=dict)
+
+    @property
+    def is_superuser(self) -> bool:
+        return bool(getattr(self.user, "is_superuser", False))
+
+    @property
+    def is_member(self) -> bool:
+        return self.member is not None
+
+    @property
+    def is_owner(self) -> bool:
+        return self.is_member and self.member.role == Member.MemberRole.OWNER
+
+    @property
+    def is_team_member(self) -> bool:
+        return self.team_member is not None
+
+    @property
+    def is_team_owner(self) -> bool:
+        return (
+            self.is_team_member
+            and self.team_member.team_role == TeamMember.TeamMemberRole.OWNER
+        )
+
+    @property
+    def custom_role_ids(self) -> set:
+        role_ids = {
+            self.member.custom_role_id if self.is_member else None,
+            self.team_member.custom_role_id if self.is_team_member else None,
+        }
+        role_ids.discard(None)
+        return role_ids
+
+    @property
+    def permissions(self) -> Permission:
+        """The caller's bits in the organization."""
+        if not self.is_member:
+            return Permission(0)
+        return member_permissions(
+            self.member.role, self.roles.get(self.member.custom_role_id, 0)
+        )
+
+    @property
+    def team_permissions(self) -> Permission:
+        """The caller's bits in the team."""
+        if self.team is None:
+            return Permission(0)
+        grant = Permission(0)
+        if self.is_team_member:
+            grant = team_grant(
+                self.team_member.team_role,
+                self.roles.get(self.team_member.custom_role_id, 0),
+            )
+        return team_permissions(
+            self.permissions, grant, self.team.visible_to_organization
+        )
+
+    def has_permission(self, permission) -> bool:
+        return self.is_superuser or bool(self.permissions & permission)
+
+    @property
+    def can_view_organization(self) -> bool:
+        return (
+            bool(self.permissions & Permission.VIEW_ORGANIZATION)
+            or self.organization.publicly_visible
+        )
+
+    @property
+    def can_manage_organization(self) -> bool:
+        return self.has_permission(Permission.MANAGE_ORGANIZATION)
+
+    @property
+    def can_view_every_team(self) -> bool:
+        return self.has_permission(Permission.VIEW_TEAM)
+
+    @property
+    def can_view_team(self) -> bool:
+        return self.is_superuser or bool(self.team_permissions & Permission.VIEW_TEAM)
+
+    @property
+    def can_manage_team(self) -> bool:
+        return self.is_superuser or bool(self.team_permissions & Permission.MANAGE_TEAM)
+
+
+def granting(members, permission):
+    """
+    Filter a Member queryset to the rows whose built-in or custom role grants
+    `permission`, the bits `Membership.has_permission` tests.
+    """
+    roles = [
+        role for role, bits in MEMBER_ROLE_PERMISSIONS.items() if bits & permission
+    ]
+    return members.annotate(
+        granted=F("custom_role__permissions").bitand(int(permission))
+    ).filter(Q(role__in=roles) | Q(granted__gt=0))
+
+
+def _field_names(model) -> list:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _instance_from_row(model, row: dict, prefix: str = "", db: str = "default"):
+    """
+    Build a model instance from the prefixed columns of a `.values()` row.
+    Returns None when the row came from an unmatched LEFT JOIN.
+    """
+    field_names = _field_names(model)
+    values = [row[f"{prefix}{name}"] for name in field_names]
+    if values[field_names.index(model._meta.pk.attname)] is None:
+        return None
+    return model.from_db(db, field_names, values)
+
+
+def _user_id(user):
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _membership_query(user, organization_slug: str, team_slug=None):
+    """
+    Build the single query loading the Organization, the caller's Member row and,
+    when a team slug is given, the Team and the caller's TeamMember row.
+    Returns the queryset and the columns to read from it.
+    """
+    queryset = Organization.objects.filter(slug=organization_slug, is_active=True)
+    columns = _field_names(Organization)
+    user_id = _user_id(user)
+
+    if user_id is not None:
+        queryset = queryset.annotate(
+            caller_member=FilteredRelation("member", condition=Q(member__user=user_id))
+        )
+        columns += [f"caller_member__{name}" for name in _field_names(Member)]
+    if team_slug is not None:
+        queryset = queryset.annotate(
+            caller_team=FilteredRelation(
+                "team", condition=Q(team__slug=team_slug, team__is_active=True)
+            )
+        )
+        columns += [f"caller_team__{name}" for name in _field_names(Team)]
+        if user_id is not None:
+            team_members = TeamMember.objects.filter(
+                team=OuterRef("caller_team__id"), member=OuterRef("caller_member__id")
+            )
+            queryset = queryset.annotate(
+                caller_team_member_id=Subquery(team_members.values("id")[:1]),
+                caller_team_member_role=Subquery(team_members.values("team_role")[:1]),
+                caller_team_member_custom_role_id=Subquery(
+                    team_members.values("custom_role_id")[:1],
+                    output_field=models.UUIDField(),
+                ),
+            )
+            columns += [
+                "caller_team_member_id",
+                "caller_team_member_role",
+                "caller_team_member_custom_role_id",
+            ]
+    return queryset, columns
+
+
+def _membership_from_row(
+    user, row, organization_slug: str, team_slug, db: str
+) -> Membership:
+    if row is None:
+        raise Http404(f"Organization not found for slug: {organization_slug}")
+
+    organization = _instance_from_row(Organization, row, db=db)
+    membership = Membership(user=user, organization=organization)
+    if "caller_member__id" in row:
+        membership.member = _instance_from_row(
+            Member, row, prefix="caller_member__", db=db
+        )
+    if team_slug is not None:
+        membership.team = _instance_from_row(Team, row, prefix="caller_team__", db=db)
+        if membership.team is None:
+            raise Http404("Team does not exist for this organization")
+        if row.get("caller_team_member_id") is not None:
+            membership.team_member = TeamMember(
+                id=row["caller_team_member_id"],
+                team_role=row["caller_team_member_role"],
+                custom_role_id=row["caller_team_member_custom_role_id"],
+                organization=organization,
+                team=membership.team,
+                member=membership.member,
+            )
+            membership.team_member._state.adding = False
+            membership.team_member._state.db = db
+
+    # share the loaded rows so follow up relation access stays in memory
+    if membership.member is not None:
+        membership.member.organization = organization
+        membership.member.user = user
+    if membership.team is not None:
+        membership.team.organization = organization
+    return membership
+
+
+def _role_permissions_query(organization_id):
+    return Role.objects.filter(organization_id=organization_id).values_list(
+        "id", "permissions"
+    )
+
+
+def _resolve_membership(user, organization_slug: str, team_slug=None) -> Membership:
+    queryset, columns = _membership_query(user, organization_slug, team_slug)
+    row = cache.membership_row(
+        organization_slug,
+        _user_id(user),
+        team_slug,
+        lambda: queryset.values(*columns).first(),
+    )
+    membership = _membership_from_row(
+        user, row, organization_slug, team_slug, queryset.db
+    )
+    # only callers holding a custom role need the role rows
+    if membership.custom_role_ids:
+        organization_id = membership.organization.pk
+        membership.roles = cache.role_permissions(
+            organization_id, lambda: dict(_role_permissions_query(organization_id))
+        )
+    return membership
+
+
+async def _aresolve_membership(
+    user, organization_slug: str, team_slug=None
+) -> Membership:
+    queryset, columns = _membership_query(user, organization_slug, team_slug)
+    row = await cache.amembership_row(
+        organization_slug,
+        _user_id(user),
+        team_slug,
+        lambda: queryset.values(*columns).afirst(),
+    )
+    membership = _membership_from_row(
+        user, row, organization_slug, team_slug, queryset.db
+    )
+    if membership.custom_role_ids:
+        organization_id = membership.organization.pk
+
+        async def afetch():
+            return {
+                role_id: permissions
+                async for role_id, permissions in _role_permissions_query(
+                    organization_id
+                )
+            }
+
+        membership.roles = await cache.arole_permissions(organization_id, afetch)
+    return membership
+
+
+def get_membership(request, organization_slug: str, team_slug=None) -> Membership:
+    """
+    Resolve the caller's membership for an Organization (and optionally a Team).
+    The result is memoized on the request so repeated checks cost no queries.
+    Raises Http404 if the active Organization or Team does not exist.
+    """
+    cache = request.__dict__.setdefault(REQUEST_CACHE_ATTRIBUTE, {})
+    key = (organization_slug, team_slug)
+    if key not in cache:
+        cache[key] = _resolve_membership(
+            getattr(request, "user", None), organization_slug, team_slug
+        )
+    return cache[key]
+
+
+async def aget_user(request):
+    """
+    Resolve the lazy `request.user` set by the authentication middleware.
+    Evaluating it loads the session and the user from the database, which the
+    async views must not do from the event loop.
+    """
+    user = getattr(request, "user", None)
+    if user is not None:
+        await sync_to_async(lambda: user.is_authenticated)()
+    return user
+
+
+async def aget_membership(request, organization_slug: str, team_slug=None):
+    """
+    Async variant of `get_membership`, sharing the same per-request memo.
+    """
+    cache = request.__dict__.setdefault(REQUEST_CACHE_ATTRIBUTE, {})
+    key = (organization_slug, team_slug)
+    if key not in cache:
+        cache[key] = await _aresolve_membership(
+            await aget_user(request), organization_slug, team_slug
+        )
+    return cache[key]
+
+
+TEAM_ACTIONS = (Action.VIEW_TEAM, Action.MANAGE_TEAM)
+
+
+def _is_allowed(
+    action, user, organization, organization_bits, team=None, team_bits=0
+) -> bool:
+    """
+    The checks the views make before acting, per action, as bit tests on the
+    caller's effective permissions: the stored bits of the organization and
+    the stored grant of the team (0 when they have no row), combined with the
+    visibility of the team.
+    """
+    is_superuser = bool(getattr(user, "is_superuser", False))
+    if team is not None:
+        # grants of a deactivated team are kept but give nothing
+        team_bits = (
+            team_permissions(organization_bits, team_bits, team.visible_to_organization)
+            if team.is_active
+            else 0
+        )
+    if action == Action.VIEW_ORGANIZATION:
+        return bool(organization_bits & Permission.VIEW_ORGANIZATION) or (
+            organization.publicly_visible
+        )
+    if action == Action.MANAGE_ORGANIZATION:
+        return is_superuser or bool(organization_bits & Permission.MANAGE_ORGANIZATION)
+    if action == Action.VIEW_TEAM:
+        return bool(organization_bits & Permission.VIEW_ORGANIZATION) and (
+            is_superuser or bool(team_bits & Permission.VIEW_TEAM)
+        )
+    return is_superuser or bool(team_bits & Permission.MANAGE_TEAM)
+
+
+def _permission_rows(queryset, team_ids) -> dict:
+    """{(user_id, organization_id, team_id or None): bits}"""
+    team_rows = Q(team__isnull=True)
+    if team_ids:
+        team_rows |= Q(team_id__in=team_ids)
+    return {
+        (user_id, organization_id, team_id): permissions
+        for user_id, organization_id, team_id, permissions in queryset.filter(
+            team_rows
+        ).values_list("user_id", "organization_id", "team_id", "permissions")
+    }
+
+
+def check_access(user, organization, action, team=None) -> bool:
+    """
+    Whether `user` may do `action` in an active `organization` (and `team`),
+    from one indexed lookup of their effective permissions.
+    """
+    if action in TEAM_ACTIONS and team is None:
+        return False
+    user_id = _user_id(user)
+    rows = {}
+    if user_id is not None:
+        rows = _permission_rows(
+            EffectivePermission.objects.filter(
+                user=user_id, organization=organization.pk
+            ),
+            [team.pk] if team is not None else [],
+        )
+    return _is_allowed(
+        action,
+        user,
+        organization,
+        rows.get((user_id, organization.pk, None), 0),
+        team,
+        rows.get((user_id, organization.pk, team.pk), 0) if team is not None else 0,
+    )
+
+
+def authorize(checks) -> list:
+    """
+    Answer many (username, organization_slug, team_slug or None, action)
+    checks at once, with the rules of the views. Unknown users, organizations
+    and teams are denied. Costs at most four queries however many checks there
+    are: the users, organizations and teams involved and their effective
+    permissions. Returns a bool per check, in input order.
+    """
+    checks = list(checks)
+    usernames = {username for username, _slug, _team_slug, _action in checks}
+    users = {
+        user.get_username(): user
+        for user in UserModel.objects.filter(
+            **{f"{UserModel.USERNAME_FIELD}__in": usernames}
+        )
+    }
+    organizations = {
+        organization.slug: organization
+        for organization in Organization.objects.filter(
+            slug__in={slug for _username, slug, _team_slug, _action in checks},
+            is_active=True,
+        )
+    }
+    team_slugs = {team_slug for _username, _slug, team_slug, _action in checks}
+    team_slugs.discard(None)
+    teams = {}
+    if team_slugs and organizations:
+        teams = {
+            (team.organization_id, team.slug): team
+            for team in Team.objects.filter(
+                organization__in=organizations.values(),
+                slug__in=team_slugs,
+                is_active=True,
+            )
+        }
+    rows = {}
+    if users and organizations:
+        rows = _permission_rows(
+            EffectivePermission.objects.filter(
+                user__in=users.values(), organization__in=organizations.values()
+            ),
+            [team.pk for team in teams.values()],
+        )
+
+    results = []
+    for username, organization_slug, team_slug, action in checks:
+        user = users.get(username)
+        organization = organizations.get(organization_slug)
+        team = None
+        if organization is not None and team_slug is not None:
+            team = teams.get((organization.pk, team_slug))
+        if (
+            user is None
+            or organization is None
+            # the views answer 404 for a missing team, whatever the action
+            or (team_slug is not None and team is None)
+            or (action in TEAM_ACTIONS and team is None)
+        ):
+            results.append(False)
+            continue
+        results.append(
+            _is_allowed(
+                action,
+                user,
+                organization,
+                rows.get((user.pk, organization.pk, None), 0),
+                team,
+                rows.get((user.pk, organization.pk, team.pk), 0) if team else 0,
+            )
+        )
+    return results
@@ -0,0 +1,336 @@
+"""
+Per-operation profiling of the ninja routers: query count and time, time spent
+serializing the result and total time of every request to an instrumented
+operation. Enabled with the middleware, outermost so the total covers the rest:
+
+    MIDDLEWARE = ["spice_orgs.profiling.profiling_middleware", ...]
+
+Timings are sent back in a `Server-Timing` header and aggregated into
+histograms labeled by the URL namespace of the API, method and route template
+(as declared on the router, e.g. `/{organization_slug}/teams/`), which
+`metrics_view` exposes in the Prometheus text format to staff users and to
+scrapers sending the bearer token of:
+
+    SPICE_ORGS_METRICS_TOKEN = "..."
+
+The histograms live in the process, every worker exposes its own.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+import logging
+import threading
+import time
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class Profile:
+    """What one request spent, filled in while it runs."""
+
+    started: float
+    api: Optional[str] = None
+    route: Optional[str] = None
+    method: Optional[str] = None
+    queries: int = 0
+    db_time: float = 0.0
+    view_finished: Optional[float] = None
+    serialization_time: float = 0.0
+    total_time: float = 0.0
+
+
+# the profile of the current request, shared with the threads it queries from
+_profile = ContextVar("spice_orgs_profile", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(items) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in items)
+
+
+class Histogram:
+    """A Prometheus histogram, with one series per label set."""
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # {labels: [bucket counts, sum, count]}
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: dict, value) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list:
+        with self._lock:
+            series = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._series.items()
+            }
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total, count) in sorted(series.items()):
+            for bound, bucket_count in zip([*self.buckets, "+Inf"], [*counts, count]):
+                labels = _labels([*key, ("le", bound)])
+                lines.append(f"{self.name}_bucket{{{labels}}} {bucket_count}")
+            lines.append(f"{self.name}_sum{{{_labels(key)}}} {total}")
+            lines.append(f"{self.name}_count{{{_labels(key)}}} {count}")
+        return lines
+
+
+HISTOGRAMS = {
+    "total": Histogram(
+        "spice_orgs_request_duration_seconds",
+        "Time spent handling the request.",
+        DURATION_BUCKETS,
+    ),
+    "db": Histogram(
+        "spice_orgs_db_duration_seconds",
+        "Time spent in database queries.",
+        DURATION_BUCKETS,
+    ),
+    "serialization": Histogram(
+        "spice_orgs_serialization_duration_seconds",
+        "Time spent validating and rendering the response.",
+        DURATION_BUCKETS,
+    ),
+    "queries": Histogram(
+        "spice_orgs_db_queries",
+        "Database queries run by the request.",
+        QUERY_BUCKETS,
+    ),
+}
+
+
+def record(profile: Profile) -> None:
+    labels = {"api": profile.api, "method": profile.method, "route": profile.route}
+    HISTOGRAMS["total"].observe(labels, profile.total_time)
+    HISTOGRAMS["db"].observe(labels, profile.db_time)
+    HISTOGRAMS["serialization"].observe(labels, profile.serialization_time)
+    HISTOGRAMS["queries"].observe(labels, profile.queries)
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in HISTOGRAMS.values():
+        lines += histogram.render()
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    for histogram in HISTOGRAMS.values():
+        histogram.reset()
+
+
+def _can_read_metrics(request) -> bool:
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    token = getattr(settings, "SPICE_ORGS_METRICS_TOKEN", None)
+    return bool(token) and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+
+
+def metrics_view(request):
+    """
+    The histograms in the Prometheus text format, for staff users and for the
+    scraper sending `SPICE_ORGS_METRICS_TOKEN`.
+    """
+    if not _can_read_metrics(request):
+        return HttpResponseForbidden("Only staff users can read the metrics")
+    return HttpResponse(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+def server_timing(profile: Profile) -> str:
+    return ", ".join(
+        [
+            f'db;dur={profile.db_time * 1000:.3f};desc="{profile.queries} queries"',
+            f"serialize;dur={profile.serialization_time * 1000:.3f}",
+            f"total;dur={profile.total_time * 1000:.3f}",
+        ]
+    )
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.db_time += time.perf_counter() - started
+
+
+def _install_query_wrapper(connection, **kwargs) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed_view(view):
+    """Note when the view returned, what follows is serialization."""
+
+    def finish():
+        profile = _profile.get()
+        if profile is not None:
+            profile.view_finished = time.perf_counter()
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_timed_view(*args, **kwargs):
+            try:
+                return await view(*args, **kwargs)
+            finally:
+                finish()
+
+        return async_timed_view
+
+    @wraps(view)
+    def timed_view(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        finally:
+            finish()
+
+    return timed_view
+
+
+def _start_operation(request, route):
+    profile = _profile.get()
+    if profile is not None:
+        # the sync and async APIs mount the same routes, under their namespace
+        profile.api = request.resolver_match.namespace
+        profile.route = route
+        profile.method = request.method
+    return profile
+
+
+def _finish_operation(profile) -> None:
+    if profile is not None and profile.view_finished is not None:
+        profile.serialization_time = time.perf_counter() - profile.view_finished
+
+
+def _profiled_run(run, route):
+    if iscoroutinefunction(run):
+
+        @wraps(run)
+        async def async_profiled_run(request, **kwargs):
+            profile = _start_operation(request, route)
+            response = await run(request, **kwargs)
+            _finish_operation(profile)
+            return response
+
+        return async_profiled_run
+
+    @wraps(run)
+    def profiled_run(request, **kwargs):
+        profile = _start_operation(request, route)
+        response = run(request, **kwargs)
+        _finish_operation(profile)
+        return response
+
+    return profiled_run
+
+
+def instrument(router) -> None:
+    """
+    Profile every operation of a ninja `router`, labeled by its path and the
+    namespace of the API it is mounted on.
+    """
+    for route, path_view in router.path_operations.items():
+        for operation in path_view.operations:
+            operation.view_func = _timed_view(operation.view_func)
+            operation.run = _profiled_run(operation.run, route)
+
+
+def _begin():
+    profile = Profile(started=time.perf_counter())
+    return profile, _profile.set(profile)
+
+
+def _end(profile, token, response):
+    _profile.reset(token)
+    profile.total_time = time.perf_counter() - profile.started
+    if profile.route is None:
+        # not an instrumented operation
+        return response
+    response.headers["Server-Timing"] = server_timing(profile)
+    record(profile)
+    logger.debug(
+        "%s %s:%s: %s",
+        profile.method,
+        profile.api,
+        profile.route,
+        server_timing(profile),
+    )
+    return response
+
+
+@sync_and_async_middleware
+def profiling_middleware(get_response):
+    """Profile the requests to instrumented operations."""
+    connection_created.connect(
+        _install_query_wrapper, dispatch_uid="spice_orgs_profiling"
+    )
+    # connections opened before the signal was connected
+    for connection in connections.all():
+        _install_query_wrapper(connection)
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            profile, token = _begin()
+            try:
+                response = await get_response(request)
+            except BaseException:
+                _profile.reset(token)
+                raise
+            return _end(profile, token, response)
+
+    else:
+
+        def middleware(request):
+            profile, token = _begin()
+            try:
+                response = get_response(request)
+            except BaseException:
+                _profile.reset(token)
+                raise
+            return _end(profile, token, response)
+
+    return middleware
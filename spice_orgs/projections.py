@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from pydantic import BaseModel
+
+# columns the keyset pagination reads from every item
+PAGINATION_FIELDS = ("created_at",)
+
+# how `project()` reads the rows of a schema, set by rendering.py:
+# (schema, the schema actually rendered, whether to read `.values()` dicts)
+_projection = ContextVar("spice_orgs_projection", default=None)
+
+
+def schema_fields(schema, prefix: str = "") -> tuple:
+    """
+    Walk a (possibly nested) schema and return the ORM paths of its columns and
+    of the relations it embeds, e.g. for MemberSchema:
+        (["role", "user__username", ...], ["user"])
+    """
+    fields, relations = [], []
+    for name, field in schema.__fields__.items():
+        path = f"{prefix}{field.alias or name}"
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+            relations.append(path)
+            nested_fields, nested_relations = schema_fields(
+                field.type_, prefix=f"{path}__"
+            )
+            fields += nested_fields
+            relations += nested_relations
+        else:
+            fields.append(path)
+    return fields, relations
+
+
+def project(queryset, schema, extra_fields=PAGINATION_FIELDS):
+    """
+    Restrict a queryset to exactly the columns `schema` renders, joining the
+    nested relations up front so serializing a page never issues more queries.
+    """
+    values = False
+    projection = _projection.get()
+    if projection is not None and projection[0] is schema:
+        # only the requested fields, e.g. of a sparse fieldset
+        _schema, schema, values = projection
+    fields, relations = schema_fields(schema)
+    if values:
+        # plain dicts, the nested columns are read through joins
+        return queryset.values(*fields, *extra_fields, queryset.model._meta.pk.attname)
+    # querysets from a related manager (e.g. team.teammember_set) attach the
+    # parent instance to every row, which reads the foreign key column
+    known_related = [field.name for field in queryset._known_related_objects]
+    if relations:
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*fields, *relations, *known_related, *extra_fields)
+
+
+@contextmanager
+def projecting(schema, rendered, values=False):
+    """
+    Make `project()` read the columns of `rendered` (a subset of `schema`)
+    instead of those of `schema` in the block, as dicts if `values`.
+    """
+    token = _projection.set((schema, rendered, values))
+    try:
+        yield
+    finally:
+        _projection.reset(token)
@@ -0,0 +1,270 @@
+"""
+Rendering of the list and detail views decorated with `@render_schema(Schema)`.
+
+Sparse fieldsets: `?fields=name,slug` renders only the listed fields of the
+schema. Dotted paths pick the fields of a nested schema
+(`?fields=team_role,member.user.username`), a nested schema named alone keeps
+all of its fields. `?expand=created_by` also embeds one of the relations of
+`schema.EXPANSIONS`, which are not rendered by default. `project()` reads only
+the columns of what is rendered and joins only the relations it embeds, so a
+smaller response also makes a smaller query.
+
+Fast rendering, enabled with:
+
+    SPICE_ORGS_FAST_RENDER = True
+
+The list pages are read with `.values()` on exactly the columns rendered
+(nested schemas through joins) and the rows are encoded straight into the
+response, instead of loading model instances, validating them into `Schema`
+objects and turning those back into dicts. The rows are nested and ordered
+like the schema's fields and encoded like ninja's default `JSONRenderer`, so
+the response is byte for byte the same. Only use it on views whose rows need
+no conversion by the schema: the plain columns of a `ModelSchema` are
+returned as is.
+"""
+from functools import lru_cache, wraps
+import inspect
+import json
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Model
+from django.http import HttpResponse
+from ninja import Query, Schema
+from ninja.errors import HttpError
+from ninja.responses import NinjaJSONEncoder
+from pydantic import BaseModel, create_model
+from pydantic.fields import SHAPE_SINGLETON
+
+from .projections import projecting
+from .schema import EXPANSIONS
+
+# sparse schemas kept around, one per distinct fields/expand combination
+SPARSE_SCHEMA_CACHE_SIZE = 256
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "SPICE_ORGS_FAST_RENDER", False))
+
+
+def _is_nested(field) -> bool:
+    return (
+        field.shape == SHAPE_SINGLETON
+        and isinstance(field.type_, type)
+        and issubclass(field.type_, BaseModel)
+    )
+
+
+def _paths(value: Optional[str]) -> tuple:
+    """`"b, a.c"` -> `("a.c", "b")`, sorted so the cache sees one key."""
+    return tuple(sorted({path.strip() for path in (value or "").split(",")} - {""}))
+
+
+def _tree(paths) -> dict:
+    """`("a.b", "a.c", "d")` -> `{"a": {"b": {}, "c": {}}, "d": {}}`"""
+    tree = {}
+    for path in paths:
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _subset(schema, fields: Optional[dict], expand: dict, prefix=""):
+    """
+    A schema rendering the `fields` of `schema` (all of them if None) plus its
+    `expand`ed relations. Raises a 400 naming an unknown field.
+    """
+    expansions = EXPANSIONS.get(schema, {})
+    for name, nested_expand in expand.items():
+        # `a.b` expands `b` of the nested schema `a`
+        field = schema.__fields__.get(name)
+        if name not in expansions and not (
+            nested_expand and field is not None and _is_nested(field)
+        ):
+            raise HttpError(400, f"Cannot expand: {prefix}{name}")
+    for name in fields or {}:
+        if name not in schema.__fields__ and name not in expand:
+            raise HttpError(400, f"Unknown field: {prefix}{name}")
+
+    definitions = {}
+    candidates = [
+        *schema.__fields__.items(),
+        *((name, None) for name in expansions if name in expand),
+    ]
+    for name, field in candidates:
+        if fields is not None and name not in fields and name not in expand:
+            continue
+        # {} (the field named alone) renders all of a nested schema
+        nested_fields = (fields or {}).get(name) or None
+        nested_expand = expand.get(name, {})
+        if field is None:
+            definitions[name] = (
+                _subset(
+                    expansions[name], nested_fields, nested_expand, f"{prefix}{name}."
+                ),
+                ...,
+            )
+            continue
+        field_type = field.outer_type_
+        if _is_nested(field):
+            if nested_fields is not None or nested_expand:
+                field_type = _subset(
+                    field.type_, nested_fields, nested_expand, f"{prefix}{name}."
+                )
+        elif nested_fields is not None:
+            raise HttpError(400, f"Not a nested field: {prefix}{name}")
+        if field.allow_none:
+            field_type = Optional[field_type]
+        definitions[name] = (field_type, field.field_info)
+    return create_model(f"{schema.__name__}Fields", __base__=Schema, **definitions)
+
+
+@lru_cache(maxsize=SPARSE_SCHEMA_CACHE_SIZE)
+def sparse_schema(schema, fields=(), expand=()):
+    """
+    The schema rendering the `fields` (dotted paths) and `expand`ed relations
+    of `schema`, or `schema` itself when both are empty.
+    """
+    if not fields and not expand:
+        return schema
+    return _subset(schema, _tree(fields) if fields else None, _tree(expand))
+
+
+@lru_cache(maxsize=SPARSE_SCHEMA_CACHE_SIZE)
+def _layout(schema, prefix="") -> list:
+    """
+    [(key, ORM path or nested layout)] of a schema, in the order it renders,
+    e.g. for MemberSchema:
+        [("role", "role"), ("user", [("username", "user__username"), ...])]
+    """
+    layout = []
+    for name, field in schema.__fields__.items():
+        path = f"{prefix}{field.alias or name}"
+        if _is_nested(field):
+            layout.append((name, _layout(field.type_, prefix=f"{path}__")))
+        else:
+            layout.append((name, path))
+    return layout
+
+
+def _nest(row: dict, layout: list) -> dict:
+    return {
+        key: row[path] if isinstance(path, str) else _nest(row, path)
+        for key, path in layout
+    }
+
+
+def _item(row, schema) -> dict:
+    if isinstance(row, dict):
+        # a `.values()` row
+        return _nest(row, _layout(schema))
+    return schema.from_orm(row).dict()
+
+
+def render_page(page: dict, schema) -> bytes:
+    """Encode a page of rows (instances or `.values()` dicts) like ninja does."""
+    items = [_item(row, schema) for row in page["items"]]
+    return json.dumps({**page, "items": items}, cls=NinjaJSONEncoder).encode()
+
+
+def _render(result, schema, response):
+    if isinstance(result, dict) and "items" in result:
+        response.content = render_page(result, schema)
+    elif isinstance(result, Model):
+        # the row of a detail view
+        response.content = json.dumps(_item(result, schema), cls=NinjaJSONEncoder)
+    else:
+        # 304s, errors and the like go through ninja as usual
+        return result
+    return response
+
+
+def render_schema(schema):
+    """
+    Render what the view returns (a page of `project(queryset, schema)` rows or
+    a row of a detail view) with the fields requested by `?fields=` and
+    `?expand=`, and from `.values()` rows when SPICE_ORGS_FAST_RENDER is on.
+    Put it above `@conditional` and `@paginate`:
+
+        @router.get("/", response=List[Schema])
+        @read_from_replica
+        @render_schema(Schema)
+        @conditional
+        @paginate
+        def my_view(request):
+            return project(Model.objects.all(), Schema)
+    """
+
+    def decorator(view):
+        signature = inspect.signature(view)
+        # ninja passes its temporal response (with the ETag of `@conditional`)
+        passes_response = "response" in signature.parameters
+        parameters = [
+            *signature.parameters.values(),
+            inspect.Parameter(
+                "fields",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Query(None, description="Comma separated fields to render"),
+                annotation=Optional[str],
+            ),
+            inspect.Parameter(
+                "expand",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Query(None, description="Comma separated relations to embed"),
+                annotation=Optional[str],
+            ),
+        ]
+        if not passes_response:
+            parameters.append(
+                inspect.Parameter(
+                    "response", inspect.Parameter.KEYWORD_ONLY, annotation=HttpResponse
+                )
+            )
+
+        def prepare(kwargs, response, fields, expand):
+            if passes_response:
+                kwargs["response"] = response
+            rendered = sparse_schema(schema, _paths(fields), _paths(expand))
+            if rendered is schema and not is_enabled():
+                # ninja renders the full schema
+                return None
+            return rendered
+
+        if inspect.iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_view_with_schema(
+                request, *args, response, fields=None, expand=None, **kwargs
+            ):
+                rendered = prepare(kwargs, response, fields, expand)
+                if rendered is None:
+                    return await view(request, *args, **kwargs)
+                with projecting(schema, rendered, values=is_enabled()):
+                    result = await view(request, *args, **kwargs)
+                if isinstance(result, Model):
+                    # the row of a detail view loads the relations it expands
+                    return await sync_to_async(_render)(result, rendered, response)
+                return _render(result, rendered, response)
+
+            wrapper = async_view_with_schema
+        else:
+
+            @wraps(view)
+            def view_with_schema(
+                request, *args, response, fields=None, expand=None, **kwargs
+            ):
+                rendered = prepare(kwargs, response, fields, expand)
+                if rendered is None:
+                    return view(request, *args, **kwargs)
+                with projecting(schema, rendered, values=is_enabled()):
+                    result = view(request, *args, **kwargs)
+                return _render(result, rendered, response)
+
+            wrapper = view_with_schema
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
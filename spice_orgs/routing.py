@@ -0,0 +1,176 @@
+"""
+Read replica routing for the read-heavy endpoints. Enabled with:
+
+    SPICE_ORGS_REPLICAS = {"ALIASES": ["replica"], "PIN_SECONDS": 5}
+    DATABASE_ROUTERS = ["spice_orgs.routing.ReplicaRouter"]
+    MIDDLEWARE = [..., "spice_orgs.routing.pin_after_write_middleware"]
+
+Safe (GET/HEAD) requests to views decorated with `@read_from_replica` read
+from one of the replica aliases, everything else reads and writes the primary.
+A request with an unsafe method sets a short lived cookie pinning its client
+to the primary for `PIN_SECONDS`, so a client always reads its own writes.
+Replicas are expected to be kept in sync by the database, never migrate them.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import inspect
+import random
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import QuerySet
+from django.utils.decorators import sync_and_async_middleware
+
+SAFE_METHODS = ("GET", "HEAD")
+PIN_COOKIE = "spice_orgs_primary"
+DEFAULT_PIN_SECONDS = 5
+
+# the replica alias reads of the current request go to, None for the primary
+_replica = ContextVar("spice_orgs_replica", default=None)
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "SPICE_ORGS_REPLICAS", None))
+
+
+def _primary() -> str:
+    return settings.SPICE_ORGS_REPLICAS.get("PRIMARY", DEFAULT_DB_ALIAS)
+
+
+def _replicas() -> list:
+    return [
+        alias
+        for alias in settings.SPICE_ORGS_REPLICAS.get("ALIASES", [])
+        if alias in settings.DATABASES
+    ]
+
+
+def _pin_seconds() -> int:
+    return settings.SPICE_ORGS_REPLICAS.get("PIN_SECONDS", DEFAULT_PIN_SECONDS)
+
+
+def is_pinned(request) -> bool:
+    return PIN_COOKIE in request.COOKIES
+
+
+def replica_for(request):
+    """The replica alias `request` may read from, or None for the primary."""
+    if not is_enabled() or request.method not in SAFE_METHODS or is_pinned(request):
+        return None
+    replicas = _replicas()
+    return random.choice(replicas) if replicas else None
+
+
+def is_reading_replica() -> bool:
+    return _replica.get() is not None
+
+
+@contextmanager
+def reading_from(alias):
+    """Route the reads made in the block to `alias` (None: the primary)."""
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def _bind(result, alias):
+    # querysets returned unevaluated are read by the serializer, outside the block
+    if alias is not None and isinstance(result, QuerySet):
+        return result.using(alias)
+    return result
+
+
+def _load_user(request) -> None:
+    # the session and the user are read from the primary, before switching
+    user = getattr(request, "user", None)
+    if user is not None:
+        user.is_authenticated
+
+
+def read_from_replica(view):
+    """
+    Serve safe requests of a view from a replica. Put it right under the router
+    decorator, above `@conditional` and `@paginate`, so the validators and the
+    page are read from the replica too:
+
+        @router.get("/", response=List[Schema])
+        @read_from_replica
+        @conditional
+        @paginate
+        def my_view(request):
+            ...
+    """
+    if inspect.iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_view_on_replica(request, *args, **kwargs):
+            alias = replica_for(request)
+            if alias is not None:
+                await sync_to_async(_load_user)(request)
+            with reading_from(alias):
+                return _bind(await view(request, *args, **kwargs), alias)
+
+        return async_view_on_replica
+
+    @wraps(view)
+    def view_on_replica(request, *args, **kwargs):
+        alias = replica_for(request)
+        if alias is not None:
+            _load_user(request)
+        with reading_from(alias):
+            return _bind(view(request, *args, **kwargs), alias)
+
+    return view_on_replica
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of `@read_from_replica` views to their replica, and every
+    write (even of a row read from a replica) to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return _primary() if is_enabled() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_enabled():
+            return None
+        aliases = {_primary(), *_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def _pin(request, response):
+    if (
+        is_enabled()
+        and request.method not in SAFE_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            PIN_COOKIE, "1", max_age=_pin_seconds(), httponly=True, samesite="Lax"
+        )
+    return response
+
+
+@sync_and_async_middleware
+def pin_after_write_middleware(get_response):
+    """Pin clients to the primary for a few seconds after they write."""
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            return _pin(request, await get_response(request))
+
+    else:
+
+        def middleware(request):
+            return _pin(request, get_response(request))
+
+    return middleware
@@ -1,7 +1,17 @@
-from django.contrib.auth import get_user_model
-from ninja import ModelSchema, Schema
+from typing import List, Optional
 
-from .models import Member, Organization, Team, TeamMember
+from django.contrib.auth import get_user_model
+from ninja import Field, ModelSchema, Schema
+
+from .models import (
+    ChangeLogEntry,
+    Member,
+    Organization,
+    OrganizationDeletion,
+    Team,
+    TeamMember,
+)
+from .permissions import AUTHORIZE_BATCH_LIMIT, Action
 
 UserModel = get_user_model()
 
@@ -17,6 +27,16 @@ class UserSchema(ModelSchema):
         ]
 
 
+class PublicUserSchema(ModelSchema):
+    class Config:
+        model = UserModel
+        model_fields = [
+            "username",
+            "first_name",
+            "last_name",
+        ]
+
+
 class OrganizationSchema(ModelSchema):
     class Config:
         model = Organization
@@ -24,6 +44,22 @@ class OrganizationSchema(ModelSchema):
             "name",
             "slug",
             "publicly_visible",
+            "member_count",
+        ]
+
+
+class OrganizationDeletionSchema(ModelSchema):
+    class Config:
+        model = OrganizationDeletion
+        model_fields = [
+            "id",
+            "organization_slug",
+            "status",
+            "total_rows",
+            "deleted_rows",
+            "created_at",
+            "started_at",
+            "finished_at",
         ]
 
 
@@ -41,6 +77,16 @@ class AddMemberSchema(Schema):
     role: str = "MEMBER"
 
 
+class BulkAddMembersSchema(Schema):
+    members: List[AddMemberSchema]
+
+
+class BulkMemberResultSchema(Schema):
+    username: str
+    role: Optional[str]
+    status: str
+
+
 class MemberSchema(ModelSchema):
     user: UserSchema
 
@@ -52,7 +98,16 @@ class MemberSchema(ModelSchema):
 class TeamSchema(ModelSchema):
     class Config:
         model = Team
-        model_fields = ["name", "slug", "visible_to_organization"]
+        model_fields = ["name", "slug", "visible_to_organization", "member_count"]
+
+
+# relations `?expand=` embeds next to the fields of a schema, see rendering.py.
+# Anyone who can see an organization can expand it, so users are embedded
+# without their email.
+EXPANSIONS = {
+    OrganizationSchema: {"created_by": PublicUserSchema},
+    TeamSchema: {"created_by": PublicUserSchema},
+}
 
 
 class CreateUpdateTeamSchema(ModelSchema):
@@ -80,7 +135,93 @@ class AddTeamMemberSchema(Schema):
     role: str = "MEMBER"
 
 
+class BulkAddTeamMembersSchema(Schema):
+    members: List[AddTeamMemberSchema]
+
+
+class BulkRemoveTeamMembersSchema(Schema):
+    usernames: List[str]
+
+
+class BulkUpdateTeamMembersSchema(Schema):
+    usernames: List[str]
+    team_role: str
+
+
 class UpdateTeamMemberSchema(ModelSchema):
     class Config:
         model = TeamMember
         model_fields = ["team_role"]
+
+
+class ChangeSchema(ModelSchema):
+    class Config:
+        model = ChangeLogEntry
+        model_fields = [
+            "id",
+            "created_at",
+            "object_type",
+            "object_id",
+            "organization_id",
+            "action",
+            "data",
+        ]
+
+
+class ChangeFeedSchema(Schema):
+    items: List[ChangeSchema]
+    cursor: int
+    has_more: bool
+
+
+class SearchTeamSchema(ModelSchema):
+    organization_slug: str = Field(..., alias="organization.slug")
+
+    class Config:
+        model = Team
+        model_fields = ["name", "slug", "visible_to_organization", "member_count"]
+
+
+class SearchMemberSchema(ModelSchema):
+    organization_slug: str = Field(..., alias="organization.slug")
+    user: UserSchema
+
+    class Config:
+        model = Member
+        model_fields = ["role"]
+
+
+class SearchResultsSchema(Schema):
+    organizations: List[OrganizationSchema]
+    teams: List[SearchTeamSchema]
+    members: List[SearchMemberSchema]
+
+
+class MyTeamMembershipSchema(Schema):
+    name: str = Field(..., alias="team.name")
+    slug: str = Field(..., alias="team.slug")
+    team_role: str
+
+
+class MyMembershipSchema(ModelSchema):
+    organization: OrganizationSchema
+    teams: List[MyTeamMembershipSchema]
+
+    class Config:
+        model = Member
+        model_fields = ["role"]
+
+
+class AuthorizationCheckSchema(Schema):
+    user: str
+    organization_slug: str
+    team_slug: Optional[str] = None
+    action: Action
+
+
+class AuthorizationRequestSchema(Schema):
+    checks: List[AuthorizationCheckSchema] = Field(..., max_items=AUTHORIZE_BATCH_LIMIT)
+
+
+class AuthorizationResultSchema(AuthorizationCheckSchema):
+    allowed: bool
@@ -0,0 +1,179 @@
+"""
+Indexed prefix search over organization and team names and member usernames
+and emails. Every word of the query must match the start of a word of the row.
+
+The indexes are created by migration 0006: SQLite gets FTS5 tables kept in
+sync by triggers, PostgreSQL gets GIN indexes over `to_tsvector('simple', ...)`
+of the searched columns. Other databases fall back to unindexed `icontains`.
+After a SQLite VACUUM (which may renumber rowids) run `rebuild_search_index`.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Member, Organization, Permission, Team, TeamMember
+from .permissions import granting
+
+UserModel = get_user_model()
+
+SEARCH_LIMIT = 20
+# longer queries are cut, every word costs a posting list lookup
+MAX_SEARCH_TERMS = 8
+
+
+def search_terms(query: str) -> list:
+    return re.findall(r"\w+", query.lower())[:MAX_SEARCH_TERMS]
+
+
+def _user_columns() -> list:
+    columns = [UserModel.USERNAME_FIELD]
+    email = UserModel.get_email_field_name()
+    if email in {field.name for field in UserModel._meta.concrete_fields}:
+        columns.append(email)
+    return columns
+
+
+def search_indexes() -> dict:
+    """{name: (model, searched fields)}"""
+    return {
+        "organization": (Organization, ["name"]),
+        "team": (Team, ["name"]),
+        "user": (UserModel, _user_columns()),
+    }
+
+
+def _fts_table(name: str) -> str:
+    return f"spice_orgs_{name}_search"
+
+
+def _columns(model, fields) -> list:
+    return [model._meta.get_field(field).column for field in fields]
+
+
+def _document(connection, model, fields) -> str:
+    """
+    The tsvector queries match, the expression migration 0006 indexes: keep
+    the two the same or the index is not used.
+    """
+    quote = connection.ops.quote_name
+    columns = " || ' ' || ".join(
+        f"coalesce({quote(column)}, '')" for column in _columns(model, fields)
+    )
+    return f"to_tsvector('simple', {columns})"
+
+
+def rebuild_search_indexes(using="default") -> None:
+    """Re-index every row, e.g. after a SQLite VACUUM."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name in search_indexes():
+            fts = connection.ops.quote_name(_fts_table(name))
+            cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def matching(queryset, name, terms):
+    """Filter `queryset` of the `name` index to the rows matching every term."""
+    if not terms:
+        return queryset.none()
+    model, fields = search_indexes()[name]
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    if connection.vendor == "sqlite":
+        fts = quote(_fts_table(name))
+        # terms are \w+ runs, quoting them keeps FTS5 operators out
+        sql = (
+            f"SELECT {pk} FROM {table} WHERE rowid IN"
+            f" (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)"
+        )
+        match = " ".join(f'"{term}"*' for term in terms)
+    elif connection.vendor == "postgresql":
+        document = _document(connection, model, fields)
+        sql = f"SELECT {pk} FROM {table} WHERE {document} @@ to_tsquery('simple', %s)"
+        match = " & ".join(f"{term}:*" for term in terms)
+    else:
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in fields:
+                term_condition |= Q(**{f"{field}__icontains": term})
+            condition &= term_condition
+        return queryset.filter(condition)
+    return queryset.filter(pk__in=RawSQL(sql, [match]))
+
+
+def _user_id(user):
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def search_organizations(user, terms, limit=SEARCH_LIMIT):
+    """Visible as in `list_organizations`: public ones and the caller's own."""
+    organizations = Organization.objects.filter(is_active=True)
+    user_id = _user_id(user)
+    if user_id is None:
+        organizations = organizations.filter(publicly_visible=True)
+    else:
+        organizations = organizations.filter(
+            Q(publicly_visible=True)
+            | Exists(Member.objects.filter(organization=OuterRef("pk"), user=user_id))
+        )
+    return matching(organizations, "organization", terms).order_by("name", "pk")[:limit]
+
+
+def search_teams(user, terms, limit=SEARCH_LIMIT):
+    """
+    Visible as in `list_teams`: only to members of the organization, those
+    whose role grants VIEW_TEAM (and superusers) see every team, the others the
+    teams visible to the organization and their own.
+    """
+    user_id = _user_id(user)
+    if user_id is None:
+        return Team.objects.none()
+    caller = Member.objects.filter(
+        organization=OuterRef("organization_id"), user=user_id
+    )
+    manager = granting(caller, Permission.VIEW_TEAM)
+    if getattr(user, "is_superuser", False):
+        manager = caller
+    teams = Team.objects.filter(
+        Exists(caller),
+        Q(Exists(manager))
+        | Q(visible_to_organization=True)
+        | Exists(TeamMember.objects.filter(team=OuterRef("pk"), member__user=user_id)),
+        is_active=True,
+        organization__is_active=True,
+    ).select_related("organization")
+    return matching(teams, "team", terms).order_by("name", "pk")[:limit]
+
+
+def search_members(user, terms, limit=SEARCH_LIMIT):
+    """
+    Visible as in `list_organization_members`: members of the organizations
+    the caller can see; those whose role grants MANAGE_ORGANIZATION see every
+    member, the others the public ones.
+    """
+    user_id = _user_id(user)
+    members = Member.objects.filter(
+        organization__is_active=True,
+        user_id__in=matching(UserModel.objects.all(), "user", terms).values("pk"),
+    ).select_related("user", "organization")
+    if user_id is None:
+        return members.filter(
+            organization__publicly_visible=True, publicly_visible=True
+        ).order_by("user__username", "pk")[:limit]
+    caller = Member.objects.filter(
+        organization=OuterRef("organization_id"), user=user_id
+    )
+    manager = granting(caller, Permission.MANAGE_ORGANIZATION)
+    if getattr(user, "is_superuser", False):
+        manager = caller
+    return members.filter(
+        Q(organization__publicly_visible=True) | Exists(caller),
+        Q(publicly_visible=True) | Exists(manager),
+    ).order_by("user__username", "pk")[:limit]
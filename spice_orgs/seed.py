@@ -0,0 +1,187 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import (
+    Member,
+    Organization,
+    Team,
+    TeamMember,
+    batched,
+    rebuild_effective_permissions,
+)
+
+UserModel = get_user_model()
+
+
+def _organization_sizes(
+    random_state, organizations, members, whales, whale_members, users
+):
+    """
+    Member counts per organization: a long tail around `members` (exponential
+    distribution) plus a few whales with `whale_members` members each.
+    """
+    sizes = [
+        max(1, min(users, int(random_state.expovariate(1 / members))))
+        for _index in range(organizations)
+    ]
+    for index in range(min(whales, organizations)):
+        sizes[index] = min(users, whale_members)
+    return sizes
+
+
+def seed_dataset(
+    organizations=1000,
+    users=10000,
+    members=20,
+    whales=2,
+    whale_members=5000,
+    teams=5,
+    whale_teams=50,
+    team_members=5,
+    prefix="seed",
+    seed=0,
+    batch_size=5000,
+    log=None,
+) -> dict:
+    """
+    Generate a large, skewed dataset for benchmarks using bulk inserts.
+    Organization sizes follow a long tail around `members` with `whales` very
+    large organizations, which also get `whale_teams` teams each.
+    The denormalized counters are written directly, no per-row save() runs,
+    the effective permissions are computed once at the end.
+    Returns the number of rows created per model.
+    """
+    random_state = random.Random(seed)
+    log = log or (lambda message: None)
+    created = dict.fromkeys(
+        ["users", "organizations", "members", "teams", "team_members"], 0
+    )
+
+    log(f"Creating {users} users")
+    for batch in batched(range(users), batch_size):
+        UserModel.objects.bulk_create(
+            [
+                UserModel(
+                    username=f"{prefix}_user_{index}",
+                    email=f"{prefix}_user_{index}@example.com",
+                    first_name="Seed",
+                    last_name=f"User {index}",
+                )
+                for index in batch
+            ]
+        )
+    user_ids = list(
+        UserModel.objects.filter(username__startswith=f"{prefix}_user_")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    created["users"] = users
+
+    sizes = _organization_sizes(
+        random_state, organizations, members, whales, whale_members, len(user_ids)
+    )
+    for batch in batched(list(enumerate(sizes)), max(1, batch_size // 100)):
+        with transaction.atomic():
+            created_organizations = Organization.objects.bulk_create(
+                [
+                    Organization(
+                        name=f"{prefix} Organization {index}",
+                        slug=f"{prefix}-organization-{index}",
+                        created_by_id=user_ids[index % len(user_ids)],
+                        publicly_visible=random_state.random() < 0.7,
+                        member_count=size,
+                        owner_count=1,
+                    )
+                    for index, size in batch
+                ]
+            )
+            members_created, teams_created, team_members_created = _seed_members(
+                random_state,
+                created_organizations,
+                [
+                    (size, whale_teams if index < whales else teams)
+                    for index, size in batch
+                ],
+                user_ids,
+                team_members,
+                batch_size,
+            )
+        created["organizations"] += len(created_organizations)
+        created["members"] += members_created
+        created["teams"] += teams_created
+        created["team_members"] += team_members_created
+        log(f"Created {created['organizations']}/{organizations} organizations")
+    log("Computing effective permissions")
+    rebuild_effective_permissions()
+    return created
+
+
+def _seed_members(
+    random_state, organizations, shapes, user_ids, team_members, batch_size
+):
+    """
+    Insert the members, teams and team members of freshly created organizations.
+    `shapes` holds the (member count, team count) of each organization.
+    """
+    members_created = teams_created = team_members_created = 0
+    for organization, (size, team_count) in zip(organizations, shapes):
+        owner_id = organization.created_by_id
+        member_user_ids = [owner_id] + [
+            user_id
+            for user_id in random_state.sample(user_ids, min(size, len(user_ids)))
+            if user_id != owner_id
+        ][: size - 1]
+        organization_members = []
+        for batch in batched(member_user_ids, batch_size):
+            organization_members += Member.objects.bulk_create(
+                [
+                    Member(
+                        organization=organization,
+                        user_id=user_id,
+                        role=Member.MemberRole.OWNER
+                        if user_id == owner_id
+                        else Member.MemberRole.MEMBER,
+                        publicly_visible=random_state.random() < 0.5,
+                    )
+                    for user_id in batch
+                ]
+            )
+        members_created += len(organization_members)
+
+        team_size = min(team_members, len(organization_members))
+        organization_teams = Team.objects.bulk_create(
+            [
+                Team(
+                    name=f"Team {index}",
+                    slug=f"team-{index}",
+                    organization=organization,
+                    created_by_id=owner_id,
+                    visible_to_organization=random_state.random() < 0.5,
+                    member_count=team_size,
+                    owner_count=1,
+                )
+                for index in range(team_count)
+            ]
+        )
+        teams_created += len(organization_teams)
+        rows = []
+        for team in organization_teams:
+            team_member_rows = organization_members[:1] + random_state.sample(
+                organization_members[1:], team_size - 1
+            )
+            rows += [
+                TeamMember(
+                    organization=organization,
+                    team=team,
+                    member=member,
+                    team_role=TeamMember.TeamMemberRole.OWNER
+                    if index == 0
+                    else TeamMember.TeamMemberRole.MEMBER,
+                )
+                for index, member in enumerate(team_member_rows)
+            ]
+        TeamMember.objects.bulk_create(rows, batch_size=batch_size)
+        team_members_created += len(rows)
+    return members_created, teams_created, team_members_created
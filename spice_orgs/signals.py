@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import cache
+
+# Sent by writes that bypass post_save/post_delete (queryset updates, bulk
+# inserts) with the `organization_id` they touched, or None for every one.
+memberships_changed = Signal()
+
+
+@receiver(post_save, sender="spice_orgs.Organization")
+@receiver(post_delete, sender="spice_orgs.Organization")
+def invalidate_organization(sender, instance, **kwargs):
+    # a renamed organization is no longer found under the slug it was loaded with
+    slugs = {instance.slug, getattr(instance, "_loaded_slug", None)} - {None}
+    cache.invalidate(instance.pk, slugs=sorted(slugs))
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_save, sender="spice_orgs.Member")
+@receiver(post_delete, sender="spice_orgs.Member")
+@receiver(post_save, sender="spice_orgs.Team")
+@receiver(post_delete, sender="spice_orgs.Team")
+@receiver(post_save, sender="spice_orgs.TeamMember")
+@receiver(post_delete, sender="spice_orgs.TeamMember")
+@receiver(post_save, sender="spice_orgs.Role")
+@receiver(post_delete, sender="spice_orgs.Role")
+def invalidate_membership(sender, instance, **kwargs):
+    cache.invalidate(instance.organization_id)
+
+
+# the fields the effective permissions of a membership are computed from
+PERMISSION_FIELDS = {"role", "custom_role", "team_role"}
+
+
+# The bulk operations bypass these and sync the effective permissions
+# themselves, see models.sync_effective_permissions.
+@receiver(post_save, sender="spice_orgs.Member")
+@receiver(post_save, sender="spice_orgs.TeamMember")
+def sync_permissions(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    from .models import Member, sync_effective_permissions
+
+    if raw or (
+        update_fields is not None and not PERMISSION_FIELDS & set(update_fields)
+    ):
+        return
+    if isinstance(instance, Member):
+        sync_effective_permissions(
+            instance.organization_id, user_ids=[instance.user_id]
+        )
+    else:
+        sync_effective_permissions(
+            instance.organization_id,
+            user_ids=[instance.member.user_id],
+            team_ids=[instance.team_id],
+        )
+
+
+@receiver(post_delete, sender="spice_orgs.Member")
+@receiver(post_delete, sender="spice_orgs.TeamMember")
+def drop_permissions(sender, instance, origin=None, **kwargs):
+    from .models import Member, drop_stale_permissions
+
+    # rows removed along with their user, organization or team lose their
+    # effective permissions to the same cascade, team members along with their
+    # member to the member's receiver
+    origin_model = getattr(origin, "model", type(origin))
+    if origin is not None and origin_model is not sender:
+        return
+    if isinstance(instance, Member):
+        drop_stale_permissions(instance.organization_id, user_ids=[instance.user_id])
+    else:
+        drop_stale_permissions(instance.organization_id, team_ids=[instance.team_id])
+
+
+@receiver(memberships_changed)
+def invalidate_memberships(sender, organization_id, **kwargs):
+    cache.invalidate(organization_id)
+
+
+@receiver(post_save, sender="spice_orgs.Organization")
+@receiver(post_save, sender="spice_orgs.Member")
+@receiver(post_save, sender="spice_orgs.Team")
+@receiver(post_save, sender="spice_orgs.TeamMember")
+def record_save(sender, instance, created, raw=False, **kwargs):
+    from .models import ChangeLogEntry, record_changes
+
+    if raw:
+        return
+    action = ChangeLogEntry.Action.CREATED if created else ChangeLogEntry.Action.UPDATED
+    record_changes(action, [instance])
+
+
+# Having a receiver also keeps cascades from fast deleting without signals, so
+# every row removed by Organization.delete() gets its tombstone.
+@receiver(post_delete, sender="spice_orgs.Organization")
+@receiver(post_delete, sender="spice_orgs.Member")
+@receiver(post_delete, sender="spice_orgs.Team")
+@receiver(post_delete, sender="spice_orgs.TeamMember")
+def record_delete(sender, instance, **kwargs):
+    from .models import ChangeLogEntry, record_changes
+
+    record_changes(ChangeLogEntry.Action.DELETED, [instance])
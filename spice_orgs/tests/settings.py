@@ -10,6 +10,7 @@ INSTALLED_APPS = (
     "spice_orgs",
 )
 MIDDLEWARE = (
+    "spice_orgs.profiling.profiling_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -17,6 +18,7 @@ MIDDLEWARE = (
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "spice_orgs.routing.pin_after_write_middleware",
 )
 DATABASES = {
     "default": {
@@ -26,5 +28,14 @@ DATABASES = {
         "PASSWORD": "",
         "HOST": "",
         "PORT": "",
-    }
+    },
+    # stands in for a read replica in the routing tests, which fill it themselves
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
 }
+DATABASE_ROUTERS = ["spice_orgs.routing.ReplicaRouter"]
+# the tests read the changes feed right after writing, see test_changes.py for
+# the settle window
+SPICE_ORGS_CHANGES_SETTLE = 0
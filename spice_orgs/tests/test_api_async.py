@@ -0,0 +1,112 @@
+from ..benchmarks.endpoints import read_streaming_content
+from ..models import Member, Organization, Team
+from .test_organizations import OrganizationTestCase
+
+PREFIX = "/api/async/organizations"
+
+
+class AsyncRouterTest(OrganizationTestCase):
+    """
+    The async views run inside an event loop here, so any query issued
+    synchronously from them fails with SynchronousOnlyOperation.
+    """
+
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        self.client.login(username=self.user_1.get_username(), password="password")
+
+    def test_list_organizations(self):
+        self._create_organization_via_orm(name="Private Org", publicly_visible=False)
+        self.client.logout()
+        response = self.client.get(f"{PREFIX}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["slug"] for item in response.json()["items"]],
+            [self.organization.slug],
+        )
+
+        self.client.login(username=self.user_1.get_username(), password="password")
+        response = self.client.get(f"{PREFIX}/")
+        self.assertEqual(len(response.json()["items"]), 2)
+
+    def test_matches_sync_router(self):
+        for path in [
+            f"/{self.organization.slug}/",
+            f"/{self.organization.slug}/members/",
+            f"/{self.organization.slug}/teams/",
+            f"/{self.organization.slug}/teams/{self.team.slug}",
+            f"/{self.organization.slug}/teams/{self.team.slug}/members/",
+        ]:
+            with self.subTest(path=path):
+                response = self.client.get(f"{PREFIX}{path}")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json(),
+                    self.client.get(f"/api/organizations{path}").json(),
+                )
+
+    def test_writes(self):
+        response = self.client.post(
+            f"{PREFIX}/",
+            data={"name": "Async Org", "publicly_visible": True},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        organization = Organization.objects.get(slug=response.json()["slug"])
+        self.assertEqual(organization.member_count, 1)
+
+        path = f"{PREFIX}/{self.organization.slug}"
+        response = self.client.patch(
+            f"{path}/members/{self.user_2.username}",
+            data={"role": Member.MemberRole.OWNER},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["username"], self.user_2.username)
+
+        response = self.client.post(
+            f"{path}/teams/{self.team.slug}/members/",
+            data={"username": self.user_2.username},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["member"]["user"]["username"], self.user_2.username
+        )
+
+        response = self.client.delete(f"{path}/teams/{self.team.slug}")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+
+    def test_anonymous_writes_are_unauthorized(self):
+        self.client.logout()
+        response = self.client.post(
+            f"{PREFIX}/",
+            data={"name": "Async Org", "publicly_visible": True},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_missing_organization(self):
+        response = self.client.get(f"{PREFIX}/missing-org/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_streaming_export(self):
+        response = self.client.get(
+            f"{PREFIX}/{self.organization.slug}/export/members?format=csv"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(
+            read_streaming_content(response),
+            b"".join(
+                self.client.get(
+                    f"/api/organizations/{self.organization.slug}/export/members"
+                    "?format=csv"
+                ).streaming_content
+            ),
+        )
@@ -0,0 +1,98 @@
+from io import StringIO
+import json
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..benchmarks import endpoints
+from ..models import Member, Organization, Team, repair_membership_counts
+
+
+class SeedAndBenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command(
+            "seed_orgs",
+            organizations=5,
+            users=40,
+            members=5,
+            whales=1,
+            whale_members=30,
+            teams=2,
+            whale_teams=3,
+            team_members=6,
+            stdout=StringIO(),
+        )
+
+    def test_seeded_dataset(self):
+        self.assertEqual(Organization.objects.count(), 5)
+        whale = Organization.objects.order_by("-member_count").first()
+        self.assertEqual(whale.member_count, 30)
+        self.assertEqual(whale.team_set.count(), 3)
+        self.assertEqual(Team.objects.count(), 3 + 4 * 2)
+        # the counters written by the generator match the rows
+        self.assertEqual(repair_membership_counts(), {"Organizations": 0, "Teams": 0})
+
+    def test_benchmark_covers_every_endpoint(self):
+        with tempfile.NamedTemporaryFile(suffix=".json") as file:
+            call_command("benchmark_orgs", iterations=2, output=file.name)
+            report = json.load(file)
+        self.assertEqual(report["missing_operations"], [])
+        self.assertEqual(
+            {result["operation"] for result in report["results"]},
+            endpoints.router_operations(),
+        )
+        for result in report["results"]:
+            # organization deletions are accepted and queued
+            expected = 202 if result["operation"] == "delete_organization" else 200
+            self.assertEqual(result["status"], [expected], result)
+            self.assertGreater(result["queries"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+
+    def test_concurrency_benchmark(self):
+        with tempfile.NamedTemporaryFile(suffix=".json") as file:
+            call_command(
+                "benchmark_orgs",
+                "concurrency",
+                requests=20,
+                clients=10,
+                delay=0.05,
+                workers=2,
+                output=file.name,
+            )
+            report = json.load(file)
+        sync, concurrent = report["results"]
+        self.assertEqual(sync["status"], [200])
+        self.assertEqual(concurrent["status"], [200])
+        # 2 workers pinned by 50ms clients cannot beat 10 clients waiting together
+        self.assertGreater(concurrent["throughput_rps"], sync["throughput_rps"])
+
+    def test_rendering_benchmark(self):
+        with tempfile.NamedTemporaryFile(suffix=".json") as file:
+            call_command(
+                "benchmark_orgs", "rendering", iterations=2, limit=50, output=file.name
+            )
+            report = json.load(file)
+        self.assertEqual(len(report["results"]), 4)
+        for result in report["results"]:
+            self.assertEqual(result["status"], [200], result)
+            self.assertTrue(result["same_bytes"], result)
+            self.assertGreater(result["rows"], 0)
+
+    def test_inserts_benchmark(self):
+        members = Member.objects.count()
+        with tempfile.NamedTemporaryFile(suffix=".json") as file:
+            call_command(
+                "benchmark_orgs", "inserts", rows=50, batch_size=10, output=file.name
+            )
+            report = json.load(file)
+        self.assertEqual(
+            [result["key"] for result in report["results"]], ["uuid4", "uuid7"]
+        )
+        for result in report["results"]:
+            self.assertEqual(result["rows"], 50)
+            self.assertGreater(result["rows_per_second"], 0)
+            self.assertGreater(result["index_growth_bytes"], 0)
+        # the inserted rows are rolled back
+        self.assertEqual(Member.objects.count(), members)
@@ -0,0 +1,163 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache as default_cache
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+
+from .. import cache
+from ..models import Member, Organization, Team
+from ..permissions import _membership_query, aget_membership, get_membership
+from ..signals import memberships_changed
+from .test_organizations import OrganizationTestCase
+
+
+@override_settings(SPICE_ORGS_CACHE={"ALIAS": "default", "TIMEOUT": 60})
+class MembershipCacheTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        default_cache.clear()
+        cache.reset_cache_stats()
+        self.organization = self._create_organization_via_orm()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+
+    def _membership(self, user, team_slug=None):
+        request = RequestFactory().get("/")
+        request.user = user
+        return get_membership(request, self.organization.slug, team_slug)
+
+    def _membership_of(self, organization_slug):
+        request = RequestFactory().get("/")
+        request.user = self.user_1
+        return get_membership(request, organization_slug)
+
+    def _warm(self, user, team_slug=None):
+        # the first lookup learns the slug's id, the second stores the rows
+        self._membership(user, team_slug)
+        self._membership(user, team_slug)
+
+    def test_cached_membership_needs_no_queries(self):
+        self._warm(self.user_1, self.team.slug)
+        with self.assertNumQueries(0):
+            membership = self._membership(self.user_1, self.team.slug)
+        self.assertEqual(membership.organization, self.organization)
+        self.assertEqual(membership.team, self.team)
+        self.assertTrue(membership.is_owner)
+        self.assertTrue(membership.is_team_owner)
+        self.assertEqual(cache.cache_stats(), {"hits": 1, "misses": 2})
+
+        # the organization and team entries are shared with other users
+        self._membership(self.user_2, self.team.slug)
+        with self.assertNumQueries(0):
+            membership = self._membership(self.user_2, self.team.slug)
+        self.assertTrue(membership.is_member)
+        self.assertFalse(membership.is_team_member)
+
+    def test_saving_a_member_invalidates(self):
+        self._warm(self.user_2)
+        member = Member.objects.get(user=self.user_2)
+        member.role = Member.MemberRole.OWNER
+        member.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(self._membership(self.user_2).is_owner)
+
+    def test_bulk_writes_invalidate(self):
+        self._warm(self.user_1)
+        self.organization.add_users_to_organization([("user_2", None)])
+        self.team.add_users_to_team([(self.user_2.username, None)])
+        with self.assertNumQueries(1):
+            membership = self._membership(self.user_1)
+        self.assertEqual(membership.organization.member_count, 2)
+
+    def test_renaming_forgets_the_old_slug(self):
+        old_slug = self.organization.slug
+        self._warm(self.user_1)
+        self.client.login(username=self.user_1.get_username(), password="password")
+        response = self.client.patch(
+            f"/api/organizations/{old_slug}/",
+            data={"name": "Renamed Org", "publicly_visible": True},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.organization.refresh_from_db()
+        self.assertEqual(self.organization.slug, "renamed-org")
+        # the rows cached under the new slug are not found under the old one
+        self._warm(self.user_1)
+        for method in ("get", "patch", "delete"):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)(
+                    f"/api/organizations/{old_slug}/",
+                    data={"name": "First Org"},
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 404)
+        with self.assertRaises(Http404):
+            self._membership_of(old_slug)
+        self.assertTrue(self._membership(self.user_1).is_owner)
+
+    def test_cached_row_of_another_slug_is_a_miss(self):
+        old_slug = self.organization.slug
+        self._warm(self.user_1)
+        # a rename that only moves the generation leaves the old slug's id
+        Organization.objects.filter(pk=self.organization.pk).update(
+            name="Renamed Org", slug="renamed-org"
+        )
+        memberships_changed.send(sender=Organization, organization_id=None)
+        self.organization.refresh_from_db()
+        self._warm(self.user_1)
+        with self.assertRaises(Http404):
+            self._membership_of(old_slug)
+
+    def test_deleting_invalidates(self):
+        self._warm(self.user_1, self.team.slug)
+        self.team.delete()
+        with self.assertRaises(Http404):
+            self._membership(self.user_1, self.team.slug)
+        self.organization.delete()
+        with self.assertRaises(Http404):
+            self._membership(self.user_1)
+
+    def test_row_read_before_a_write_is_not_served_after_it(self):
+        self._membership(self.user_2)
+
+        def read_then_write():
+            # the row is read, then a write commits before it is cached
+            row = self._membership_row_from_db()
+            Member.objects.filter(user=self.user_2).update(role="OWNER")
+            cache.invalidate(self.organization.pk)
+            return row
+
+        stale = cache.membership_row(
+            self.organization.slug, self.user_2.pk, None, read_then_write
+        )
+        self.assertEqual(stale["caller_member__role"], Member.MemberRole.MEMBER)
+        self.assertTrue(self._membership(self.user_2).is_owner)
+
+    def _membership_row_from_db(self):
+        queryset, columns = _membership_query(self.user_2, self.organization.slug, None)
+        return queryset.values(*columns).first()
+
+    def test_async_resolver_shares_the_cache(self):
+        self._warm(self.user_1)
+        request = RequestFactory().get("/")
+        request.user = self.user_1
+        with self.assertNumQueries(0):
+            membership = async_to_sync(aget_membership)(request, self.organization.slug)
+        self.assertTrue(membership.is_owner)
+
+    def test_disabled_by_default(self):
+        with self.settings(SPICE_ORGS_CACHE=None):
+            self._membership(self.user_1)
+            with self.assertNumQueries(1):
+                self._membership(self.user_1)
+        self.assertEqual(cache.cache_stats(), {"hits": 0, "misses": 0})
+
+    def test_details_endpoint(self):
+        self.client.login(username=self.user_1.get_username(), password="password")
+        path = f"/api/organizations/{self.organization.slug}/"
+        self.client.get(path)
+        self.client.get(path)
+        # session and user lookups only
+        with self.assertNumQueries(2):
+            response = self.client.get(path)
+        self.assertEqual(response.json()["slug"], self.organization.slug)
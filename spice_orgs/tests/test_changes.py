@@ -0,0 +1,212 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from ..changes import changes_since
+from ..models import ChangeLogEntry, Member, Organization, Team, TeamMember
+from .test_organizations import OrganizationTestCase
+
+Action = ChangeLogEntry.Action
+ObjectType = ChangeLogEntry.ObjectType
+
+
+class ChangeLogTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        self.cursor = changes_since()["cursor"]
+
+    def _changes(self):
+        page = changes_since(self.cursor)
+        self.cursor = page["cursor"]
+        return [
+            (entry["object_type"], entry["action"], str(entry["object_id"]))
+            for entry in page["items"]
+        ]
+
+    def test_creates_are_logged(self):
+        page = changes_since()
+        self.assertEqual(
+            [(entry["object_type"], entry["action"]) for entry in page["items"]],
+            [
+                (ObjectType.ORGANIZATION, Action.CREATED),
+                (ObjectType.MEMBER, Action.CREATED),
+                (ObjectType.TEAM, Action.CREATED),
+                (ObjectType.TEAM_MEMBER, Action.CREATED),
+            ],
+        )
+        organization = page["items"][0]
+        self.assertEqual(organization["object_id"], self.organization.id)
+        self.assertEqual(organization["organization_id"], self.organization.id)
+        self.assertEqual(organization["data"]["slug"], "first-org")
+        self.assertNotIn("member_count", organization["data"])
+        self.assertFalse(page["has_more"])
+
+    def test_nothing_changed(self):
+        cursor = self.cursor
+        self.assertEqual(self._changes(), [])
+        self.assertEqual(self.cursor, cursor)
+
+    def test_updates_are_logged(self):
+        self.organization.name = "Renamed Org"
+        self.organization.save()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        member = self.organization.update_user_in_organization(
+            username=self.user_2.username, role=Member.MemberRole.OWNER
+        )
+        self.assertEqual(
+            self._changes(),
+            [
+                (ObjectType.ORGANIZATION, Action.UPDATED, str(self.organization.id)),
+                (ObjectType.MEMBER, Action.CREATED, str(member.id)),
+                (ObjectType.MEMBER, Action.UPDATED, str(member.id)),
+            ],
+        )
+
+    def test_bulk_operations_are_logged(self):
+        self.organization.add_users_to_organization([(self.user_2.username, None)])
+        self.team.add_users_to_team([(self.user_2.username, None)])
+        self.team.update_users_in_team([self.user_2.username], role="OWNER")
+        self.team.remove_users_from_team([self.user_2.username])
+        changes = self._changes()
+        self.assertEqual(
+            [(object_type, action) for object_type, action, _id in changes],
+            [
+                (ObjectType.MEMBER, Action.CREATED),
+                (ObjectType.TEAM_MEMBER, Action.CREATED),
+                (ObjectType.TEAM_MEMBER, Action.UPDATED),
+                (ObjectType.TEAM_MEMBER, Action.DELETED),
+            ],
+        )
+        entry = ChangeLogEntry.objects.get(action=Action.UPDATED)
+        self.assertEqual(entry.data["team_role"], "OWNER")
+
+    def test_cascades_leave_tombstones(self):
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team.add_user_to_team(username=self.user_2.username)
+        self._changes()
+        rows = {
+            ObjectType.ORGANIZATION: {str(self.organization.id)},
+            ObjectType.MEMBER: {
+                str(pk) for pk in Member.objects.values_list("pk", flat=True)
+            },
+            ObjectType.TEAM: {str(self.team.id)},
+            ObjectType.TEAM_MEMBER: {
+                str(pk) for pk in TeamMember.objects.values_list("pk", flat=True)
+            },
+        }
+
+        self.organization.delete()
+        changes = self._changes()
+        self.assertEqual({action for _type, action, _id in changes}, {Action.DELETED})
+        self.assertEqual(
+            Counter(object_type for object_type, _action, _id in changes),
+            {
+                ObjectType.ORGANIZATION: 1,
+                ObjectType.MEMBER: 2,
+                ObjectType.TEAM: 1,
+                ObjectType.TEAM_MEMBER: 2,
+            },
+        )
+        for object_type, _action, object_id in changes:
+            self.assertIn(object_id, rows[object_type])
+        self.assertFalse(Organization.objects.exists())
+
+    def test_rolled_back_changes_are_not_logged(self):
+        with self.assertRaises(Exception):
+            self.organization.remove_user_from_organization(
+                username=self.user_1.username
+            )
+        self.assertEqual(self._changes(), [])
+
+    def test_pages(self):
+        self.organization.add_users_to_organization([(self.user_2.username, None)])
+        self.team.add_users_to_team([(self.user_2.username, None)])
+        first = changes_since(self.cursor, limit=1)
+        self.assertTrue(first["has_more"])
+        second = changes_since(first["cursor"], limit=1)
+        self.assertFalse(second["has_more"])
+        self.assertEqual(
+            [first["items"][0]["object_type"], second["items"][0]["object_type"]],
+            [ObjectType.MEMBER, ObjectType.TEAM_MEMBER],
+        )
+
+    @override_settings(SPICE_ORGS_CHANGES_SETTLE=60)
+    def test_young_entries_wait(self):
+        cursor = self.cursor
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        page = changes_since(cursor)
+        self.assertEqual((page["items"], page["cursor"]), ([], cursor))
+        self.assertFalse(page["has_more"])
+
+        ChangeLogEntry.objects.filter(id__gt=cursor).update(
+            created_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertEqual(
+            [(kind, action) for kind, action, _id in self._changes()],
+            [(ObjectType.MEMBER, Action.CREATED)],
+        )
+
+    @override_settings(SPICE_ORGS_CHANGES_SETTLE=60)
+    def test_late_commit_is_not_skipped(self):
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team.add_user_to_team(username=self.user_2.username)
+        member, team_member = ChangeLogEntry.objects.filter(
+            id__gt=self.cursor
+        ).order_by("id")
+        # the member's transaction took the lower id but is younger, as if it
+        # committed after the team member's
+        settled = timezone.now() - timedelta(seconds=61)
+        ChangeLogEntry.objects.filter(id=team_member.id).update(created_at=settled)
+        self.assertEqual(self._changes(), [])
+
+        ChangeLogEntry.objects.filter(id=member.id).update(created_at=settled)
+        self.assertEqual(
+            [kind for kind, _action, _id in self._changes()],
+            [ObjectType.MEMBER, ObjectType.TEAM_MEMBER],
+        )
+
+
+class ChangesEndpointTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+
+    def test_staff_only(self):
+        for prefix in ("/api", "/api/async"):
+            with self.subTest(prefix=prefix):
+                self.client.logout()
+                self.assertEqual(
+                    self.client.get(f"{prefix}/organizations/changes").status_code,
+                    401,
+                )
+                self.client.login(username="user_1", password="password")
+                self.assertEqual(
+                    self.client.get(f"{prefix}/organizations/changes").status_code,
+                    403,
+                )
+
+    def test_feed(self):
+        self.user_2.is_staff = True
+        self.user_2.save()
+        self.client.login(username="user_2", password="password")
+        for prefix in ("/api", "/api/async"):
+            with self.subTest(prefix=prefix):
+                response = self.client.get(f"{prefix}/organizations/changes?limit=1")
+                self.assertEqual(response.status_code, 200)
+                page = response.json()
+                self.assertTrue(page["has_more"])
+                self.assertEqual(page["items"][0]["object_type"], "ORGANIZATION")
+                self.assertEqual(page["items"][0]["data"]["name"], "First Org")
+
+                response = self.client.get(
+                    f"{prefix}/organizations/changes?since={page['cursor']}"
+                )
+                page = response.json()
+                self.assertEqual(
+                    [item["object_type"] for item in page["items"]], ["MEMBER"]
+                )
+                self.assertFalse(page["has_more"])
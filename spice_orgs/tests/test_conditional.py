@@ -0,0 +1,136 @@
+from ..models import Member, Team
+from .test_organizations import OrganizationTestCase
+
+# session + user lookup done by the authentication middleware
+AUTH_QUERIES = 2
+
+
+class ConditionalGetTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        self.client.login(username=self.user_1.get_username(), password="password")
+        self.path = f"/api/organizations/{self.organization.slug}"
+
+    def _revalidate(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        return response
+
+    def test_organization_details(self):
+        response = self._revalidate(f"{self.path}/")
+        self.assertIn("Last-Modified", response)
+        # membership only, nothing is serialized
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            not_modified = self.client.get(
+                f"{self.path}/", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+        not_modified = self.client.get(
+            f"{self.path}/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        modified = self.client.get(f"{self.path}/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual(modified.json()["member_count"], 2)
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+
+    def test_team_details(self):
+        response = self._revalidate(f"{self.path}/teams/{self.team.slug}")
+        self.team.name = "Renamed Team"
+        self.team.save()
+        modified = self.client.get(
+            f"{self.path}/teams/{self.team.slug}", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(modified.status_code, 200)
+        self.assertEqual(modified.json()["name"], "Renamed Team")
+
+    def test_list_skips_loading_the_page(self):
+        path = f"{self.path}/members/"
+        response = self._revalidate(path)
+        # the membership only: the organization it loads is the version of
+        # the list, the page and its count are not loaded
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_list_changes(self):
+        path = f"{self.path}/members/"
+        etag = self._revalidate(path)["ETag"]
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["items"]), 2)
+
+        # deleting a row moves the version of its organization too
+        etag = response["ETag"]
+        Member.objects.filter(user=self.user_2).delete()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # a different page is a different representation
+        etag = response["ETag"]
+        response = self.client.get(f"{path}?limit=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_validators_depend_on_the_caller(self):
+        etag = self._revalidate("/api/organizations/")["ETag"]
+        self.client.login(username=self.user_2.get_username(), password="password")
+        response = self.client.get("/api/organizations/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_router(self):
+        path = f"/api/async/organizations/{self.organization.slug}/teams/"
+        response = self._revalidate(path)
+        not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(
+            self._revalidate(f"/api/organizations/{self.organization.slug}/teams/")[
+                "ETag"
+            ],
+            response["ETag"],
+        )
+
+    def test_list_version(self):
+        path = f"{self.path}/teams/"
+        etag = self._revalidate(path)["ETag"]
+        # without conditional headers the list is not aggregated either
+        with self.assertNumQueries(AUTH_QUERIES + 3):
+            # membership, count and page
+            self.client.get(path)
+
+        self.team.name = "Renamed Team"
+        self.team.save()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        self.team.add_user_to_team(username=self.user_2.username)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["member_count"], 2)
+
+    def test_organization_list_version(self):
+        path = "/api/organizations/"
+        etag = self._revalidate(path)["ETag"]
+        # one indexed max(updated_at) of the organizations
+        with self.assertNumQueries(AUTH_QUERIES + 1):
+            not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.organization.schedule_deletion(self.user_1)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], [])
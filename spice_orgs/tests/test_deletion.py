@@ -0,0 +1,139 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from ..deletion import claim_deletion, delete_chunk, process_deletions
+from ..models import (
+    ChangeLogEntry,
+    EffectivePermission,
+    Member,
+    Organization,
+    OrganizationDeletion,
+    Role,
+    Team,
+    TeamMember,
+)
+from .test_organizations import OrganizationTestCase
+
+
+class OrganizationDeletionTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        self.team.add_user_to_team(username=self.user_2.username)
+        self.organization.assign_custom_role(
+            self.user_2.username, self.organization.create_role("Auditor")
+        )
+
+    def test_schedule_deactivates(self):
+        deletion = self.organization.schedule_deletion(requested_by=self.user_1)
+        self.organization.refresh_from_db()
+        self.assertFalse(self.organization.is_active)
+        self.assertEqual(deletion.status, OrganizationDeletion.Status.PENDING)
+        # organization, 2 members, 1 team, 2 team members, a role and 4
+        # effective permissions (2 members, 2 team members)
+        self.assertEqual(deletion.total_rows, 11)
+        self.assertEqual(
+            self.organization.schedule_deletion(requested_by=self.user_1), deletion
+        )
+        self.assertEqual(Member.objects.count(), 2)
+
+    def test_chunks(self):
+        deletion = self.organization.schedule_deletion()
+        self.assertEqual(claim_deletion(), deletion)
+        self.assertIsNone(claim_deletion())
+        self.assertEqual(delete_chunk(deletion, chunk_size=3), 3)
+        self.assertEqual(EffectivePermission.objects.count(), 1)
+        self.assertEqual(delete_chunk(deletion, chunk_size=3), 1)
+        self.assertEqual(delete_chunk(deletion, chunk_size=1), 1)
+        self.assertEqual(TeamMember.objects.count(), 1)
+        self.assertEqual(delete_chunk(deletion, chunk_size=10), 1)
+        self.assertEqual(delete_chunk(deletion, chunk_size=10), 2)
+        self.assertEqual(Member.objects.count(), 0)
+        self.assertEqual(delete_chunk(deletion, chunk_size=10), 1)
+        self.assertEqual(delete_chunk(deletion, chunk_size=10), 1)
+        self.assertEqual(Role.objects.count(), 0)
+        self.assertEqual(delete_chunk(deletion, chunk_size=10), 1)
+        self.assertEqual(delete_chunk(deletion, chunk_size=10), 0)
+        self.assertFalse(Organization.objects.exists())
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.deleted_rows, 11)
+
+    def test_chunks_do_not_cascade(self):
+        models = (EffectivePermission, TeamMember, Member, Team, Role, Organization)
+
+        def rows():
+            return sum(model.objects.count() for model in models)
+
+        deletion = self.organization.schedule_deletion()
+        before = rows()
+        # a chunk removes the rows it counts and nothing more
+        while deleted := delete_chunk(deletion, chunk_size=1):
+            self.assertEqual(deleted, 1)
+            self.assertEqual(rows(), before - 1)
+            before -= 1
+        self.assertEqual(rows(), 0)
+
+    def test_process_deletions(self):
+        deletion = self.organization.schedule_deletion()
+        self.assertEqual(process_deletions(chunk_size=1), 1)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, OrganizationDeletion.Status.DONE)
+        self.assertEqual(deletion.deleted_rows, deletion.total_rows)
+        self.assertIsNotNone(deletion.finished_at)
+        self.assertFalse(Organization.objects.exists())
+        self.assertFalse(Team.objects.exists())
+        # every removed row has its tombstone
+        self.assertEqual(
+            ChangeLogEntry.objects.filter(action=ChangeLogEntry.Action.DELETED).count(),
+            6,
+        )
+        self.assertEqual(process_deletions(), 0)
+
+    def test_command(self):
+        self.organization.schedule_deletion()
+        stderr = StringIO()
+        call_command("process_deletions", "--once", "--chunk-size=2", stderr=stderr)
+        self.assertIn("Processed 1 deletions", stderr.getvalue())
+        self.assertFalse(Organization.objects.exists())
+
+
+class DeleteOrganizationEndpointTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+
+    def test_delete_and_progress(self):
+        for prefix in ("/api/organizations", "/api/async/organizations"):
+            with self.subTest(prefix=prefix):
+                organization = Organization.objects.create(
+                    name=f"Org {len(prefix)}", created_by=self.user_1
+                )
+                self.client.login(username="user_2", password="password")
+                response = self.client.delete(f"{prefix}/{self.organization.slug}/")
+                self.assertEqual(response.status_code, 403)
+
+                self.client.login(username="user_1", password="password")
+                response = self.client.delete(f"{prefix}/{organization.slug}/")
+                self.assertEqual(response.status_code, 202)
+                deletion = response.json()
+                self.assertEqual(deletion["status"], "PENDING")
+                # the organization, its owner and their effective permissions
+                self.assertEqual(deletion["total_rows"], 3)
+                # gone from the API right away
+                self.assertEqual(
+                    self.client.get(f"{prefix}/{organization.slug}/").status_code, 404
+                )
+
+                process_deletions()
+                path = f"{prefix}/deletions/{deletion['id']}"
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["status"], "DONE")
+                self.assertEqual(response.json()["deleted_rows"], 3)
+
+                self.client.login(username="user_2", password="password")
+                self.assertEqual(self.client.get(path).status_code, 404)
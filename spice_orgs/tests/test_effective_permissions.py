@@ -0,0 +1,182 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import (
+    MEMBER_ROLE_PERMISSIONS,
+    EffectivePermission,
+    Member,
+    Permission,
+    Team,
+    check_effective_permissions,
+    rebuild_effective_permissions,
+)
+from ..permissions import Action, check_access
+from .test_organizations import OrganizationTestCase
+
+UserModel = get_user_model()
+
+
+class EffectivePermissionTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm(publicly_visible=False)
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+
+    def _bits(self, user, team=None) -> int:
+        row = EffectivePermission.objects.filter(
+            user=user, organization=self.organization, team=team
+        ).first()
+        return row.permissions if row is not None else 0
+
+    def assertConsistent(self) -> None:
+        self.assertEqual(check_effective_permissions(), {})
+
+    def _allowed(self, user, action) -> bool:
+        self.team.refresh_from_db()
+        return check_access(user, self.organization, action, self.team)
+
+    def test_maintained_by_every_membership_change(self):
+        self.assertEqual(
+            self._bits(self.user_1), MEMBER_ROLE_PERMISSIONS[Member.MemberRole.OWNER]
+        )
+        self.assertEqual(self._bits(self.user_2), Permission.VIEW_ORGANIZATION)
+        self.assertEqual(self._bits(self.user_2, self.team), 0)
+        self.assertFalse(self._allowed(self.user_2, Action.VIEW_TEAM))
+        self.assertConsistent()
+
+        # visibility is checked, not stored
+        self.team.visible_to_organization = True
+        self.team.save()
+        self.assertEqual(self._bits(self.user_2, self.team), 0)
+        self.assertTrue(self._allowed(self.user_2, Action.VIEW_TEAM))
+        self.assertConsistent()
+
+        self.team.add_users_to_team([(self.user_2.username, "OWNER")])
+        self.assertEqual(
+            self._bits(self.user_2, self.team),
+            Permission.VIEW_TEAM | Permission.MANAGE_TEAM,
+        )
+        self.assertConsistent()
+
+        self.team.update_users_in_team([self.user_2.username], role="MEMBER")
+        self.assertEqual(self._bits(self.user_2, self.team), Permission.VIEW_TEAM)
+        self.assertFalse(self._allowed(self.user_2, Action.MANAGE_TEAM))
+        # owners of the organization manage every team, from their own row
+        self.organization.update_user_in_organization(self.user_2.username, "OWNER")
+        self.assertEqual(self._bits(self.user_2, self.team), Permission.VIEW_TEAM)
+        self.assertTrue(self._allowed(self.user_2, Action.MANAGE_TEAM))
+        self.assertConsistent()
+
+        self.team.is_active = False
+        self.team.save()
+        self.assertFalse(self._allowed(self.user_2, Action.VIEW_TEAM))
+        self.assertConsistent()
+
+        self.organization.remove_user_from_organization(self.user_2.username)
+        self.assertFalse(EffectivePermission.objects.filter(user=self.user_2).exists())
+        self.assertConsistent()
+
+    def test_plain_saves_and_deletes(self):
+        self.team.add_user_to_team(self.user_2.username)
+        self.assertTrue(self._allowed(self.user_2, Action.VIEW_TEAM))
+
+        # edits outside of the membership methods, as the admin makes them
+        team_member = self.team.teammember_set.get(member__user=self.user_2)
+        team_member.team_role = "OWNER"
+        team_member.save()
+        self.assertTrue(self._allowed(self.user_2, Action.MANAGE_TEAM))
+        team_member.delete()
+        self.assertFalse(self._allowed(self.user_2, Action.VIEW_TEAM))
+        self.assertConsistent()
+
+        member = Member.objects.get(organization=self.organization, user=self.user_2)
+        member.role = Member.MemberRole.OWNER
+        member.save()
+        self.assertTrue(self._allowed(self.user_2, Action.MANAGE_ORGANIZATION))
+        member.delete()
+        self.assertFalse(self._allowed(self.user_2, Action.VIEW_ORGANIZATION))
+        self.assertFalse(EffectivePermission.objects.filter(user=self.user_2).exists())
+        self.assertConsistent()
+
+    def test_rows_per_membership(self):
+        users = UserModel.objects.bulk_create(
+            [UserModel(username=f"member_{index}") for index in range(20)]
+        )
+        self.organization.add_users_to_organization(
+            (user.username, None) for user in users
+        )
+        rows = EffectivePermission.objects.count()
+        # a visible team stores its creator's membership only
+        team = Team.objects.create(
+            name="Visible Team",
+            organization=self.organization,
+            created_by=self.user_1,
+            visible_to_organization=True,
+        )
+        self.assertEqual(EffectivePermission.objects.count(), rows + 1)
+        # and saving it again reads no permissions
+        team.name = "Renamed Team"
+        with CaptureQueriesContext(connection) as context:
+            team.save()
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in context.captured_queries
+                if "effectivepermission" in query["sql"]
+            ]
+        )
+        self.assertTrue(
+            check_access(users[0], self.organization, Action.VIEW_TEAM, team)
+        )
+        self.assertConsistent()
+
+    def test_check_access_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                check_access(
+                    self.user_1, self.organization, Action.MANAGE_TEAM, self.team
+                )
+            )
+        with self.assertNumQueries(1):
+            self.assertFalse(
+                check_access(
+                    self.user_2, self.organization, Action.VIEW_TEAM, self.team
+                )
+            )
+        self.assertTrue(
+            check_access(self.user_2, self.organization, Action.VIEW_ORGANIZATION)
+        )
+        outsider = UserModel.objects.create(username="outsider")
+        self.assertFalse(
+            check_access(outsider, self.organization, Action.VIEW_ORGANIZATION)
+        )
+
+    def test_rebuild_repairs_drift(self):
+        EffectivePermission.objects.filter(user=self.user_2).delete()
+        EffectivePermission.objects.filter(user=self.user_1, team=None).update(
+            permissions=Permission.VIEW_ORGANIZATION
+        )
+        self.assertEqual(
+            check_effective_permissions(),
+            {self.organization.slug: {"missing": 1, "changed": 1, "extra": 0}},
+        )
+        self.assertEqual(
+            rebuild_effective_permissions(), {"created": 1, "updated": 1, "deleted": 0}
+        )
+        self.assertConsistent()
+
+    def test_command(self):
+        EffectivePermission.objects.filter(user=self.user_2).delete()
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_effective_permissions", "--check", stdout=stdout)
+        self.assertIn(f"{self.organization.slug}: missing 1", stdout.getvalue())
+
+        call_command("rebuild_effective_permissions", stdout=StringIO())
+        call_command("rebuild_effective_permissions", "--check", stdout=StringIO())
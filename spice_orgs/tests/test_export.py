@@ -0,0 +1,143 @@
+import csv
+from io import StringIO
+import json
+import tempfile
+
+from django.core.management import call_command
+
+from ..models import Member, Permission, Team, TeamMember
+from .test_organizations import OrganizationTestCase
+
+
+class ExportTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        Member.objects.filter(user=self.user_1).update(publicly_visible=True)
+        self.team = Team.objects.create(
+            name="First Team",
+            organization=self.organization,
+            created_by=self.user_1,
+            visible_to_organization=True,
+        )
+        self.hidden_team = Team.objects.create(
+            name="Hidden Team",
+            organization=self.organization,
+            created_by=self.user_1,
+            visible_to_organization=False,
+        )
+        self.path = f"/api/organizations/{self.organization.slug}/export"
+
+    def _export(self, path, user):
+        self.client.login(username=user.get_username(), password="password")
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_members_ndjson(self):
+        content = self._export(f"{self.path}/members", self.user_1)
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [(row["username"], row["role"]) for row in rows],
+            [
+                (self.user_1.username, Member.MemberRole.OWNER),
+                (self.user_2.username, Member.MemberRole.MEMBER),
+            ],
+        )
+        self.assertEqual(
+            list(rows[0]),
+            [
+                "username",
+                "email",
+                "first_name",
+                "last_name",
+                "role",
+                "publicly_visible",
+                "created_at",
+            ],
+        )
+
+    def test_members_see_public_members_only(self):
+        content = self._export(f"{self.path}/members", self.user_2)
+        self.assertEqual(
+            [json.loads(line)["username"] for line in content.splitlines()],
+            [self.user_1.username],
+        )
+
+    def test_teams_csv(self):
+        response = self.client.get(f"{self.path}/teams?format=csv")
+        self.assertEqual(response.status_code, 401)
+
+        content = self._export(f"{self.path}/teams?format=csv", self.user_2)
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(
+            [(row["team"], row["username"], row["team_role"]) for row in rows],
+            [(self.team.slug, self.user_1.username, TeamMember.TeamMemberRole.OWNER)],
+        )
+        content = self._export(f"{self.path}/teams?format=csv", self.user_1)
+        self.assertEqual(
+            [row["team"] for row in csv.DictReader(StringIO(content))],
+            [self.team.slug, self.hidden_team.slug],
+        )
+
+    def test_custom_role(self):
+        role = self.organization.create_role("Auditor", Permission.VIEW_TEAM)
+        self.organization.assign_custom_role(self.user_2.username, role)
+        content = self._export(f"{self.path}/teams?format=csv", self.user_2)
+        self.assertEqual(
+            [row["team"] for row in csv.DictReader(StringIO(content))],
+            [self.team.slug, self.hidden_team.slug],
+        )
+        # seeing every team does not show the private members
+        content = self._export(f"{self.path}/members", self.user_2)
+        self.assertEqual(
+            [json.loads(line)["username"] for line in content.splitlines()],
+            [self.user_1.username],
+        )
+
+        role.permissions = Permission.MANAGE_ORGANIZATION
+        role.save()
+        content = self._export(f"{self.path}/members", self.user_2)
+        self.assertEqual(
+            [json.loads(line)["username"] for line in content.splitlines()],
+            [self.user_1.username, self.user_2.username],
+        )
+
+    def test_rows_are_read_while_streaming(self):
+        self.client.login(username=self.user_1.get_username(), password="password")
+        # session, user and membership lookups only, the rows come with the body
+        with self.assertNumQueries(3):
+            response = self.client.get(f"{self.path}/members")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="{self.organization.slug}-members.ndjson"',
+        )
+        with self.assertNumQueries(1):
+            b"".join(response.streaming_content)
+
+    def test_export_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as file:
+            call_command(
+                "export_members",
+                self.organization.slug,
+                format="csv",
+                output=file.name,
+                stderr=StringIO(),
+            )
+            with open(file.name, encoding="utf-8") as output:
+                rows = list(csv.DictReader(output))
+        self.assertEqual(
+            [row["username"] for row in rows],
+            [self.user_1.username, self.user_2.username],
+        )
+
+        stdout = StringIO()
+        call_command(
+            "export_members",
+            self.organization.slug,
+            kind="teams",
+            stdout=stdout,
+            stderr=StringIO(),
+        )
+        self.assertEqual(len(stdout.getvalue().splitlines()), 2)
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Team
+from .test_organizations import OrganizationTestCase
+
+UserModel = get_user_model()
+
+PREFIXES = ("/api/organizations", "/api/async/organizations")
+
+
+class SparseFieldsetTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team.add_user_to_team(username=self.user_2.username)
+        self.client.login(username=self.user_1.get_username(), password="password")
+        self.team_path = f"{self.organization.slug}/teams/{self.team.slug}"
+
+    def _get(self, path, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), [query["sql"] for query in context.captured_queries]
+
+    def test_nested_fields(self):
+        for prefix in PREFIXES:
+            page, queries = self._get(
+                f"{prefix}/{self.team_path}/members/",
+                fields="team_role,member.user.username",
+            )
+            self.assertEqual(
+                page["items"],
+                [
+                    {"team_role": "OWNER", "member": {"user": {"username": "user_1"}}},
+                    {"team_role": "MEMBER", "member": {"user": {"username": "user_2"}}},
+                ],
+            )
+            # the page query reads only the requested columns
+            self.assertNotIn("email", queries[-1])
+            self.assertNotIn('"spice_orgs_member"."role"', queries[-1])
+
+    def test_nested_schema_named_alone(self):
+        page, _queries = self._get(
+            f"/api/organizations/{self.organization.slug}/members/", fields="user"
+        )
+        self.assertEqual(
+            set(page["items"][0]["user"]),
+            {"username", "email", "first_name", "last_name"},
+        )
+        self.assertEqual(set(page["items"][0]), {"user"})
+
+    def test_expand(self):
+        expected = {"name": "First Org", "created_by": {"username": "user_1"}}
+        for prefix in PREFIXES:
+            page, queries = self._get(
+                f"{prefix}/", fields="name,created_by.username", expand="created_by"
+            )
+            self.assertEqual(page["items"], [expected])
+            self.assertIn('"auth_user"."username"', queries[-1])
+
+            organization, _queries = self._get(
+                f"{prefix}/{self.organization.slug}/",
+                fields="name,created_by.username",
+                expand="created_by",
+            )
+            self.assertEqual(organization, expected)
+
+        team, _queries = self._get(
+            f"/api/organizations/{self.team_path}", expand="created_by"
+        )
+        self.assertEqual(team["created_by"]["username"], "user_1")
+        self.assertEqual(team["member_count"], 2)
+
+    def test_expand_anonymous(self):
+        self.client.logout()
+        for prefix in PREFIXES:
+            page, queries = self._get(f"{prefix}/", expand="created_by")
+            self.assertEqual(
+                page["items"][0]["created_by"],
+                {"username": "user_1", "first_name": "", "last_name": ""},
+            )
+            self.assertNotIn("email", queries[-1])
+            response = self.client.get(
+                f"{prefix}/",
+                {"fields": "created_by.email", "expand": "created_by"},
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json(), {"detail": "Unknown field: created_by.email"}
+            )
+
+    def test_detail_fields(self):
+        team, _queries = self._get(
+            f"/api/async/organizations/{self.team_path}", fields="slug"
+        )
+        self.assertEqual(team, {"slug": self.team.slug})
+
+    def test_fast_render_matches(self):
+        path = f"/api/organizations/{self.organization.slug}/teams/"
+        params = {"fields": "slug,created_by.last_name", "expand": "created_by"}
+        expected = self.client.get(path, params)
+        with override_settings(SPICE_ORGS_FAST_RENDER=True):
+            response = self.client.get(path, params)
+        self.assertEqual(response.content, expected.content)
+
+    def test_unknown_fields(self):
+        members = f"/api/organizations/{self.team_path}/members/"
+        for path, params, detail in [
+            (members, {"fields": "nope"}, "Unknown field: nope"),
+            (
+                members,
+                {"fields": "member.user.password"},
+                "Unknown field: member.user.password",
+            ),
+            (members, {"fields": "team_role.name"}, "Not a nested field: team_role"),
+            (members, {"expand": "team"}, "Cannot expand: team"),
+            # an expandable relation has to be expanded to pick its fields
+            (
+                "/api/organizations/",
+                {"fields": "created_by.username"},
+                "Unknown field: created_by",
+            ),
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(path, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"detail": detail})
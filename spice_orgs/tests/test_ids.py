@@ -0,0 +1,32 @@
+from unittest import mock
+from uuid import RFC_4122
+
+from ..ids import uuid7, uuid7_milliseconds
+from ..models import Member, Team
+from .test_organizations import OrganizationTestCase
+
+
+class UUID7Test(OrganizationTestCase):
+    def test_version_and_variant(self):
+        for value in (uuid7() for _index in range(100)):
+            self.assertEqual(value.version, 7)
+            self.assertEqual(value.variant, RFC_4122)
+
+    def test_time_ordered(self):
+        values = []
+        for milliseconds in (1_700_000_000_000, 1_700_000_000_001, 1_700_000_001_000):
+            with mock.patch("time.time_ns", return_value=milliseconds * 1_000_000):
+                value = uuid7()
+            self.assertEqual(uuid7_milliseconds(value), milliseconds)
+            values.append(value)
+        self.assertEqual(sorted(values), values)
+        self.assertEqual(sorted(str(value) for value in values), list(map(str, values)))
+
+    def test_new_rows(self):
+        organization = self._create_organization_via_orm()
+        team = Team.objects.create(
+            name="First Team", organization=organization, created_by=self.user_1
+        )
+        member = Member.objects.get(organization=organization, user=self.user_1)
+        for row in (organization, team, member):
+            self.assertEqual(row.pk.version, 7)
@@ -0,0 +1,149 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Exists, Max, OuterRef, Q
+from django.test import TestCase
+
+from ..models import Member, Organization, Team, TeamMember
+from ..permissions import _resolve_membership
+
+UserModel = get_user_model()
+
+# a full table scan, as opposed to an index search or covering index scan
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (spice_orgs_\w+)\b(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (spice_orgs_\w+)"),
+}
+
+
+class QueryPlanTest(TestCase):
+    """
+    The hot query shapes of the API must be answered from an index rather than a
+    full table scan once the tables hold a realistic amount of data.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        users = UserModel.objects.bulk_create(
+            [UserModel(username=f"user_{index}") for index in range(200)]
+        )
+        organizations = Organization.objects.bulk_create(
+            [
+                Organization(
+                    name=f"Org {index}",
+                    slug=f"org-{index}",
+                    created_by=users[0],
+                    publicly_visible=index % 2 == 0,
+                    is_active=index % 10 != 0,
+                )
+                for index in range(100)
+            ]
+        )
+        members = Member.objects.bulk_create(
+            [
+                Member(
+                    organization=organization,
+                    user=user,
+                    role=Member.MemberRole.OWNER if index == 0 else "MEMBER",
+                    publicly_visible=index % 3 == 0,
+                )
+                for organization in organizations
+                for index, user in enumerate(users[:20])
+            ]
+        )
+        teams = Team.objects.bulk_create(
+            [
+                Team(
+                    name=f"Team {index}",
+                    slug=f"team-{index}",
+                    organization=organization,
+                    created_by=users[0],
+                    visible_to_organization=index % 2 == 0,
+                )
+                for organization in organizations
+                for index in range(10)
+            ]
+        )
+        members_by_organization = {}
+        for member in members:
+            members_by_organization.setdefault(member.organization_id, []).append(
+                member
+            )
+        TeamMember.objects.bulk_create(
+            [
+                TeamMember(organization=team.organization, team=team, member=member)
+                for team in teams
+                for member in members_by_organization[team.organization_id][:5]
+            ]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.organization = organizations[1]
+        cls.user = users[1]
+
+    def assertNoFullScans(self, queryset):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f"No query plan check for {connection.vendor}")
+        plan = queryset.explain()
+        self.assertEqual(pattern.findall(plan), [], plan)
+
+    def test_list_public_organizations(self):
+        self.assertNoFullScans(
+            Organization.objects.filter(is_active=True, publicly_visible=True)
+            .order_by("created_at", "id")
+            .values("name", "slug", "publicly_visible")
+        )
+
+    def test_membership_lookup(self):
+        self.assertNoFullScans(
+            Member.objects.filter(
+                organization=self.organization,
+                user=self.user,
+                role=Member.MemberRole.OWNER,
+            )
+        )
+
+    def test_list_public_members(self):
+        self.assertNoFullScans(
+            Member.objects.filter(
+                organization=self.organization, publicly_visible=True
+            ).order_by("created_at", "id")
+        )
+
+    def test_team_by_slug(self):
+        self.assertNoFullScans(
+            Team.objects.filter(
+                organization=self.organization, is_active=True, slug="team-1"
+            )
+        )
+
+    def test_list_visible_teams(self):
+        member = Member.objects.get(organization=self.organization, user=self.user)
+        self.assertNoFullScans(
+            Team.objects.filter(organization=self.organization, is_active=True).filter(
+                Q(visible_to_organization=True)
+                | Exists(TeamMember.objects.filter(team=OuterRef("pk"), member=member))
+            )
+        )
+
+    def test_membership_resolver(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Raw plan check is SQLite specific")
+        with self.assertNumQueries(1) as context:
+            _resolve_membership(self.user, self.organization.slug, "team-1")
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {context.captured_queries[0]['sql']}")
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertEqual(FULL_SCAN_PATTERNS["sqlite"].findall(plan), [], plan)
+
+    def test_organization_list_version(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Raw plan check is SQLite specific")
+        with self.assertNumQueries(1) as context:
+            Organization.objects.aggregate(updated_at=Max("updated_at"))
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {context.captured_queries[0]['sql']}")
+            plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertEqual(FULL_SCAN_PATTERNS["sqlite"].findall(plan), [], plan)
@@ -0,0 +1,79 @@
+from ..models import Organization, Team
+from .test_organizations import OrganizationTestCase
+
+# session + user lookup done by the authentication middleware
+AUTH_QUERIES = 2
+
+
+class MyMembershipsTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.first = self._create_organization_via_orm("First Org")
+        self.second = self._create_organization_via_orm(
+            "Second Org", publicly_visible=False
+        )
+        self.second.add_user_to_organization(username="user_2")
+        for name in ("Alpha", "Beta"):
+            team = Team.objects.create(
+                name=name, organization=self.second, created_by=self.user_1
+            )
+        team.add_user_to_team(username="user_2")
+        Team.objects.create(
+            name="Inactive", organization=self.first, created_by=self.user_1
+        )
+        Team.objects.filter(name="Inactive").update(is_active=False)
+        Organization.objects.create(name="Gone", created_by=self.user_1)
+        Organization.objects.filter(name="Gone").update(is_active=False)
+
+    def test_memberships(self):
+        self.client.login(username="user_1", password="password")
+        for prefix in ("/api/organizations", "/api/async/organizations"):
+            with self.subTest(prefix=prefix):
+                # count, the page and the teams of every organization on it
+                with self.assertNumQueries(AUTH_QUERIES + 3):
+                    response = self.client.get(f"{prefix}/me/memberships")
+                self.assertEqual(response.status_code, 200)
+                items = response.json()["items"]
+                self.assertEqual(
+                    [
+                        (item["organization"]["slug"], item["role"], item["teams"])
+                        for item in items
+                    ],
+                    [
+                        ("first-org", "OWNER", []),
+                        (
+                            "second-org",
+                            "OWNER",
+                            [
+                                {
+                                    "name": "Alpha",
+                                    "slug": "alpha",
+                                    "team_role": "OWNER",
+                                },
+                                {"name": "Beta", "slug": "beta", "team_role": "OWNER"},
+                            ],
+                        ),
+                    ],
+                )
+
+    def test_other_user(self):
+        self.client.login(username="user_2", password="password")
+        response = self.client.get("/api/organizations/me/memberships")
+        self.assertEqual(
+            [
+                (item["organization"]["slug"], item["role"], item["teams"])
+                for item in response.json()["items"]
+            ],
+            [
+                (
+                    "second-org",
+                    "MEMBER",
+                    [{"name": "Beta", "slug": "beta", "team_role": "MEMBER"}],
+                )
+            ],
+        )
+
+    def test_anonymous(self):
+        for prefix in ("/api/organizations", "/api/async/organizations"):
+            with self.subTest(prefix=prefix):
+                response = self.client.get(f"{prefix}/me/memberships")
+                self.assertEqual(response.status_code, 401)
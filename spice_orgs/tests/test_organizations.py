@@ -1,7 +1,12 @@
+from io import StringIO
+import tempfile
+
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Organization
+from ..models import BulkStatus, Member, Organization, Team, TeamMember
 
 UserModel = get_user_model()
 
@@ -50,6 +55,7 @@ class ListOrganizationTest(OrganizationTestCase):
                         "name": organization.name,
                         "slug": organization.slug,
                         "publicly_visible": organization.publicly_visible,
+                        "member_count": organization.member_count,
                     }
                 ],
                 "count": 1,
@@ -107,14 +113,16 @@ class ListOrganizationTest(OrganizationTestCase):
                         "name": organization_1.name,
                         "slug": organization_1.slug,
                         "publicly_visible": organization_1.publicly_visible,
+                        "member_count": organization_1.member_count,
                     },
                     {
                         "name": organization_2.name,
                         "slug": organization_2.slug,
                         "publicly_visible": organization_2.publicly_visible,
+                        "member_count": organization_2.member_count,
                     },
                 ],
-                "count": 1,
+                "count": 2,
             },
         )
         # verify other users who are not in the organization
@@ -133,6 +141,7 @@ class ListOrganizationTest(OrganizationTestCase):
                         "name": organization_1.name,
                         "slug": organization_1.slug,
                         "publicly_visible": organization_1.publicly_visible,
+                        "member_count": organization_1.member_count,
                     }
                 ],
                 "count": 1,
@@ -140,6 +149,154 @@ class ListOrganizationTest(OrganizationTestCase):
         )
 
 
+class BulkAddMembersTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        UserModel.objects.bulk_create(
+            [UserModel(username=f"bulk_{index}") for index in range(10)]
+        )
+
+    def test_bulk_add_members(self):
+        self.client.login(username=self.user_1.get_username(), password="password")
+        response = self.client.post(
+            path=f"/api/organizations/{self.organization.slug}/members/bulk/",
+            data={
+                "members": [
+                    {"username": "bulk_0"},
+                    {"username": "bulk_1", "role": "OWNER"},
+                    {"username": "bulk_0"},
+                    {"username": self.user_1.username},
+                    {"username": "missing"},
+                    {"username": "bulk_2", "role": "ADMIN"},
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["status"] for row in response.json()],
+            [
+                BulkStatus.ADDED,
+                BulkStatus.ADDED,
+                BulkStatus.DUPLICATE,
+                BulkStatus.EXISTS,
+                BulkStatus.NOT_FOUND,
+                BulkStatus.INVALID_ROLE,
+            ],
+        )
+        self.assertEqual(
+            self.organization.member_set.get(user__username="bulk_1").role,
+            Member.MemberRole.OWNER,
+        )
+
+    def test_bulk_add_query_count_does_not_depend_on_rows(self):
+        rows = [(f"bulk_{index}", None) for index in range(10)]
+        # resolve usernames, find existing members, insert, log the changes
+        # and bump the organization's version, sync the effective permissions
+        # (roles, teams, stored rows, insert), bump the counters (plus the
+        # savepoint)
+        with self.assertNumQueries(12):
+            self.organization.add_users_to_organization(rows)
+        self.assertEqual(self.organization.member_set.count(), 11)
+
+    def test_bulk_import_csv_upload(self):
+        self.client.login(username=self.user_1.get_username(), password="password")
+        upload = SimpleUploadedFile(
+            "members.csv", b"username,role\nbulk_0,member\nbulk_1,\n"
+        )
+        response = self.client.post(
+            path=f"/api/organizations/{self.organization.slug}/members/bulk/csv",
+            data={"file": upload},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {"username": "bulk_0", "role": "MEMBER", "status": "ADDED"},
+                {"username": "bulk_1", "role": "MEMBER", "status": "ADDED"},
+            ],
+        )
+
+    def test_import_members_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("username\nbulk_0\nbulk_1\nmissing\n")
+            file.flush()
+            stdout = StringIO()
+            call_command(
+                "import_members",
+                self.organization.slug,
+                file.name,
+                stdout=stdout,
+                stderr=StringIO(),
+            )
+        self.assertIn("Added: 2", stdout.getvalue())
+        self.assertIn("User not found: 1", stdout.getvalue())
+
+
+class MembershipCountsTest(OrganizationTestCase):
+    def test_counts_follow_membership_changes(self):
+        organization = self._create_organization_via_orm()
+        team = Team.objects.create(
+            name="First Team", organization=organization, created_by=self.user_1
+        )
+        owned_team = Team.objects.create(
+            name="Second Team", organization=organization, created_by=self.user_1
+        )
+        organization.add_user_to_organization(username=self.user_2.username)
+        team.add_user_to_team(username=self.user_2.username)
+        owned_team.add_user_to_team(
+            username=self.user_2.username, role=TeamMember.TeamMemberRole.OWNER
+        )
+        organization.update_user_in_organization(
+            username=self.user_2.username, role=Member.MemberRole.OWNER
+        )
+        organization.refresh_from_db()
+        team.refresh_from_db()
+        owned_team.refresh_from_db()
+        self.assertEqual((organization.member_count, organization.owner_count), (2, 2))
+        self.assertEqual((team.member_count, team.owner_count), (2, 1))
+        self.assertEqual((owned_team.member_count, owned_team.owner_count), (2, 2))
+
+        organization.remove_user_from_organization(username=self.user_2.username)
+        organization.refresh_from_db()
+        team.refresh_from_db()
+        owned_team.refresh_from_db()
+        self.assertEqual((organization.member_count, organization.owner_count), (1, 1))
+        self.assertEqual((team.member_count, team.owner_count), (1, 1))
+        self.assertEqual((owned_team.member_count, owned_team.owner_count), (1, 1))
+
+    def test_only_owner_cannot_be_removed_or_demoted(self):
+        organization = self._create_organization_via_orm()
+        with self.assertRaisesMessage(Exception, "Cannot remove only owner"):
+            organization.remove_user_from_organization(username=self.user_1.username)
+        with self.assertRaisesMessage(Exception, "Cannot remove only owner"):
+            organization.update_user_in_organization(
+                username=self.user_1.username, role=Member.MemberRole.MEMBER
+            )
+
+    def test_save_does_not_overwrite_counts(self):
+        organization = self._create_organization_via_orm()
+        stale = Organization.objects.get(pk=organization.pk)
+        organization.add_user_to_organization(username=self.user_2.username)
+        stale.name = "Renamed Org"
+        # the update and its change log entry (plus the savepoint)
+        with self.assertNumQueries(4):
+            stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.member_count, 2)
+
+    def test_repair_member_counts_command(self):
+        organization = self._create_organization_via_orm()
+        Organization.objects.filter(pk=organization.pk).update(
+            member_count=10, owner_count=0
+        )
+        stdout = StringIO()
+        call_command("repair_member_counts", stdout=stdout)
+        self.assertIn("Organizations: repaired 1", stdout.getvalue())
+        organization.refresh_from_db()
+        self.assertEqual((organization.member_count, organization.owner_count), (1, 1))
+
+
 # class CreateOrganizationTest(OrganizationTestCase):
 # def test_create_organization(self) -> None:
 #     response = self.create_organization_via_api()
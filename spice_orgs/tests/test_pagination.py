@@ -0,0 +1,69 @@
+from asgiref.sync import async_to_sync
+from ninja.errors import HttpError
+
+from ..models import Organization
+from ..pagination import CursorPagination
+from .test_organizations import OrganizationTestCase
+
+
+class CursorPaginationTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organizations = [
+            self._create_organization_via_orm(name=f"Org {index}") for index in range(5)
+        ]
+        self.paginator = CursorPagination()
+
+    def _page(self, cursor=None, limit=2, include_count=False):
+        return self.paginator.paginate_queryset(
+            Organization.objects.all(),
+            pagination=CursorPagination.Input(
+                cursor=cursor, limit=limit, include_count=include_count
+            ),
+        )
+
+    def test_walk_forward_and_back(self):
+        first = self._page()
+        self.assertEqual(first["items"], self.organizations[:2])
+        self.assertIsNone(first["previous"])
+        self.assertIsNone(first["count"])
+
+        second = self._page(cursor=first["next"])
+        self.assertEqual(second["items"], self.organizations[2:4])
+
+        last = self._page(cursor=second["next"])
+        self.assertEqual(last["items"], self.organizations[4:])
+        self.assertIsNone(last["next"])
+
+        back = self._page(cursor=last["previous"])
+        self.assertEqual(back["items"], self.organizations[2:4])
+        back = self._page(cursor=back["previous"])
+        self.assertEqual(back["items"], self.organizations[:2])
+        self.assertIsNone(back["previous"])
+        self.assertEqual(back["next"], first["next"])
+
+    def test_page_query_count_does_not_depend_on_depth(self):
+        page = self._page(limit=1)
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                page = self._page(cursor=page["next"], limit=1)
+
+    def test_optional_count(self):
+        self.assertEqual(self._page(include_count=True)["count"], 5)
+
+    def test_async_pages_match(self):
+        page = self._page(include_count=True)
+        while page["next"]:
+            self.assertEqual(
+                async_to_sync(self.paginator.apaginate_queryset)(
+                    Organization.objects.all(),
+                    pagination=CursorPagination.Input(
+                        cursor=page["previous"], limit=2, include_count=True
+                    ),
+                ),
+                self._page(cursor=page["previous"], include_count=True),
+            )
+            page = self._page(cursor=page["next"], include_count=True)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(HttpError):
+            self._page(cursor="not-a-cursor")
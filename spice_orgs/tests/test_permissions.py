@@ -0,0 +1,201 @@
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import RequestFactory
+
+from ..models import Member, Team
+from ..permissions import Action, authorize, get_membership
+from .test_organizations import OrganizationTestCase
+
+UserModel = get_user_model()
+
+
+class MembershipResolverTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+
+    def _request(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return request
+
+    def test_resolve_organization_owner_in_one_query(self):
+        request = self._request(self.user_1)
+        with self.assertNumQueries(1):
+            membership = get_membership(request, self.organization.slug)
+        self.assertEqual(membership.organization, self.organization)
+        self.assertEqual(membership.member.role, Member.MemberRole.OWNER)
+        self.assertTrue(membership.is_owner)
+        self.assertTrue(membership.can_manage_organization)
+
+    def test_resolve_team_membership_in_one_query(self):
+        request = self._request(self.user_1)
+        with self.assertNumQueries(1):
+            membership = get_membership(request, self.organization.slug, self.team.slug)
+        self.assertEqual(membership.team, self.team)
+        self.assertTrue(membership.is_team_owner)
+        self.assertTrue(membership.can_manage_team)
+
+    def test_resolve_non_team_member(self):
+        membership = get_membership(
+            self._request(self.user_2), self.organization.slug, self.team.slug
+        )
+        self.assertTrue(membership.is_member)
+        self.assertFalse(membership.is_owner)
+        self.assertFalse(membership.is_team_member)
+        self.assertFalse(membership.can_view_team)
+        self.assertFalse(membership.can_manage_team)
+
+    def test_membership_is_memoized_on_request(self):
+        request = self._request(self.user_1)
+        membership = get_membership(request, self.organization.slug, self.team.slug)
+        with self.assertNumQueries(0):
+            self.assertIs(
+                get_membership(request, self.organization.slug, self.team.slug),
+                membership,
+            )
+
+    def test_missing_organization_or_team(self):
+        request = self._request(self.user_1)
+        with self.assertRaises(Http404):
+            get_membership(request, "missing-org")
+        with self.assertRaises(Http404):
+            get_membership(request, self.organization.slug, "missing-team")
+
+
+class TeamDetailsTest(OrganizationTestCase):
+    def test_team_details_for_owner(self):
+        organization = self._create_organization_via_orm()
+        team = Team.objects.create(
+            name="First Team", organization=organization, created_by=self.user_1
+        )
+        self.client.login(username=self.user_1.get_username(), password="password")
+        response = self.client.get(
+            path=f"/api/organizations/{organization.slug}/teams/{team.slug}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "name": team.name,
+                "slug": team.slug,
+                "visible_to_organization": team.visible_to_organization,
+                "member_count": 1,
+            },
+        )
+
+
+class BatchAuthorizationTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.public = self._create_organization_via_orm()
+        self.private = self._create_organization_via_orm(
+            "Second Org", publicly_visible=False
+        )
+        self.public.add_user_to_organization(username=self.user_2.username)
+        self.visible_team = Team.objects.create(
+            name="Visible Team",
+            organization=self.public,
+            created_by=self.user_1,
+            visible_to_organization=True,
+        )
+        self.hidden_team = Team.objects.create(
+            name="Hidden Team", organization=self.public, created_by=self.user_1
+        )
+
+    def test_rules_of_the_views(self):
+        checks = [
+            ("user_2", "first-org", None, Action.VIEW_ORGANIZATION),
+            ("user_2", "first-org", None, Action.MANAGE_ORGANIZATION),
+            ("user_1", "first-org", None, Action.MANAGE_ORGANIZATION),
+            ("user_2", "second-org", None, Action.VIEW_ORGANIZATION),
+            ("user_1", "second-org", None, Action.VIEW_ORGANIZATION),
+            ("user_2", "first-org", "visible-team", Action.VIEW_TEAM),
+            ("user_2", "first-org", "hidden-team", Action.VIEW_TEAM),
+            ("user_1", "first-org", "hidden-team", Action.VIEW_TEAM),
+            ("user_2", "first-org", "visible-team", Action.MANAGE_TEAM),
+            ("user_1", "first-org", "visible-team", Action.MANAGE_TEAM),
+            ("user_2", "first-org", None, Action.VIEW_TEAM),
+            ("user_2", "first-org", "missing-team", Action.VIEW_ORGANIZATION),
+            ("nobody", "first-org", None, Action.VIEW_ORGANIZATION),
+            ("user_1", "missing-org", None, Action.VIEW_ORGANIZATION),
+        ]
+        # users, organizations, teams, effective permissions
+        with self.assertNumQueries(4):
+            allowed = authorize(checks)
+        self.assertEqual(
+            allowed,
+            [
+                True,
+                False,
+                True,
+                False,
+                True,
+                True,
+                False,
+                True,
+                False,
+                True,
+                False,
+                False,
+                False,
+                False,
+            ],
+        )
+
+        self.hidden_team.add_user_to_team(username="user_2", role="OWNER")
+        self.assertEqual(
+            authorize(
+                [
+                    ("user_2", "first-org", "hidden-team", Action.VIEW_TEAM),
+                    ("user_2", "first-org", "hidden-team", Action.MANAGE_TEAM),
+                ]
+            ),
+            [True, True],
+        )
+
+    def test_query_count_does_not_depend_on_checks(self):
+        checks = [("user_2", "first-org", "visible-team", Action.VIEW_TEAM)] * 500
+        with self.assertNumQueries(4):
+            self.assertTrue(all(authorize(checks)))
+
+    def test_endpoint(self):
+        payload = {
+            "checks": [
+                {
+                    "user": "user_2",
+                    "organization_slug": "first-org",
+                    "team_slug": "hidden-team",
+                    "action": "view_team",
+                },
+                {
+                    "user": "user_1",
+                    "organization_slug": "first-org",
+                    "action": "manage_organization",
+                },
+            ]
+        }
+        for prefix in ("/api/organizations", "/api/async/organizations"):
+            with self.subTest(prefix=prefix):
+                self.client.login(username="user_1", password="password")
+                response = self.client.post(
+                    f"{prefix}/authorize", payload, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 403)
+
+                UserModel.objects.filter(username="user_1").update(is_staff=True)
+                response = self.client.post(
+                    f"{prefix}/authorize", payload, content_type="application/json"
+                )
+                UserModel.objects.filter(username="user_1").update(is_staff=False)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [
+                        (result["action"], result["allowed"])
+                        for result in response.json()
+                    ],
+                    [("view_team", False), ("manage_organization", True)],
+                )
+                self.assertEqual(response.json()[1]["team_slug"], None)
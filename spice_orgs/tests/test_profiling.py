@@ -0,0 +1,83 @@
+from django.test import override_settings
+
+from ..profiling import render_metrics, reset_metrics
+from .test_organizations import OrganizationTestCase
+
+
+class ProfilingTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        reset_metrics()
+        self.organization = self._create_organization_via_orm()
+
+    def _timings(self, response) -> dict:
+        timings = {}
+        for metric in response.headers["Server-Timing"].split(", "):
+            name, duration, *description = metric.split(";")
+            timings[name] = (float(duration.removeprefix("dur=")), description)
+        return timings
+
+    def test_server_timing(self):
+        for path in ("/api/organizations/", "/api/async/organizations/"):
+            response = self.client.get(path)
+            timings = self._timings(response)
+            self.assertEqual(set(timings), {"db", "serialize", "total"})
+            # the anonymous list runs its validator, count and page queries
+            self.assertEqual(timings["db"][1], ['desc="3 queries"'])
+            self.assertGreaterEqual(
+                timings["total"][0], timings["db"][0] + timings["serialize"][0]
+            )
+
+    def _metrics(self) -> str:
+        self.user_1.is_staff = True
+        self.user_1.save()
+        self.client.force_login(self.user_1)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode()
+
+    def test_metrics_are_labeled_by_api_and_route_template(self):
+        for _request in range(2):
+            self.client.get(f"/api/organizations/{self.organization.slug}/")
+        self.client.get("/api/organizations/missing/")
+        self.client.get(f"/api/async/organizations/{self.organization.slug}/")
+        metrics = self._metrics()
+        self.assertIn("# TYPE spice_orgs_request_duration_seconds histogram", metrics)
+        self.assertIn(
+            'spice_orgs_request_duration_seconds_count{api="api-1.0.0",'
+            'method="GET",route="/{organization_slug}/"} 3',
+            metrics,
+        )
+        self.assertIn(
+            'spice_orgs_db_queries_bucket{api="api-1.0.0",method="GET",'
+            'route="/{organization_slug}/",le="+Inf"} 3',
+            metrics,
+        )
+        # the async API mounts the same routes, in its own series
+        self.assertIn(
+            'spice_orgs_request_duration_seconds_count{api="async_api",'
+            'method="GET",route="/{organization_slug}/"} 1',
+            metrics,
+        )
+        self.assertNotIn("missing", metrics)
+
+    def test_metrics_are_for_staff_only(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(self.user_2)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    @override_settings(SPICE_ORGS_METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        for authorization, status in [
+            ("Bearer secret", 200),
+            ("Bearer wrong", 403),
+            ("", 403),
+        ]:
+            with self.subTest(authorization=authorization):
+                response = self.client.get("/metrics", HTTP_AUTHORIZATION=authorization)
+                self.assertEqual(response.status_code, status)
+
+    def test_requests_outside_the_routers_are_not_profiled(self):
+        response = self.client.get("/metrics")
+        self.assertNotIn("Server-Timing", response.headers)
+        self.assertEqual(render_metrics().count("_count{"), 0)
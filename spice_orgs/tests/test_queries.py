@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+
+from ..models import Organization, Team
+from .test_organizations import OrganizationTestCase
+from .utils import QueryCountMixin
+
+UserModel = get_user_model()
+
+# session + user lookup done by the authentication middleware
+AUTH_QUERIES = 2
+
+
+class ListQueryCountTest(QueryCountMixin, OrganizationTestCase):
+    """
+    List endpoints load everything a page renders up front: the number of queries
+    per page is fixed, whatever the page size.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        super().setUpTestData()
+        users = UserModel.objects.bulk_create(
+            [UserModel(username=f"member_{index}") for index in range(50)]
+        )
+        cls.organization = Organization.objects.create(
+            name="First Org", created_by=cls.user_1
+        )
+        cls.organization.add_users_to_organization(
+            (user.username, None) for user in users
+        )
+        cls.organization.member_set.update(publicly_visible=True)
+        cls.team = Team.objects.create(
+            name="First Team", organization=cls.organization, created_by=cls.user_1
+        )
+        cls.team.add_users_to_team((user.username, None) for user in users)
+        for index in range(50):
+            Organization.objects.create(name=f"Org {index}", created_by=cls.user_1)
+            Team.objects.create(
+                name=f"Team {index}",
+                organization=cls.organization,
+                created_by=cls.user_1,
+            )
+
+    def setUp(self) -> None:
+        self.client.login(username=self.user_1.get_username(), password="password")
+        self.path = f"/api/organizations/{self.organization.slug}"
+
+    def test_list_organizations(self):
+        # validator + page + count
+        self.assertQueriesPerPage("/api/organizations/", AUTH_QUERIES + 3)
+
+    def test_list_organization_members(self):
+        # membership (which carries the validator) + page + count
+        self.assertQueriesPerPage(f"{self.path}/members/", AUTH_QUERIES + 3)
+
+    def test_list_teams(self):
+        # membership (which carries the validator) + page + count
+        self.assertQueriesPerPage(f"{self.path}/teams/", AUTH_QUERIES + 3)
+
+    def test_list_team_members(self):
+        # membership (which carries the validator) + page + count
+        self.assertQueriesPerPage(
+            f"{self.path}/teams/{self.team.slug}/members/", AUTH_QUERIES + 3
+        )
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from ..benchmarks import endpoints
+from ..seed import seed_dataset
+from .test_organizations import OrganizationTestCase
+from .utils import QueryCountMixin, load_query_budgets, query_budget
+
+UserModel = get_user_model()
+
+# the budgets hold at every size, a query count growing with the data fails one
+DATA_SIZES = {
+    "small": {"whale_members": 12, "whale_teams": 2, "team_members": 4},
+    "large": {"whale_members": 60, "whale_teams": 6, "team_members": 20},
+}
+
+
+@override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+class QueryBudgetTest(QueryCountMixin, OrganizationTestCase):
+    def test_every_operation_has_a_budget(self):
+        self.assertEqual(set(load_query_budgets()), endpoints.router_operations())
+
+    def test_operations_within_budget(self):
+        for size, dataset in DATA_SIZES.items():
+            with endpoints.rolled_back():
+                seed_dataset(
+                    organizations=3,
+                    users=dataset["whale_members"] + 10,
+                    members=5,
+                    whales=1,
+                    teams=2,
+                    prefix=f"budget_{size}",
+                    **dataset,
+                )
+                fixture = endpoints.Fixture.load("/api/organizations")
+                self.client.force_login(fixture.owner)
+                for name, build in endpoints.CASES.items():
+                    with self.subTest(size=size, operation=name):
+                        with endpoints.rolled_back():
+                            method, path, data = build(fixture)
+                            with self.assertWithinQueryBudget(
+                                name, label=f"{name} ({size})"
+                            ):
+                                response = endpoints.send_request(
+                                    self.client, method, path, data
+                                )
+                        self.assertLess(response.status_code, 300, path)
+
+    def test_budget_failure_lists_the_queries(self):
+        with self.assertRaisesRegex(AssertionError, "two users ran 2 queries") as error:
+            with query_budget(1, label="two users"):
+                list(UserModel.objects.all())
+                list(UserModel.objects.filter(username="user_1"))
+        self.assertIn('2. SELECT "auth_user"', str(error.exception))
+
+        @query_budget(1)
+        def count_users():
+            return UserModel.objects.count()
+
+        for _call in range(2):
+            self.assertEqual(count_users(), 2)
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .. import rendering
+from ..models import Team
+from .test_organizations import OrganizationTestCase
+
+UserModel = get_user_model()
+
+PREFIXES = ("/api/organizations", "/api/async/organizations")
+
+
+class FastRenderTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self._create_organization_via_orm("Second Org", publicly_visible=False)
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        for index in range(4):
+            user = UserModel.objects.create(
+                username=f"member_{index}",
+                email=f"member_{index}@example.com",
+                first_name="Zoë" if index % 2 else "",
+                last_name='"Quoted"',
+            )
+            self.organization.add_user_to_organization(username=user.username)
+            self.team.add_user_to_team(username=user.username)
+        self.client.login(username=self.user_1.get_username(), password="password")
+
+    def _paths(self, prefix) -> list:
+        organization = f"{prefix}/{self.organization.slug}"
+        return [
+            f"{prefix}/",
+            f"{organization}/members/",
+            f"{organization}/teams/",
+            f"{organization}/teams/{self.team.slug}/members/",
+        ]
+
+    def _get(self, path, params, fast, **headers):
+        render = mock.patch.object(
+            rendering, "render_page", wraps=rendering.render_page
+        )
+        with override_settings(SPICE_ORGS_FAST_RENDER=fast), render as render_page:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(path, params, **headers)
+        self.assertEqual(render_page.called, fast and response.status_code == 200)
+        return response, len(context)
+
+    def test_same_bytes_as_the_schemas(self):
+        for prefix in PREFIXES:
+            for path in self._paths(prefix):
+                for offset in range(0, 6, 2):
+                    params = {"limit": 2, "offset": offset}
+                    with self.subTest(path=path, offset=offset):
+                        expected, queries = self._get(path, params, fast=False)
+                        response, fast_queries = self._get(path, params, fast=True)
+                        self.assertEqual(response.status_code, 200)
+                        self.assertEqual(response.content, expected.content)
+                        self.assertEqual(response["ETag"], expected["ETag"])
+                        self.assertEqual(
+                            response["Content-Type"], expected["Content-Type"]
+                        )
+                        self.assertEqual(fast_queries, queries)
+
+    def test_not_modified(self):
+        path = (
+            f"/api/organizations/{self.organization.slug}"
+            f"/teams/{self.team.slug}/members/"
+        )
+        etag = self._get(path, {}, fast=True)[0]["ETag"]
+        response, _queries = self._get(path, {}, fast=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # the ETag still covers the rows joined for the nested member
+        self.organization.update_user_in_organization("member_0", "OWNER")
+        response, _queries = self._get(path, {}, fast=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,124 @@
+from django.core.cache import cache as default_cache
+from django.test import RequestFactory, override_settings
+
+from ..models import Permission, Team, check_effective_permissions
+from ..permissions import Action, authorize, get_membership
+from .test_organizations import OrganizationTestCase
+
+
+class CustomRoleTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm(publicly_visible=False)
+        self.organization.add_user_to_organization(username=self.user_2.username)
+        self.team = Team.objects.create(
+            name="Hidden Team", organization=self.organization, created_by=self.user_1
+        )
+        self.auditor = self.organization.create_role(
+            "Auditor", Permission.VIEW_ORGANIZATION | Permission.VIEW_TEAM
+        )
+        self.maintainer = self.organization.create_role(
+            "Maintainer", Permission.MANAGE_TEAM
+        )
+
+    def _membership(self, team_slug=None):
+        request = RequestFactory().get("/")
+        request.user = self.user_2
+        return get_membership(request, self.organization.slug, team_slug)
+
+    def test_organization_role_applies_to_every_team(self):
+        self.assertFalse(self._membership(self.team.slug).can_view_team)
+
+        self.organization.assign_custom_role(self.user_2.username, self.auditor)
+        membership = self._membership(self.team.slug)
+        self.assertTrue(membership.can_view_every_team)
+        self.assertTrue(membership.can_view_team)
+        self.assertFalse(membership.can_manage_team)
+        self.assertFalse(membership.can_manage_organization)
+        self.assertEqual(
+            authorize(
+                [
+                    ("user_2", self.organization.slug, "hidden-team", Action.VIEW_TEAM),
+                    (
+                        "user_2",
+                        self.organization.slug,
+                        "hidden-team",
+                        Action.MANAGE_TEAM,
+                    ),
+                ]
+            ),
+            [True, False],
+        )
+
+        self.client.login(username=self.user_2.get_username(), password="password")
+        url = f"/api/organizations/{self.organization.slug}/teams/"
+        self.assertEqual(self.client.get(f"{url}{self.team.slug}").status_code, 200)
+        self.assertEqual(self.client.get(url).json()["count"], 1)
+
+    def test_organization_role_updates_and_deletes(self):
+        self.client.login(username=self.user_2.get_username(), password="password")
+        for prefix in ("/api/organizations", "/api/async/organizations"):
+            with self.subTest(prefix=prefix):
+                url = f"{prefix}/{self.organization.slug}/"
+                self.organization.assign_custom_role(self.user_2.username, None)
+                payload = {"name": "First Org", "publicly_visible": False}
+                response = self.client.patch(
+                    url, data=payload, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(self.client.delete(url).status_code, 403)
+
+                manager = self.organization.create_role(
+                    f"Manager {len(prefix)}", Permission.MANAGE_ORGANIZATION
+                )
+                self.organization.assign_custom_role(self.user_2.username, manager)
+                response = self.client.patch(
+                    url, data=payload, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.client.delete(url).status_code, 202)
+
+    def test_team_role_applies_to_its_team(self):
+        other_team = Team.objects.create(
+            name="Other Team", organization=self.organization, created_by=self.user_1
+        )
+        self.team.add_user_to_team(username=self.user_2.username)
+        self.team.assign_custom_role(self.user_2.username, self.maintainer)
+        self.assertTrue(self._membership(self.team.slug).can_manage_team)
+        self.assertFalse(self._membership(other_team.slug).can_view_team)
+        # team roles grant nothing in the organization
+        self.assertFalse(self._membership().can_manage_organization)
+        self.assertEqual(check_effective_permissions(), {})
+
+    def test_role_changes_reach_its_holders(self):
+        self.organization.assign_custom_role(self.user_2.username, self.auditor)
+        self.auditor.permissions |= Permission.MANAGE_BILLING
+        self.auditor.save()
+        self.assertTrue(self._membership().has_permission(Permission.MANAGE_BILLING))
+        self.assertEqual(check_effective_permissions(), {})
+
+        self.auditor.delete()
+        self.assertFalse(self._membership(self.team.slug).can_view_team)
+        self.assertEqual(check_effective_permissions(), {})
+
+    def test_role_of_another_organization_is_refused(self):
+        other = self._create_organization_via_orm("Second Org")
+        role = other.create_role("Auditor", Permission.VIEW_TEAM)
+        with self.assertRaises(Exception):
+            self.organization.assign_custom_role(self.user_2.username, role)
+
+    def test_built_in_roles_need_no_role_rows(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(self._membership(self.team.slug).can_view_team)
+
+    @override_settings(SPICE_ORGS_CACHE={"ALIAS": "default", "TIMEOUT": 60})
+    def test_role_rows_are_cached(self):
+        default_cache.clear()
+        self.organization.assign_custom_role(self.user_2.username, self.auditor)
+        for _warm in range(2):
+            self._membership(self.team.slug)
+        with self.assertNumQueries(0):
+            self.assertTrue(self._membership(self.team.slug).can_view_team)
+
+        self.auditor.permissions = Permission.VIEW_ORGANIZATION
+        self.auditor.save()
+        self.assertFalse(self._membership(self.team.slug).can_view_team)
@@ -0,0 +1,75 @@
+from django.db import connections, router
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Organization
+from ..routing import PIN_COOKIE, reading_from
+from .test_organizations import OrganizationTestCase
+
+
+@override_settings(SPICE_ORGS_REPLICAS={"ALIASES": ["replica"], "PIN_SECONDS": 5})
+class ReplicaRoutingTest(OrganizationTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        self.url = f"/api/organizations/{self.organization.slug}/"
+
+    def _replicate(self, **changes) -> None:
+        """Copy the organization and its creator to the replica, as it lags."""
+        self.user_1.save(using="replica")
+        Organization.objects.using("replica").bulk_create(
+            [Organization(**{**self._organization_fields(), **changes})]
+        )
+
+    def _organization_fields(self) -> dict:
+        return {
+            field.attname: getattr(self.organization, field.attname)
+            for field in Organization._meta.concrete_fields
+        }
+
+    def test_safe_requests_read_the_replica(self):
+        self._replicate(name="Lagging Name")
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            for path in (
+                self.url,
+                f"/api/async/organizations/{self.organization.slug}/",
+            ):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["name"], "Lagging Name")
+        self.assertTrue(replica.captured_queries)
+
+    def test_missing_on_the_replica(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self._replicate(name="Lagging Name")
+        self.client.login(username=self.user_1.get_username(), password="password")
+        response = self.client.patch(
+            path=self.url,
+            data={"name": self.organization.name, "publicly_visible": False},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["name"], self.organization.name)
+        self.assertFalse(replica.captured_queries)
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.client.patch(
+            path=self.url, data={}, content_type="application/json"
+        )
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_writes_go_to_the_primary(self):
+        with reading_from("replica"):
+            self.assertEqual(router.db_for_read(Organization), "replica")
+            self.assertEqual(router.db_for_write(Organization), "default")
+
+    @override_settings(SPICE_ORGS_REPLICAS=None)
+    def test_disabled(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
@@ -0,0 +1,168 @@
+from django.contrib.auth import get_user_model
+
+from ..models import Member, Permission, Team
+from ..search import search_members, search_organizations, search_teams, search_terms
+from .test_organizations import OrganizationTestCase
+
+UserModel = get_user_model()
+
+
+class SearchTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.public = self._create_organization_via_orm("Acme Widgets")
+        self.private = self._create_organization_via_orm(
+            "Acme Secret Labs", publicly_visible=False
+        )
+        self.alice = UserModel.objects.create(
+            username="alice", email="alice@example.com"
+        )
+        self.public.add_user_to_organization(username="alice")
+        Member.objects.filter(user=self.alice).update(publicly_visible=True)
+        self.private.add_user_to_organization(username="user_2")
+        self.visible_team = Team.objects.create(
+            name="Widget Builders",
+            organization=self.private,
+            created_by=self.user_1,
+            visible_to_organization=True,
+        )
+        self.hidden_team = Team.objects.create(
+            name="Widget Skunkworks", organization=self.private, created_by=self.user_1
+        )
+
+    def _names(self, rows, attribute="name"):
+        return [getattr(row, attribute) for row in rows]
+
+    def test_terms(self):
+        self.assertEqual(search_terms(' Acme  "wid*" OR '), ["acme", "wid", "or"])
+        self.assertEqual(list(search_organizations(self.user_1, [])), [])
+
+    def test_organizations_by_word_prefix(self):
+        self.assertEqual(
+            self._names(search_organizations(None, search_terms("acm"))),
+            ["Acme Widgets"],
+        )
+        self.assertEqual(
+            self._names(search_organizations(self.user_1, search_terms("acm"))),
+            ["Acme Secret Labs", "Acme Widgets"],
+        )
+        self.assertEqual(
+            self._names(search_organizations(self.user_1, search_terms("acme lab"))),
+            ["Acme Secret Labs"],
+        )
+        self.assertEqual(
+            self._names(search_organizations(self.user_1, search_terms("cme"))), []
+        )
+
+    def test_index_follows_writes(self):
+        self.public.name = "Globex"
+        self.public.save()
+        self.assertEqual(
+            self._names(search_organizations(None, search_terms("glob"))), ["Globex"]
+        )
+        self.assertEqual(list(search_organizations(None, search_terms("widg"))), [])
+        self.public.delete()
+        self.assertEqual(list(search_organizations(None, search_terms("glob"))), [])
+
+    def test_teams(self):
+        self.assertEqual(list(search_teams(None, search_terms("widget"))), [])
+        # not a member of the organization
+        self.assertEqual(list(search_teams(self.alice, search_terms("widget"))), [])
+        self.assertEqual(
+            self._names(search_teams(self.user_2, search_terms("widget"))),
+            ["Widget Builders"],
+        )
+        self.assertEqual(
+            self._names(search_teams(self.user_1, search_terms("widget"))),
+            ["Widget Builders", "Widget Skunkworks"],
+        )
+
+    def test_teams_of_a_custom_role(self):
+        role = self.private.create_role("Auditor", Permission.VIEW_TEAM)
+        self.private.assign_custom_role("user_2", role)
+        self.assertEqual(
+            self._names(search_teams(self.user_2, search_terms("widget"))),
+            ["Widget Builders", "Widget Skunkworks"],
+        )
+
+    def _usernames(self, user, query):
+        return [
+            member.user.username for member in search_members(user, search_terms(query))
+        ]
+
+    def test_members_of_a_custom_role(self):
+        role = self.private.create_role("Auditor", Permission.VIEW_TEAM)
+        self.private.assign_custom_role("user_2", role)
+        self.assertEqual(self._usernames(self.user_2, "user_1"), [])
+        role.permissions = Permission.MANAGE_ORGANIZATION
+        role.save()
+        self.assertEqual(self._usernames(self.user_2, "user_1"), ["user_1"])
+
+    def test_members(self):
+        usernames = self._usernames
+
+        self.assertEqual(usernames(None, "ali"), ["alice"])
+        self.assertEqual(usernames(None, "example"), ["alice"])
+        # user_2 is a private member of a private organization
+        self.assertEqual(usernames(None, "user_2"), [])
+        self.assertEqual(usernames(self.alice, "user_2"), [])
+        self.assertEqual(usernames(self.user_1, "user_2"), ["user_2"])
+        self.assertEqual(usernames(self.user_2, "user_2"), [])
+        self.assertEqual(usernames(self.user_2, "user_1"), [])
+
+
+class SearchEndpointTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm("Acme Widgets")
+        Team.objects.create(
+            name="Widget Builders",
+            organization=self.organization,
+            created_by=self.user_1,
+        )
+
+    def test_search(self):
+        self.client.login(username="user_1", password="password")
+        for prefix in ("/api/organizations", "/api/async/organizations"):
+            with self.subTest(prefix=prefix):
+                with self.assertNumQueries(5):
+                    response = self.client.get(f"{prefix}/search?q=wid")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json(),
+                    {
+                        "organizations": [
+                            {
+                                "name": "Acme Widgets",
+                                "slug": "acme-widgets",
+                                "publicly_visible": True,
+                                "member_count": 1,
+                            }
+                        ],
+                        "teams": [
+                            {
+                                "organization_slug": "acme-widgets",
+                                "name": "Widget Builders",
+                                "slug": "widget-builders",
+                                "visible_to_organization": False,
+                                "member_count": 1,
+                            }
+                        ],
+                        "members": [],
+                    },
+                )
+                response = self.client.get(f"{prefix}/search?q=user_1")
+                self.assertEqual(
+                    response.json()["members"],
+                    [
+                        {
+                            "organization_slug": "acme-widgets",
+                            "user": {
+                                "username": "user_1",
+                                "email": "",
+                                "first_name": "",
+                                "last_name": "",
+                            },
+                            "role": "OWNER",
+                        }
+                    ],
+                )
+                self.assertEqual(self.client.get(f"{prefix}/search").status_code, 422)
@@ -1,3 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import BulkStatus, Team, TeamMember
+from .test_organizations import OrganizationTestCase
+
+UserModel = get_user_model()
+
 # from django.test import TestCase
 
 
@@ -11,3 +20,108 @@
 
 #         self.assertEqual(response.status_code, 200)
 #         self.assertEqual(len(callbacks), 1)
+
+
+class BulkTeamMembersTest(OrganizationTestCase):
+    def setUp(self) -> None:
+        self.organization = self._create_organization_via_orm()
+        UserModel.objects.bulk_create(
+            [UserModel(username=f"bulk_{index}") for index in range(10)]
+        )
+        self.organization.add_users_to_organization(
+            (f"bulk_{index}", None) for index in range(10)
+        )
+        self.team = Team.objects.create(
+            name="First Team", organization=self.organization, created_by=self.user_1
+        )
+        self.url = (
+            f"/api/organizations/{self.organization.slug}/teams/{self.team.slug}"
+            "/members/bulk/"
+        )
+        self.client.login(username=self.user_1.get_username(), password="password")
+
+    def test_bulk_add_members_to_team(self):
+        response = self.client.post(
+            path=self.url,
+            data={
+                "members": [
+                    {"username": "bulk_0"},
+                    {"username": "bulk_1", "role": "OWNER"},
+                    {"username": self.user_1.username},
+                    {"username": self.user_2.username},
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["status"] for row in response.json()],
+            [
+                BulkStatus.ADDED,
+                BulkStatus.ADDED,
+                BulkStatus.EXISTS,
+                BulkStatus.NOT_MEMBER,
+            ],
+        )
+        self.assertEqual(self.team.teammember_set.count(), 3)
+
+    def test_bulk_add_query_count_does_not_depend_on_rows(self):
+        # the same 11 queries for 1 row and 9 rows (plus the savepoint), 4 of
+        # them sync the effective permissions
+        with self.assertNumQueries(12):
+            self.team.add_users_to_team([("bulk_0", None)])
+        with self.assertNumQueries(12):
+            self.team.add_users_to_team(
+                (f"bulk_{index}", None) for index in range(1, 10)
+            )
+
+    def test_bulk_update_and_remove_query_count_does_not_depend_on_rows(self):
+        self.team.add_users_to_team((f"bulk_{index}", None) for index in range(10))
+        for change in (
+            lambda usernames: self.team.update_users_in_team(usernames, "OWNER"),
+            self.team.remove_users_from_team,
+        ):
+            counts = []
+            for usernames in (["bulk_0"], [f"bulk_{index}" for index in range(1, 10)]):
+                with CaptureQueriesContext(connection) as context:
+                    change(usernames)
+                counts.append(len(context))
+            # the change log entries of every row are one insert
+            self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_update_and_remove_members(self):
+        self.team.add_users_to_team((f"bulk_{index}", None) for index in range(5))
+        response = self.client.patch(
+            path=self.url,
+            data={"usernames": ["bulk_0", "bulk_1", "bulk_9"], "team_role": "OWNER"},
+            content_type="application/json",
+        )
+        self.assertEqual(
+            [row["status"] for row in response.json()],
+            [BulkStatus.UPDATED, BulkStatus.UPDATED, BulkStatus.NOT_TEAM_MEMBER],
+        )
+        response = self.client.post(
+            path=f"{self.url}remove",
+            data={"usernames": ["bulk_0", "bulk_2", self.user_1.username]},
+            content_type="application/json",
+        )
+        self.assertEqual(
+            [row["status"] for row in response.json()],
+            [BulkStatus.REMOVED] * 3,
+        )
+        self.assertEqual(
+            list(
+                self.team.teammember_set.filter(
+                    team_role=TeamMember.TeamMemberRole.OWNER
+                ).values_list("member__user__username", flat=True)
+            ),
+            ["bulk_1"],
+        )
+
+    def test_bulk_remove_keeps_an_owner(self):
+        self.team.add_users_to_team([("bulk_0", None)])
+        with self.assertRaisesMessage(Exception, "Cannot remove only owner"):
+            self.team.remove_users_from_team([self.user_1.username, "bulk_0"])
+        with self.assertRaisesMessage(Exception, "Cannot remove only owner"):
+            self.team.update_users_in_team([self.user_1.username], role="MEMBER")
+        self.assertEqual(self.team.teammember_set.count(), 2)
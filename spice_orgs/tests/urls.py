@@ -2,7 +2,15 @@ from django.urls import path
 from ninja import NinjaAPI
 
 from ..api import router as organization_router
+from ..api_async import router as async_organization_router
+from ..profiling import metrics_view
 
 api = NinjaAPI()
 api.add_router("/organizations/", organization_router)
-urlpatterns = (path("api/", api.urls),)
+async_api = NinjaAPI(urls_namespace="async_api")
+async_api.add_router("/organizations/", async_organization_router)
+urlpatterns = (
+    path("api/", api.urls),
+    path("api/async/", async_api.urls),
+    path("metrics", metrics_view),
+)
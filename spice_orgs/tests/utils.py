@@ -0,0 +1,91 @@
+from contextlib import ContextDecorator
+import copy
+from pathlib import Path
+import tomllib
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import CaptureQueriesContext
+
+QUERY_BUDGETS = Path(__file__).with_name("query_budgets.toml")
+
+
+def load_query_budgets(path=QUERY_BUDGETS) -> dict:
+    """The most queries each router operation may run, by operation name."""
+    with open(path, "rb") as file:
+        return tomllib.load(file)["budgets"]
+
+
+def _format_queries(context) -> str:
+    return "\n".join(
+        f"{index}. {query['sql']}"
+        for index, query in enumerate(context.captured_queries, start=1)
+    )
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail when the block, or every call of the decorated function, runs more
+    than `max_queries` queries on the `using` database, listing the SQL it ran:
+
+        with query_budget(4, label="list_teams"):
+            client.get(...)
+    """
+
+    def __init__(self, max_queries, using=DEFAULT_DB_ALIAS, label=None):
+        self.max_queries = max_queries
+        self.using = using
+        self.label = label
+        self.context = None
+
+    def _recreate_cm(self):
+        # a fresh capture for every call of a decorated function
+        return copy.copy(self)
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        return self.context.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None or len(self.context) <= self.max_queries:
+            return False
+        raise AssertionError(
+            f"{self.label or 'block'} ran {len(self.context)} queries, over its"
+            f" budget of {self.max_queries}:\n{_format_queries(self.context)}"
+        )
+
+
+class QueryCountMixin:
+    """
+    Assertions for TestCase subclasses about how many queries an endpoint runs.
+    """
+
+    query_budgets = None
+
+    def assertQueriesPerPage(self, path, expected, page_sizes=(1, 10, 50), **params):
+        """
+        Fetch every page size of a paginated endpoint and assert each costs exactly
+        `expected` queries, i.e. the cost does not grow with the page size.
+        """
+        for limit in page_sizes:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(path, {"limit": limit, **params})
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(len(response.json()["items"]), limit)
+            queries = "\n".join(query["sql"] for query in context.captured_queries)
+            self.assertEqual(
+                len(context),
+                expected,
+                f"{path} with limit={limit} ran {len(context)} queries, expected"
+                f" {expected}:\n{queries}",
+            )
+
+    def assertWithinQueryBudget(self, operation, label=None):
+        """
+        Context manager failing when the block runs more queries than the budget
+        of router `operation` in `query_budgets.toml`.
+        """
+        if self.query_budgets is None:
+            type(self).query_budgets = load_query_budgets()
+        self.assertIn(operation, self.query_budgets, "no budget for the operation")
+        return query_budget(self.query_budgets[operation], label=label or operation)